@@ -1,6 +1,16 @@
-from fastapi import HTTPException, Header
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Header, Depends, Query
 from typing import Optional, Dict, Any
+from config import config
+from database.db import bind_organization, execute_query
 from utils.jwt_utils import verify_access_token as jwt_verify_token
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
 
 def verify_access_token(access_token: Optional[str] = Header(None, alias="access-token")) -> Dict[str, Any]:
     """
@@ -42,4 +52,170 @@ def verify_access_token(access_token: Optional[str] = Header(None, alias="access
             }
         )
     
-    return user_info
\ No newline at end of file
+    return user_info
+
+
+# ==================== 用户身份解析（user_id / organization_id / username） ====================
+# 解析顺序：
+# 1. 令牌中签名的 dcc_user_org_id 声明：令牌签发于本进程启动之后、且晚于该用户最近一次绑定变更时直接信任
+# 2. 进程内有界 TTL 缓存（LRU 淘汰），缓存写入时间需晚于该用户最近一次绑定变更
+# 3. 查询 users 表并写入缓存
+# /dcc/associate、/dcc/disassociate 修改绑定后调用 invalidate_principal，记录绑定变更时间：
+# 保存在 Redis 中（principal:binding_changed:<user_id>）供所有 API 进程共享，使各进程的旧缓存与旧令牌声明失效。
+# Redis 不可用时无法得知其他进程的绑定变更，令牌声明与缓存都不再信任，改为查询 users 表
+# 解析出的组织同时绑定到当前会话（database.db.bind_organization），读己之写按组织生效
+
+_BINDING_KEY_PREFIX = "principal:binding_changed:"
+_PROCESS_STARTED_AT = time.time()
+_principal_lock = threading.Lock()
+_principal_cache: "OrderedDict[str, tuple]" = OrderedDict()  # user_id -> (过期时间, principal, 写入时间)
+_binding_changed_at: Dict[str, float] = {}  # user_id -> 本进程记录的最近一次绑定变更时间
+_principal_stats = {"claim_hits": 0, "cache_hits": 0, "db_lookups": 0, "redis_unavailable": 0}
+
+
+def _binding_key_ttl() -> int:
+    # 覆盖令牌有效期与缓存有效期：超过后旧令牌已过期、旧缓存已淘汰，记录不再需要
+    return max(config.JWT_EXPIRE_HOURS * 3600, config.PRINCIPAL_CACHE_TTL) + 60
+
+
+def _load_binding_changed_at(user_id: str):
+    """读取用户最近一次绑定变更时间（各进程共享），返回 (Redis 是否可用, 变更时间或 None)"""
+    client = get_redis_client()
+    if client is None:
+        return False, None
+    try:
+        value = client.get(f"{_BINDING_KEY_PREFIX}{user_id}")
+    except Exception as e:
+        logger.warning(f"读取用户绑定变更时间失败: {str(e)}")
+        mark_redis_failure()
+        return False, None
+    return True, float(value) if value else None
+
+
+def _claim_is_trusted(token: Dict[str, Any], changed_at: Optional[float]) -> bool:
+    """令牌声明是否可信：携带组织声明，且签发时间晚于进程启动与该用户最近一次绑定变更"""
+    issued_at = token.get("iat")
+    if not token.get("dcc_user_org_id") or not issued_at:
+        return False
+    if issued_at < _PROCESS_STARTED_AT:
+        # 进程启动前签发的令牌：无法确认签发后是否发生过未被记录的绑定变更
+        return False
+    return changed_at is None or issued_at > changed_at
+
+
+def resolve_principal(token: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    根据已验证的令牌解析当前用户身份
+
+    Returns:
+        Dict[str, Any]: {"user_id", "organization_id", "username"}；用户未绑定组织时 organization_id 为 None
+
+    Raises:
+        ValueError: 令牌中缺少用户ID
+    """
+    user_id = token.get("user_id")
+    if not user_id:
+        raise ValueError("令牌中缺少用户ID信息")
+    cache_key = str(user_id)
+    redis_available, shared_changed_at = _load_binding_changed_at(cache_key)
+
+    with _principal_lock:
+        local_changed_at = _binding_changed_at.get(cache_key)
+        changed_at = max(filter(None, (local_changed_at, shared_changed_at)), default=None)
+        if not redis_available:
+            _principal_stats["redis_unavailable"] += 1
+        elif _claim_is_trusted(token, changed_at):
+            _principal_stats["claim_hits"] += 1
+            bind_organization(token["dcc_user_org_id"])
+            return {
+                "user_id": user_id,
+                "organization_id": token["dcc_user_org_id"],
+                "username": token.get("username") or "",
+            }
+        entry = _principal_cache.get(cache_key) if redis_available else None
+        if entry is not None and entry[0] > time.monotonic() and (changed_at is None or entry[2] > changed_at):
+            _principal_cache.move_to_end(cache_key)
+            _principal_stats["cache_hits"] += 1
+            bind_organization(entry[1]["organization_id"])
+            return dict(entry[1])
+
+    resolved_at = time.time()
+    result = execute_query("SELECT dcc_user_org_id, username FROM users WHERE id = %s", (user_id,))
+    principal = {
+        "user_id": user_id,
+        "organization_id": result[0].get("dcc_user_org_id") if result else None,
+        "username": (result[0].get("username") if result else None) or "",
+    }
+    with _principal_lock:
+        _principal_stats["db_lookups"] += 1
+        _principal_cache[cache_key] = (time.monotonic() + config.PRINCIPAL_CACHE_TTL, principal, resolved_at)
+        _principal_cache.move_to_end(cache_key)
+        while len(_principal_cache) > config.PRINCIPAL_CACHE_SIZE:
+            _principal_cache.popitem(last=False)
+    bind_organization(principal["organization_id"])
+    return dict(principal)
+
+
+def invalidate_principal(user_id: Any):
+    """用户组织绑定变更后调用：清除缓存，并使此前签发的令牌中的组织声明与其他进程的缓存不再被信任"""
+    cache_key = str(user_id)
+    changed_at = time.time()
+    with _principal_lock:
+        _principal_cache.pop(cache_key, None)
+        _binding_changed_at[cache_key] = changed_at
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        client.set(f"{_BINDING_KEY_PREFIX}{cache_key}", repr(changed_at), ex=_binding_key_ttl())
+    except Exception as e:
+        logger.warning(f"记录用户绑定变更时间失败: {str(e)}")
+        mark_redis_failure()
+
+
+def get_principal_stats() -> Dict[str, Any]:
+    """获取身份解析命中统计"""
+    with _principal_lock:
+        return dict(_principal_stats, cache_size=len(_principal_cache))
+
+
+async def get_current_principal(token: Dict[str, Any] = Depends(verify_access_token)) -> Dict[str, Any]:
+    """
+    FastAPI 依赖：返回当前用户身份 {"user_id", "organization_id", "username"}
+
+    异步依赖与接口运行在同一上下文中，解析后把组织绑定到请求上下文（读己之写按组织生效）；
+    同步依赖在线程池的上下文副本中执行，绑定无法传回接口
+
+    Raises:
+        HTTPException: 令牌缺少用户ID或用户未绑定组织时抛出 400
+    """
+    try:
+        # 缓存未命中时会查询 users 表，放到线程池执行
+        principal = await asyncio.to_thread(resolve_principal, token)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"status": "error", "code": 1003, "message": str(e)}
+        )
+    if not principal["organization_id"]:
+        raise HTTPException(
+            status_code=400,
+            detail={"status": "error", "code": 1003, "message": "用户未绑定组织或组织ID无效"}
+        )
+    bind_organization(principal["organization_id"])
+    return principal
+
+
+def verify_stream_access_token(
+    access_token: Optional[str] = Header(None, alias="access-token"),
+    query_token: Optional[str] = Query(None, alias="access_token")
+) -> Dict[str, Any]:
+    """
+    SSE 接口使用的令牌验证：浏览器 EventSource 无法设置请求头，允许通过查询参数 access_token 传递令牌（请求头优先）
+    """
+    return verify_access_token(access_token or query_token)
+
+
+async def get_stream_principal(token: Dict[str, Any] = Depends(verify_stream_access_token)) -> Dict[str, Any]:
+    """FastAPI 依赖：SSE 接口的当前用户身份（同 get_current_principal）"""
+    return await get_current_principal(token)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request, Response
+from fastapi.responses import StreamingResponse
 import logging
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
@@ -7,8 +8,16 @@ import json
 import threading
 import asyncio
 import os
-from database.db import execute_query, execute_update
-from .auth import verify_access_token
+from config import config
+from database.db import bulk_update, execute_query, execute_update, fetch_all, iter_query, unit_of_work
+from database.call_task_cache import bump_task_org_version, get_call_task, get_org_aggregate, org_aggregate_key, set_org_aggregate
+from database.org_version import CALL_TASKS, LEADS, LEADS_TASK_LIST, org_etag
+from database.pagination import InvalidCursor
+from .auth import verify_access_token, get_current_principal, get_stream_principal
+from utils.etag import conditional_response, etag_matches
+from utils.fast_json import fast_json_response
+from utils.single_flight import single_flight
+from utils.task_events import EVENT_PROGRESS, publish_task_event, task_event_hub, task_event_stream
 from openAPI.ali_bailian_api import ali_bailian_api
 from openAPI.suspend_jobs import Sample as SuspendJobsSample
 from openAPI.resumeJobs import Sample as ResumeJobsSample
@@ -100,88 +109,59 @@ class TaskStatsResponse(BaseModel):
     message: str
     data: List[TaskTypeStats]
 
-# 任务统计缓存（内存缓存，5分钟过期）
-_task_stats_cache = {}
-_cache_expiry = 300  # 5分钟
+async def _lookup_org_aggregate(request: Request, organization_id: str, name: str, params: Optional[Dict[str, Any]] = None):
+    """
+    在线程池中依次生成 ETag、查询组织级聚合缓存（都需要访问 Redis），避免阻塞事件循环
+
+    返回 (etag, cache_key, cached)；ETag 与请求的 If-None-Match 一致时不查询缓存（cache_key、cached 为 None）
+    """
+    def lookup():
+        etag = org_etag(organization_id, name, (CALL_TASKS,), params)
+        if etag and etag_matches(request, etag):
+            return etag, None, None
+        cache_key = org_aggregate_key(organization_id, name, params)
+        return etag, cache_key, get_org_aggregate(cache_key)
+
+    return await asyncio.to_thread(lookup)
 
-def _get_cached_task_stats(cache_key: str):
-    """获取缓存的任务统计"""
-    if cache_key in _task_stats_cache:
-        data, timestamp = _task_stats_cache[cache_key]
-        if datetime.now().timestamp() - timestamp < _cache_expiry:
-            return data
-        else:
-            del _task_stats_cache[cache_key]
-    return None
-
-def _set_cached_task_stats(cache_key: str, data: any):
-    """设置缓存的任务统计"""
-    _task_stats_cache[cache_key] = (data, datetime.now().timestamp())
-    # 清理过期缓存（每100次操作清理一次）
-    if len(_task_stats_cache) > 1000:
-        current_time = datetime.now().timestamp()
-        expired_keys = [k for k, (_, t) in _task_stats_cache.items() if current_time - t >= _cache_expiry]
-        for k in expired_keys:
-            del _task_stats_cache[k]
 
 @auto_call_router.get("/task-stats", response_model=TaskStatsResponse)
 async def get_task_stats(
-    token: Dict[str, Any] = Depends(verify_access_token)
+    request: Request,
+    response: Response,
+    token: Dict[str, Any] = Depends(verify_access_token),
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     获取任务统计信息（精简版）：控制器仅做基本校验与调用服务；保留缓存和状态检查逻辑。
+
+    支持条件 GET：If-None-Match 与当前 ETag 一致时返回 304，不执行统计查询
     """
     try:
-        if not token or not token.get("user_id"):
-            raise HTTPException(
-                status_code=400,
-                detail={"status": "error", "code": 1003, "message": "令牌中缺少用户ID信息"}
-            )
-
-        # 获取用户组织ID（用于缓存和状态检查）
-        user_id = token.get("user_id")
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={"status": "error", "code": 1003, "message": "用户未绑定组织或组织ID无效"}
-            )
-        organization_id = org_result[0]['dcc_user_org_id']
-
-        # 状态检查逻辑（保留在 API 层，因为这是接口层的优化）
-        active_task_check = "SELECT COUNT(*) as active_count FROM call_tasks WHERE organization_id = %s AND task_type IN (2, 3)"
-        active_result = execute_query(active_task_check, (organization_id,))
-        active_count = active_result[0]['active_count'] if active_result else 0
-
-
-        # 检查缓存
-        cache_key = f"task_stats_{organization_id}"
-        cached_data = _get_cached_task_stats(cache_key)
+        # 用户组织ID（用于缓存和状态检查）
+        organization_id = principal["organization_id"]
+
+        # 条件 GET 与组织级聚合缓存（任务创建或状态变化时失效）
+        etag, cache_key, cached_data = await _lookup_org_aggregate(request, organization_id, "task_stats")
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
         if cached_data:
             return cached_data
 
-        # 调用服务层获取统计数据
+        # 调用服务层获取统计数据（服务层为同步实现，放到线程池执行，避免阻塞事件循环）
         from .auto_call_service import get_task_stats_service
-        result = get_task_stats_service(token=token)
 
-        if result.get("status") != "success":
-            raise HTTPException(status_code=400, detail=result)
-
-        # 转换数据格式以匹配 TaskTypeStats
-        stats_list = [
-            TaskTypeStats(
-                task_type=item['task_type'],
-                count=item['count'],
-                leads_count=item['leads_count']
-            )
-            for item in result['data']
-        ]
-        result['data'] = stats_list
+        async def compute_task_stats():
+            result = await asyncio.to_thread(get_task_stats_service, token=token)
+            if result.get("status") != "success":
+                raise HTTPException(status_code=400, detail=result)
+            # 缓存结果（data 为 TaskTypeStats 字段结构的字典列表，由 response_model 校验）
+            await asyncio.to_thread(set_org_aggregate, cache_key, result)
+            return result
 
-        # 缓存结果
-        _set_cached_task_stats(cache_key, result)
-        return result
+        # 缓存未命中时同一组织的并发请求合并为一次计算（合并键带组织版本号，任务变化后的请求不会等待旧计算）
+        return await single_flight("task_stats", organization_id, {"cache_key": cache_key}, compute_task_stats)
 
     except HTTPException:
         raise
@@ -224,23 +204,34 @@ class GetTasksResponse(BaseModel):
 
 @auto_call_router.get("/tasks", response_model=GetTasksResponse)
 async def get_tasks(
-    token: Dict[str, Any] = Depends(verify_access_token)
+    http_request: Request,
+    token: Dict[str, Any] = Depends(verify_access_token),
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     获取任务列表（精简版）：控制器仅做基本校验与调用服务。
+
+    FAST_JSON_RESPONSE=true 时服务层结果直接编码返回（不逐条构造 TaskInfo，大响应按 Accept-Encoding 压缩）
     """
     try:
-        if not token or not token.get("user_id"):
-            raise HTTPException(
-                status_code=400,
-                detail={"status": "error", "code": 1003, "message": "令牌中缺少用户ID信息"}
-            )
-
         from .auto_call_service import get_tasks_service
-        result = await get_tasks_service(token=token)
 
-        if result.get("status") != "success":
-            raise HTTPException(status_code=400, detail=result)
+        async def compute_tasks():
+            result = await get_tasks_service(token=token)
+            if result.get("status") != "success":
+                raise HTTPException(status_code=400, detail=result)
+            return result
+
+        # 同一组织的并发请求合并为一次查询与 DescribeJobGroup 状态检查
+        result = await single_flight("tasks", principal["organization_id"], None, compute_tasks)
+
+        if config.FAST_JSON_RESPONSE:
+            return fast_json_response(http_request, {
+                "status": "success",
+                "code": 200,
+                "message": "获取任务信息成功",
+                "data": result['data']
+            })
 
         # 转换数据格式以匹配 TaskInfo
         tasks_data = []
@@ -358,7 +349,10 @@ async def start_call_task(
             )
 
         from .auto_call_service import start_call_task_service
-        result = start_call_task_service(request=request, token=token)
+        # 创建任务组、分配任务等 OpenAPI 调用可能等待限流令牌，放到线程池执行，避免阻塞事件循环
+        result = await asyncio.to_thread(
+            start_call_task_service, request=request, token=token, loop=asyncio.get_running_loop()
+        )
 
         if result.get("status") != "success":
             status_code = 500 if result.get("code", 0) >= 5000 else 400
@@ -382,6 +376,8 @@ class QueryTaskExecutionRequest(BaseModel):
     task_id: int  # 任务ID
     page: int = 1  # 页码，从1开始
     page_size: int = 20  # 每页数量，默认20
+    paginate: str = "page"  # 分页方式：page-页码，cursor-游标（按id，翻页代价与页码无关）
+    cursor: Optional[str] = None  # 游标分页：上一页返回的 next_cursor，首页不传
     skip_recording: bool = True  # 是否跳过录音URL获取（默认跳过以提升性能）
     only_followed: bool = False  # 是否只查询已跟进的记录（默认False，查询所有记录）
     interest: Optional[int] = None  # 按意向筛选：0=无法判断,1=有意向,2=无意向；None=不限
@@ -395,6 +391,44 @@ class TaskExecutionResponse(BaseModel):
     data: Dict[str, Any]
 
 
+# 外呼结果回写 leads_task_list 的列（按主键 id 批量更新，见 database.db.bulk_update）
+CALL_RESULT_COLUMNS = ("call_status", "planed_time", "call_task_id", "call_conversation", "calling_number", "recording_url")
+
+
+def write_back_call_results(updates: Dict[int, tuple], log_prefix: str) -> Dict[str, Any]:
+    """
+    把 {leads_task_list.id: CALL_RESULT_COLUMNS 对应的新值} 在一个事务内分块写回（每块一条 UPDATE ... JOIN）
+
+    返回 {"updated": 成功写回的行数, "missing": 已不存在的 id 列表, "elapsed_ms"}；写回失败时整体回滚并抛出异常
+    """
+    result = bulk_update("leads_task_list", "id", CALL_RESULT_COLUMNS, ((row_id, *values) for row_id, values in updates.items()))
+    if result["missing"]:
+        print(f"{log_prefix} {len(result['missing'])} 条明细已不存在，未写回: ids={result['missing'][:10]}")
+    return {"updated": result["rows"] - len(result["missing"]), "missing": result["missing"], "elapsed_ms": result["elapsed_ms"]}
+
+
+def fetch_jobs_in_batches(job_ids: List[str], batch_size: int = 100, log_prefix: str = "[list-jobs]"):
+    """
+    按批调用 list_jobs 获取执行数据：各批次在同一个事件循环上通过异步网关（openAPI/outbound_gateway.py）并发发起，
+    同时在途的批次不超过 LIST_JOBS_CONCURRENCY，不占用额外线程
+
+    返回 (按 job_ids 原顺序合并的执行数据, 失败批次的错误信息列表)；单个批次失败不影响其他批次。
+    供同步调用方（Celery 任务、线程池）使用，不能在事件循环线程中调用
+    """
+    from openAPI.outbound_gateway import list_jobs_batched
+
+    total_batches = (len(job_ids) + batch_size - 1) // batch_size
+    print(f"{log_prefix} 调用 list_jobs 共 {total_batches} 批，job_ids数量={len(job_ids)}，并发={config.LIST_JOBS_CONCURRENCY}")
+    # asyncio.run 在新的事件循环中执行，任务复制当前上下文，OpenAPI 调用优先级（utils/rate_limiter.py）同样生效
+    all_jobs_data, batch_errors = asyncio.run(
+        list_jobs_batched(job_ids, batch_size=batch_size, concurrency=config.LIST_JOBS_CONCURRENCY)
+    )
+    for error_msg in batch_errors:
+        print(f"{log_prefix} {error_msg}")
+    print(f"{log_prefix} 成功 {total_batches - len(batch_errors)}/{total_batches} 批，返回数据数量={len(all_jobs_data)}")
+    return all_jobs_data, batch_errors
+
+
 def _query_task_execution_core(
     *,
     request: "QueryTaskExecutionRequest",
@@ -506,13 +540,9 @@ def _query_task_execution_core(
 
     # 2. 调用list_jobs接口获取任务执行状态（只查询当前页的数据）
     # 注意：阿里云 API 可能限制单次请求的 job_id 数量（通常为 100），需要分批处理
-    import sys
-    import os
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-    from list_jobs import Sample as ListJobsSample
-    from download_recording import Sample as DownloadRecordingSample
+    from openAPI.download_recording import Sample as DownloadRecordingSample
 
-    # 分批处理，每批最多 100 个 job_id（避免 API 限制）
+    # 分批处理，每批最多 100 个 job_id（避免 API 限制），各批次并发调用
     batch_size = 100
     all_jobs_data = []
     batch_errors = []
@@ -522,31 +552,10 @@ def _query_task_execution_core(
         print(f"[query-task-execution] 准备调用阿里云接口，task_id={request.task_id}, page={page}, job_ids数量={len(paginated_call_job_ids)}")
         print(f"[query-task-execution] job_ids示例: {paginated_call_job_ids[:3]}...")  # 只打印前3个
         
-        # 分批调用 API
-        for i in range(0, len(paginated_call_job_ids), batch_size):
-            batch = paginated_call_job_ids[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(paginated_call_job_ids) + batch_size - 1) // batch_size
-            
-            try:
-                print(f"[query-task-execution] 调用第 {batch_num}/{total_batches} 批，job_ids数量={len(batch)}")
-                batch_jobs_data = ListJobsSample.main([], job_ids=batch)
-                
-                if batch_jobs_data:
-                    if isinstance(batch_jobs_data, list):
-                        all_jobs_data.extend(batch_jobs_data)
-                    else:
-                        all_jobs_data.append(batch_jobs_data)
-                    
-                    print(f"[query-task-execution] 第 {batch_num} 批调用成功，返回数据数量={len(batch_jobs_data) if isinstance(batch_jobs_data, list) else 1}")
-                else:
-                    print(f"[query-task-execution] 第 {batch_num} 批返回空数据")
-                    
-            except Exception as batch_e:
-                error_msg = f"第 {batch_num} 批调用失败: {str(batch_e)}"
-                print(f"[query-task-execution] {error_msg}")
-                batch_errors.append(error_msg)
-                # 继续处理下一批，不中断整个流程
+        # 分批调用 API（结果按批次顺序合并）
+        all_jobs_data, batch_errors = fetch_jobs_in_batches(
+            paginated_call_job_ids, batch_size=batch_size, log_prefix="[query-task-execution]"
+        )
         
         # 如果所有批次都失败，抛出异常
         if not all_jobs_data and batch_errors:
@@ -663,7 +672,7 @@ def _query_task_execution_core(
         # 一次性查询所有job的当前状态
         placeholders = ','.join(['%s'] * len(job_ids))
         batch_query = f"""
-            SELECT call_job_id, call_status, planed_time, call_task_id, 
+            SELECT id, call_job_id, call_status, planed_time, call_task_id, 
                    call_conversation, calling_number, recording_url,
                    is_interested, leads_follow_id
             FROM leads_task_list 
@@ -691,7 +700,7 @@ def _query_task_execution_core(
     # 用于检查所有任务是否都完成
     task_statuses = []
 
-    updates_batch: list[tuple] = []
+    updates_batch: Dict[int, tuple] = {}  # leads_task_list.id -> CALL_RESULT_COLUMNS 对应的新值
     for job_data in jobs_data:
         job_id = job_data.get('JobId')
         # 通过映射找到对应的 call_job_id
@@ -797,49 +806,34 @@ def _query_task_execution_core(
                 print(f"[query-task-execution] job_id={job_id} call_status={job_status} 不是最终状态，跳过数据库更新，继续轮询")
                 continue
 
-            # 收集变更（是否执行更新由 apply_update 决定）
-            # 使用 call_job_id 而不是 job_id
-            update_params = (
+            # 收集变更（是否执行更新由 apply_update 决定），按明细主键写回
+            if not current_data.get('id'):
+                print(f"[query-task-execution] call_job_id={call_job_id} 不在当前任务明细中，跳过数据库更新")
+                continue
+            updates_batch[current_data['id']] = (
                 job_status,
                 plan_time,
                 call_task_id,
-                json.dumps(conversation) if conversation else None,
+                new_conversation_str,
                 calling_number,
-                recording_url,
-                request.task_id,
-                call_job_id
+                recording_url
             )
-            updates_batch.append(update_params)
 
         except Exception as e:
             error_count += 1
             print(f"更新任务 {job_id} 失败: {str(e)}")
 
-    # 执行批量更新（如果 apply_update=True 且有变更）
+    # 执行批量更新（如果 apply_update=True 且有变更）：一个事务内每块一条 UPDATE ... JOIN
     if request.apply_update and updates_batch:
-        update_sql = """
-            UPDATE leads_task_list
-            SET call_status = %s,
-                planed_time = %s,
-                call_task_id = %s,
-                call_conversation = %s,
-                calling_number = %s,
-                recording_url = %s
-            WHERE task_id = %s AND call_job_id = %s
-        """
         try:
-            # 批量执行更新
-            for update_params in updates_batch:
-                try:
-                    execute_update(update_sql, update_params)
-                    updated_count += 1
-                except Exception as e:
-                    error_count += 1
-                    print(f"[query-task-execution] 批量更新失败: {str(e)}, params={update_params[:2]}...")
-            
-            print(f"[query-task-execution] 批量更新完成: 成功 {updated_count} 条，失败 {error_count} 条")
+            write_back = write_back_call_results(updates_batch, "[query-task-execution]")
+            updated_count += write_back["updated"]
+            error_count += len(write_back["missing"])
+            print(f"[query-task-execution] 批量更新完成: 成功 {updated_count} 条，失败 {error_count} 条，耗时 {write_back['elapsed_ms']}ms")
+            if updated_count:
+                bump_task_org_version(request.task_id, LEADS_TASK_LIST)
         except Exception as e:
-            print(f"[query-task-execution] 批量更新执行失败: {str(e)}")
+            print(f"[query-task-execution] 批量更新执行失败（已回滚）: {str(e)}")
             error_count += len(updates_batch)
 
     # 返回前将 is_interested 与 follow_data 注入到每条 job_data
@@ -878,6 +872,14 @@ def _query_task_execution_core(
         task_stats["connected_calls"] = stats_result[0].get('connected_calls', 0) or 0
         task_stats["not_connected_calls"] = stats_result[0].get('not_connected_calls', 0) or 0
 
+    # 回写已提交：推送进度与最新计数给正在查看该任务的客户端
+    if request.apply_update and updated_count:
+        from .auto_call_service import task_call_counters
+        publish_task_event(request.task_id, EVENT_PROGRESS, {
+            "updated_count": updated_count,
+            "counters": dict(task_call_counters(request.task_id), is_completed=is_completed)
+        }, organization_id=task_info.get('organization_id'))
+
     return {
         "status": "success",
         "code": 200,
@@ -904,7 +906,8 @@ def _query_task_execution_core(
 @auto_call_router.post("/query-task-execution", response_model=TaskExecutionResponse)
 async def query_task_execution(
     request: QueryTaskExecutionRequest,
-    token: Dict[str, Any] = Depends(verify_access_token)
+    http_request: Request,
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     查询外呼任务执行情况
@@ -914,47 +917,17 @@ async def query_task_execution(
     2. 调用list_jobs接口获取任务执行状态
     3. 解析返回数据并更新leads_task_list表
     
+    FAST_JSON_RESPONSE=true 时结果直接编码返回（跳过 response_model 校验，大响应按 Accept-Encoding 压缩）
+    
     需要在请求头中提供access-token进行身份验证
     """
     try:
-        # 获取用户信息
-        user_id = token.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "令牌中缺少用户ID信息"
-                }
-            )
+        organization_id = principal["organization_id"]
         
-        # 获取用户组织ID
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
+        # 验证任务是否存在且属于该组织（读缓存）
+        task_info = await asyncio.to_thread(get_call_task, request.task_id, organization_id)
         
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "用户未绑定组织或组织ID无效"
-                }
-            )
-        
-        organization_id = org_result[0]['dcc_user_org_id']
-        
-        # 验证任务是否存在且属于该组织
-        task_query = """
-            SELECT id, task_name, task_type, job_group_id
-            FROM call_tasks 
-            WHERE id = %s AND organization_id = %s
-        """
-        
-        task_result = execute_query(task_query, (request.task_id, organization_id))
-        
-        if not task_result:
+        if not task_info:
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -964,13 +937,14 @@ async def query_task_execution(
                 }
             )
         
-        task_info = task_result[0]
-        
         from .auto_call_service import query_task_execution_core_service
-        return query_task_execution_core_service(
+        result = query_task_execution_core_service(
             request=request,
             task_info=task_info
         )
+        if config.FAST_JSON_RESPONSE:
+            return fast_json_response(http_request, result)
+        return result
         
     except HTTPException:
         raise
@@ -985,6 +959,134 @@ async def query_task_execution(
         )
 
 
+class TaskChangesResponse(BaseModel):
+    """任务明细增量同步响应"""
+    status: str
+    code: int
+    message: str
+    data: Dict[str, Any]
+
+
+@auto_call_router.get("/tasks/{task_id}/changes", response_model=TaskChangesResponse)
+async def get_task_changes(
+    task_id: int,
+    since: Optional[str] = Query(None, description="上次返回的 cursor；首次调用不传，只返回当前计数与起始游标"),
+    limit: int = Query(config.TASK_CHANGES_MAX_ROWS, ge=1, le=2000, description="单次最多返回的变更行数"),
+    principal: Dict[str, Any] = Depends(get_current_principal)
+):
+    """
+    任务明细增量同步：只返回 since 游标之后变化（updated_time）的外呼明细，附带最新计数与新游标
+
+    轮询代价与变化的行数成正比，而不是与页面大小成正比：
+    - changes 中的行格式与 /query-task-execution 的 jobs_data 相同（另含 id、updated_time），客户端按 id 覆盖本地数据
+    - has_more 为 true 时应立即用新 cursor 继续拉取
+    - counters 为 null 表示计数没有变化
+
+    需要在请求头中提供access-token进行身份验证
+    """
+    try:
+        task_info = await asyncio.to_thread(get_call_task, task_id, principal["organization_id"])
+        if not task_info:
+            raise HTTPException(
+                status_code=404,
+                detail={"status": "error", "code": 4004, "message": "任务不存在或无权限访问"}
+            )
+
+        from .auto_call_service import get_task_changes_service
+        try:
+            return await asyncio.to_thread(get_task_changes_service, task_info=task_info, since=since, limit=limit)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"status": "error", "code": 1003, "message": str(e)}
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "status": "error",
+                "code": 5000,
+                "message": f"获取任务变更失败: {str(e)}"
+            }
+        )
+
+
+# SSE 响应头：禁止缓存；X-Accel-Buffering 关闭 Nginx 的响应缓冲，事件才能立即送达
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _require_task_events():
+    if not task_event_hub.available():
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "error", "code": 5000, "message": "实时推送不可用，请改用轮询"}
+        )
+
+
+@auto_call_router.get("/tasks/{task_id}/events")
+async def stream_task_events(
+    task_id: int,
+    request: Request,
+    principal: Dict[str, Any] = Depends(get_stream_principal)
+):
+    """
+    单个任务的实时进度推送（Server-Sent Events）
+
+    连接建立后先推送 snapshot（当前 task_type 与外呼计数），之后推送：
+    - progress: 通话结果回写，data 含 updated_count 与最新 counters
+    - follow_created: 跟进记录创建，data 含 call_job_id（或 leads_phone）、follow_id、is_interested
+    - status: 任务状态变化，data 含 task_type 与 previous_task_type
+    - resync: 可能丢失了事件，客户端应通过 /tasks/{task_id}/changes 补齐
+
+    令牌可放在请求头 access-token，或查询参数 access_token（EventSource 无法设置请求头）；
+    实时推送不可用（Redis 未连接）时返回 503，客户端应退回轮询
+    """
+    task_info = await asyncio.to_thread(get_call_task, task_id, principal["organization_id"])
+    if not task_info:
+        raise HTTPException(
+            status_code=404,
+            detail={"status": "error", "code": 4004, "message": "任务不存在或无权限访问"}
+        )
+    _require_task_events()
+
+    async def snapshot():
+        from .auto_call_service import task_call_counters
+        current = await asyncio.to_thread(get_call_task, task_id) or task_info
+        counters = await asyncio.to_thread(task_call_counters, task_id)
+        return [("snapshot", {
+            "task_id": task_id,
+            "data": {
+                "task_type": current['task_type'],
+                "counters": dict(counters, is_completed=current['task_type'] >= 3)
+            }
+        })]
+
+    return StreamingResponse(
+        task_event_stream(request, principal["organization_id"], task_id=task_id, snapshot=snapshot),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@auto_call_router.get("/task-events")
+async def stream_org_task_events(
+    request: Request,
+    principal: Dict[str, Any] = Depends(get_stream_principal)
+):
+    """
+    当前组织全部任务的实时事件推送（Server-Sent Events），用于任务列表页；事件类型同 /tasks/{task_id}/events，
+    每条事件带 task_id，不推送初始快照
+
+    令牌可放在请求头 access-token，或查询参数 access_token
+    """
+    _require_task_events()
+    return StreamingResponse(
+        task_event_stream(request, principal["organization_id"]),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 
 # ---- 后台运行：分批查询执行（run_id 模式） ----
@@ -1014,27 +1116,6 @@ class GetExecutionRunResponse(BaseModel):
     data: Dict[str, Any]
 
 
-def _ensure_execution_runs_table():
-    """确保运行记录表存在。"""
-    create_sql = """
-    CREATE TABLE IF NOT EXISTS call_task_execution_runs (
-        id SERIAL PRIMARY KEY,
-        task_id INT NOT NULL,
-        params JSON NULL,
-        status VARCHAR(32) NOT NULL,
-        total_jobs INT DEFAULT 0,
-        processed_jobs INT DEFAULT 0,
-        error TEXT NULL,
-        created_at TIMESTAMP NOT NULL,
-        updated_at TIMESTAMP NOT NULL
-    )
-    """
-    try:
-        execute_update(create_sql)
-    except Exception:
-        pass
-
-
 def _update_run_progress(run_id: int, *, processed: int = None, status: str = None, error: str = None, total: int = None):
     sets = []
     params: list[Any] = []
@@ -1059,31 +1140,54 @@ def _update_run_progress(run_id: int, *, processed: int = None, status: str = No
     execute_update(sql, tuple(params))
 
 
+def _iter_job_id_batches(task_id: int, batch_size: int):
+    """按主键游标分批流式读取任务明细 (id, call_job_id, recording_url)；每批单独查询，不在外部API调用期间占用连接。"""
+    last_id = 0
+    while True:
+        batch_rows = list(iter_query(
+            """
+            SELECT id, call_job_id, recording_url
+            FROM leads_task_list
+            WHERE task_id = %s AND id > %s AND call_job_id IS NOT NULL AND call_job_id != ''
+            ORDER BY id
+            LIMIT %s
+            """,
+            (task_id, last_id, batch_size),
+            batch_size=batch_size,
+            as_tuple=True
+        ))
+        if not batch_rows:
+            break
+        last_id = batch_rows[-1][0]
+        yield batch_rows
+        if len(batch_rows) < batch_size:
+            break
+
+
 def _background_execute_run(run_id: int, task_id: int, batch_size: int, sleep_ms: int, skip_recording: bool):
     """后台线程：分批 list_jobs 并入库更新。"""
     try:
-        # 取得该任务的待处理 job_ids
-        job_rows = execute_query(
+        # 统计该任务的待处理 job 数量（job_id 按批次流式读取，不一次性加载）
+        count_rows = execute_query(
             """
-            SELECT call_job_id
+            SELECT COUNT(*) AS total
             FROM leads_task_list
             WHERE task_id = %s AND call_job_id IS NOT NULL AND call_job_id != ''
-            ORDER BY id
             """,
             (task_id,)
         )
-        job_ids = [r['call_job_id'] for r in job_rows]
-        _update_run_progress(run_id, total=len(job_ids), status="running", processed=0)
+        total_jobs = count_rows[0]['total'] if count_rows else 0
+        _update_run_progress(run_id, total=total_jobs, status="running", processed=0)
 
-        # 动态导入 OpenAPI
-        import sys as _sys, os as _os
-        _sys.path.append(_os.path.join(_os.path.dirname(__file__), '..', 'openAPI'))
-        from list_jobs import Sample as ListJobsSample  # type: ignore
-        from download_recording import Sample as DownloadRecordingSample  # type: ignore
+        from openAPI.list_jobs import Sample as ListJobsSample
+        from openAPI.download_recording import Sample as DownloadRecordingSample
 
         processed = 0
-        for i in range(0, len(job_ids), max(1, batch_size)):
-            batch = job_ids[i:i + batch_size]
+        for batch_rows in _iter_job_id_batches(task_id, max(1, batch_size)):
+            batch = [row[1] for row in batch_rows]
+            # call_job_id -> (id, 当前 recording_url)，随游标一并读出，不再逐条查询
+            current_rows = {row[1]: (row[0], row[2]) for row in batch_rows}
+            updates: Dict[int, tuple] = {}
             try:
                 jobs_data = ListJobsSample.main([], job_ids=batch)
             except Exception as e:
@@ -1117,20 +1221,9 @@ def _background_execute_run(run_id: int, task_id: int, batch_size: int, sleep_ms
                     except:
                         plan_time = None
 
-                current_recording_url = None
-                if job_status == 'Succeeded':
-                    try:
-                        rec = execute_query(
-                            """
-                            SELECT recording_url FROM leads_task_list
-                            WHERE task_id = %s AND call_job_id = %s
-                            """,
-                            (task_id, job_id)
-                        )
-                        if rec:
-                            current_recording_url = rec[0].get('recording_url')
-                    except Exception:
-                        pass
+                row_id, current_recording_url = current_rows.get(job_id, (None, None))
+                if job_status != 'Succeeded':
+                    current_recording_url = None
 
                 recording_url = None
                 if (not skip_recording) and call_task_id and job_status == 'Succeeded':
@@ -1149,36 +1242,30 @@ def _background_execute_run(run_id: int, task_id: int, batch_size: int, sleep_ms
                 # 重要：只有 call_status 为最终状态（'Succeeded' 或 'Failed'）时才保存到数据库
                 # 中间状态（如 'Executing'）不保存，继续轮询获取
                 if job_status in ('Succeeded', 'Failed'):
-                    try:
-                        execute_update(
-                            """
-                            UPDATE leads_task_list
-                            SET call_status = %s,
-                                planed_time = %s,
-                                call_task_id = %s,
-                                call_conversation = %s,
-                                calling_number = %s,
-                                recording_url = %s
-                            WHERE task_id = %s AND call_job_id = %s
-                            """,
-                            (
-                                job_status,
-                                plan_time,
-                                call_task_id,
-                                json.dumps(conversation) if conversation else None,
-                                calling_number,
-                                recording_url,
-                                task_id,
-                                job_id,
-                            )
+                    if row_id:
+                        updates[row_id] = (
+                            job_status,
+                            plan_time,
+                            call_task_id,
+                            json.dumps(conversation) if conversation else None,
+                            calling_number,
+                            recording_url,
                         )
-                    except Exception:
-                        pass
                 else:
                     print(f"[_background_execute_run] job_id={job_id} call_status={job_status} 不是最终状态，跳过数据库更新，继续轮询")
 
                 # 后台批处理也不在此处直接触发AI；AI在首次生成跟进时机由异步线程负责
 
+            # 本批变更一次性写回（一个事务、一条 UPDATE ... JOIN）
+            # 只有实际写回了行才递增版本号：轮询中大多是非最终状态，不应每批都使组织的列表 ETag 与聚合缓存失效
+            if updates:
+                try:
+                    write_back = write_back_call_results(updates, "[_background_execute_run]")
+                    if write_back["updated"]:
+                        bump_task_org_version(task_id, LEADS_TASK_LIST)
+                except Exception as e:
+                    _update_run_progress(run_id, status="running", error=f"写回失败: {str(e)}")
+
             processed += len(batch)
             _update_run_progress(run_id, processed=processed)
 
@@ -1216,7 +1303,6 @@ async def get_query_execution_run(
     token: Dict[str, Any] = Depends(verify_access_token)
 ):
     """查询运行进度。"""
-    _ensure_execution_runs_table()
     rows = execute_query("SELECT * FROM call_task_execution_runs WHERE id=%s", (run_id,))
     if not rows:
         raise HTTPException(status_code=404, detail={"status":"error","code":4004,"message":"run_id不存在"})
@@ -1241,7 +1327,7 @@ def get_leads_follow_id(call_job_id, *, force: bool = False, dry_run: bool = Fal
     try:
         # 1. 根据call_job_id查找leads_task_list中的call_conversation和leads_id
         query = """
-            SELECT call_conversation, leads_id, leads_name, leads_phone, leads_follow_id, call_status
+            SELECT task_id, call_conversation, leads_id, leads_name, leads_phone, leads_follow_id, call_status
             FROM leads_task_list 
             WHERE call_job_id = %s
         """
@@ -1409,19 +1495,21 @@ def get_leads_follow_id(call_job_id, *, force: bool = False, dry_run: bool = Fal
                         next_follow_time = %s
                     WHERE id = %s
                 """
-                execute_update(update_follow_query, (
-                    leads_remark,
-                    current_time,
-                    next_follow_time,
-                    leads_follow_id
-                ))
                 # 同步更新任务表意向
                 update_list_query = """
                     UPDATE leads_task_list
                     SET is_interested = %s
                     WHERE call_job_id = %s
                 """
-                execute_update(update_list_query, (is_interested, call_job_id))
+                with unit_of_work() as tx:
+                    tx.execute(update_follow_query, (
+                        leads_remark,
+                        current_time,
+                        next_follow_time,
+                        leads_follow_id
+                    ))
+                    tx.execute(update_list_query, (is_interested, call_job_id))
+                bump_task_org_version(task_data.get('task_id'), LEADS, LEADS_TASK_LIST)
                 return {
                     "status": "success",
                     "code": 200,
@@ -1444,22 +1532,24 @@ def get_leads_follow_id(call_job_id, *, force: bool = False, dry_run: bool = Fal
                 (leads_id, follow_time, leads_remark, frist_follow_time, new_follow_time, next_follow_time)
                 VALUES (%s, %s, %s, %s, %s, %s)
             """
-            follow_id = execute_update(insert_query, (
-                leads_id,
-                current_time,
-                leads_remark,
-                current_time,
-                current_time,
-                next_follow_time
-            ))
-            
             # 更新leads_task_list表中的leads_follow_id和is_interested
             update_query = """
                 UPDATE leads_task_list 
                 SET leads_follow_id = %s, is_interested = %s
                 WHERE call_job_id = %s
             """
-            execute_update(update_query, (follow_id, is_interested, call_job_id))
+            # 插入跟进记录与回写任务表在同一事务内完成
+            with unit_of_work() as tx:
+                follow_id = tx.execute(insert_query, (
+                    leads_id,
+                    current_time,
+                    leads_remark,
+                    current_time,
+                    current_time,
+                    next_follow_time
+                ))
+                tx.execute(update_query, (follow_id, is_interested, call_job_id))
+            bump_task_org_version(task_data.get('task_id'), LEADS, LEADS_TASK_LIST)
             
             return {
                 "status": "success",
@@ -1689,7 +1779,8 @@ async def suspend_resume_task(
             )
 
         from .auto_call_service import suspend_resume_task_service
-        result = suspend_resume_task_service(request=request, token=token)
+        # 暂停/恢复的 OpenAPI 调用可能等待限流令牌，放到线程池执行，避免阻塞事件循环
+        result = await asyncio.to_thread(suspend_resume_task_service, request=request, token=token)
 
         if result.get("status") != "success":
             status_code = 500 if result.get("code", 0) >= 5000 else (404 if result.get("code") == 4004 else 400)
@@ -1783,32 +1874,26 @@ class TaskListResponse(BaseModel):
 
 @auto_call_router.get("/task_list", response_model=TaskListResponse)
 async def get_task_list(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
     task_types: Optional[str] = Query(None, description="任务类型过滤，逗号分隔，如 2,3,5"),
-    token: Dict[str, Any] = Depends(verify_access_token)
+    paginate: str = Query("page", description="分页方式：page-页码（默认），cursor-游标（按创建时间倒序，翻页代价与页码无关）"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的 next_cursor，首页不传"),
+    estimate_total: bool = Query(False, description="游标分页：是否返回估算总数（基于索引统计，不执行 COUNT）"),
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
-    分页查询任务列表：根据 user_id 查询数据库获取任务列表
+    分页查询任务列表：按当前用户所属组织获取任务列表
+
+    - paginate=page：按页码分页，返回精确总数与总页数
+    - paginate=cursor：键集分页，返回 next_cursor（没有下一页时为 null）与可选的估算总数
+
+    支持条件 GET：If-None-Match 与当前 ETag 一致时返回 304，不执行列表查询
     """
     try:
-        # 获取用户ID
-        user_id = token.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=400,
-                detail={"status": "error", "code": 1003, "message": "令牌中缺少用户ID信息"}
-            )
-
-        # 根据 user_id 获取 organization_id
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={"status": "error", "code": 1003, "message": "用户未绑定组织或组织ID无效"}
-            )
-        organization_id = org_result[0]['dcc_user_org_id']
+        organization_id = principal["organization_id"]
 
         # 解析任务类型过滤
         task_type_list: Optional[List[int]] = None
@@ -1825,6 +1910,26 @@ async def get_task_list(
             if parsed_types:
                 task_type_list = parsed_types
 
+        if paginate not in ("page", "cursor"):
+            raise HTTPException(
+                status_code=400,
+                detail={"status": "error", "code": 1003, "message": "paginate参数必须是 page 或 cursor"}
+            )
+
+        page_params = {"page": page, "page_size": page_size, "task_types": task_type_list}
+        if paginate == "cursor":
+            page_params = {
+                "paginate": paginate, "cursor": cursor, "page_size": page_size,
+                "task_types": task_type_list, "estimate_total": estimate_total
+            }
+        # 条件 GET 与组织级聚合缓存（任务创建或状态变化时失效），Redis 访问在线程池中执行
+        etag, cache_key, cached_data = await _lookup_org_aggregate(request, organization_id, "task_list", page_params)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        if cached_data:
+            return cached_data
+
         # 构建查询条件
         base_condition = "organization_id = %s"
         base_params: List[Any] = [organization_id]
@@ -1833,9 +1938,24 @@ async def get_task_list(
             base_condition += f" AND task_type IN ({placeholders})"
             base_params.extend(task_type_list)
 
+        if paginate == "cursor":
+            from .auto_call_service import query_task_list_by_cursor
+            try:
+                result = await asyncio.to_thread(
+                    query_task_list_by_cursor, organization_id,
+                    page_size=page_size, cursor=cursor, task_types=task_type_list, estimate_total=estimate_total
+                )
+            except InvalidCursor as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"status": "error", "code": 1003, "message": str(e)}
+                )
+            await asyncio.to_thread(set_org_aggregate, cache_key, result)
+            return result
+
         # 统计总数
         count_sql = f"SELECT COUNT(*) AS total FROM call_tasks WHERE {base_condition}"
-        count_res = execute_query(count_sql, tuple(base_params))
+        count_res = await fetch_all(count_sql, tuple(base_params), read_only=True)
         total = count_res[0]['total'] if count_res and count_res[0].get('total') else 0
 
         # 如果没有数据，直接返回
@@ -1870,22 +1990,13 @@ async def get_task_list(
             LIMIT %s OFFSET %s
         """
         list_params = base_params + [page_size, offset]
-        rows = execute_query(list_sql, tuple(list_params))
+        rows = await fetch_all(list_sql, tuple(list_params), read_only=True)
 
         # 构建返回数据
-        items: List[Dict[str, Any]] = []
-        for r in rows or []:
-            create_time_val = r['create_time']
-            create_time_str = create_time_val.strftime("%Y-%m-%d %H:%M:%S") if hasattr(create_time_val, 'strftime') else str(create_time_val)
-            items.append({
-                "id": r['id'],
-                "task_name": r['task_name'],
-                "task_type": r['task_type'],
-                "create_time": create_time_str,
-                "leads_count": r['leads_count']
-            })
+        from .auto_call_service import format_task_list_rows
+        items = format_task_list_rows(rows)
 
-        return {
+        result = {
             "status": "success",
             "code": 200,
             "message": "获取任务列表成功",
@@ -1899,6 +2010,8 @@ async def get_task_list(
                 }
             }
         }
+        await asyncio.to_thread(set_org_aggregate, cache_key, result)
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -1,11 +1,17 @@
 from typing import Any, Dict, List, Tuple, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import asyncio
-import sys
-import os
 
-from database.db import execute_query, execute_update
+from config import config
+from database.db import execute_query, execute_update, iter_query, unit_of_work
+from database.call_task_cache import bump_task_org_version, get_call_task, invalidate_call_task
+from database.org_version import CALL_TASKS, LEADS_TASK_LIST, bump_org_version
+from database.pagination import (
+    InvalidCursor, build_keyset_query, decode_cursor, encode_cursor, estimate_count, finish_keyset_page
+)
+from utils.fast_json import loads as fast_json_loads
+from utils.rate_limiter import PRIORITY_BACKGROUND, run_with_priority
 from .auto_call_utils import (
     validate_user_token_with_username,
     validate_user_token,
@@ -60,30 +66,31 @@ def create_auto_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dic
         1,  # 已创建
         size_desc_json,
     )
-    task_id = execute_update(task_query, task_params)
-
-    # 4) 批量写 leads_task_list
-    if leads_result:
-        values_placeholder = ",".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(leads_result))
-        batch_insert_sql = f"""
-            INSERT INTO leads_task_list 
-            (task_id, leads_id, leads_name, leads_phone, call_time, call_job_id, reference_id)
-            VALUES {values_placeholder}
-        """
-        params: List[Any] = []
-        for lead in leads_result:
-            # 生成 reference_id: task_id + organization_id + leads_id
-            reference_id = f"{task_id}{organization_id}{lead['leads_id']}"
-            params.extend([
-                task_id,
-                lead['leads_id'],
-                lead['leads_user_name'],
-                lead['leads_user_phone'],
-                current_time,
-                "",
-                reference_id,
-            ])
-        execute_update(batch_insert_sql, tuple(params))
+    # 任务记录与线索明细在同一事务内写入，失败时整体回滚，不会留下没有线索的空任务
+    with unit_of_work() as tx:
+        task_id = tx.execute(task_query, task_params)
+
+        # 4) 分块批量写 leads_task_list（按语句字节数切块，避免超过 max_allowed_packet）
+        # reference_id: task_id + organization_id + leads_id
+        tx.bulk_insert(
+            "leads_task_list",
+            ("task_id", "leads_id", "leads_name", "leads_phone", "call_time", "call_job_id", "reference_id"),
+            (
+                (
+                    task_id,
+                    lead['leads_id'],
+                    lead['leads_user_name'],
+                    lead['leads_user_phone'],
+                    current_time,
+                    "",
+                    f"{task_id}{organization_id}{lead['leads_id']}",
+                )
+                for lead in leads_result
+            ),
+        )
+
+    # 新任务会改变组织的任务统计、任务列表与任务明细，使聚合缓存与 ETag 失效
+    bump_org_version(organization_id, CALL_TASKS, LEADS_TASK_LIST)
 
     # 5) 组装返回 size_desc，保留 ranges 字段
     size_desc_dict = request.size_desc.dict()
@@ -108,9 +115,12 @@ def create_auto_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dic
     }
 
 
-def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str, Any]:
+def start_call_task_service(*, request: Any, token: Dict[str, Any], loop: Optional[asyncio.AbstractEventLoop] = None) -> Dict[str, Any]:
     """
     开始外呼任务（业务逻辑层）。
+
+    OpenAPI 调用可能因限流等待令牌，路由应在线程池中执行本函数并传入事件循环 loop，
+    完成后的 call_job_id 同步任务交回该事件循环执行；未传入时在当前事件循环中创建
     """
     # 1) 验证用户和组织
     user_id, organization_id = validate_user_token(token)
@@ -165,8 +175,7 @@ def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str,
         }
 
     # 6) 调用create_job_group获取job_group_id
-    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-    from create_job_group import Sample as CreateJobGroupSample
+    from openAPI.create_job_group import Sample as CreateJobGroupSample
 
     job_group_name = f"任务_{request.task_id}_{task_info['task_name']}"
     job_group_description = f"自动外呼任务_{request.task_id}"
@@ -201,6 +210,7 @@ def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str,
         WHERE id = %s
     """
     execute_update(update_task_query, (job_group_id, 2, request.task_id))  # task_type: 2-开始外呼
+    invalidate_call_task(request.task_id)
 
     # 8) 准备assign_jobs的数据
     jobs_json = []
@@ -235,6 +245,7 @@ def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str,
             WHERE id = %s
         """
         execute_update(rollback_query, (1, request.task_id))
+        invalidate_call_task(request.task_id)
         return {
             "status": "error",
             "code": 5002,
@@ -252,7 +263,12 @@ def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str,
     # 10) 异步触发同步 call_job_id（完成后会自动触发获取 call_conversation）
     # 注意：sync_call_job_ids_from_group 完成后会自动触发 update_task_execution
     # 所以这里只需要启动同步任务即可
-    asyncio.create_task(sync_call_job_ids_from_group(request.task_id, job_group_id))
+    # 同步在 API 进程内执行，但属于后台轮询：以后台优先级调用 OpenAPI，不与交互请求争抢令牌
+    sync_coro = run_with_priority(PRIORITY_BACKGROUND, sync_call_job_ids_from_group(request.task_id, job_group_id))
+    if loop is None:
+        asyncio.create_task(sync_coro)
+    else:
+        asyncio.run_coroutine_threadsafe(sync_coro, loop)
     
     # 11) 触发自动化任务监控器，立即开始处理任务
     try:
@@ -286,19 +302,13 @@ def start_call_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[str,
 async def sync_call_job_ids_from_group(task_id: int, job_group_id: str):
     """异步获取并更新 call_job_id：遍历所有页，根据 reference_id 匹配写回"""
     try:
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-        from query_jobs_with_result import Sample as QueryJobsWithResultSample
+        from openAPI.outbound_gateway import query_jobs_with_result, query_jobs_with_result_pages
 
         # 先获取第一页，确定总页数
         page_size = 100
         page = 1
         try:
-            jobs_group_data = QueryJobsWithResultSample.main(
-                [],
-                job_group_id=job_group_id,
-                page_number=page,
-                page_size=page_size
-            )
+            jobs_group_data = await query_jobs_with_result(job_group_id, page, page_size)
         except Exception as e:
             print(f"[sync_call_job_ids] 调用 list_jobs_by_group 第{page}页失败: {str(e)}")
             return
@@ -403,17 +413,15 @@ async def sync_call_job_ids_from_group(task_id: int, job_group_id: str):
         if updated_count > 0:
             print(f"[sync_call_job_ids] task_id={task_id} 第{page}页总共更新了 {updated_count} 条记录")
 
-        # 遍历剩余页
-        if total_pages > 1:
-            for pn in range(2, total_pages + 1):
+        # 遍历剩余页：每轮并发拉取 OUTBOUND_API_ASYNC_CONCURRENCY 页，再按页码顺序写回
+        window = max(1, config.OUTBOUND_API_ASYNC_CONCURRENCY)
+        for window_start in range(2, total_pages + 1, window):
+            page_numbers = range(window_start, min(window_start + window, total_pages + 1))
+            remaining_pages = await query_jobs_with_result_pages(job_group_id, page_numbers, page_size)
+            for pn, page_data, page_error in remaining_pages:
                 try:
-                    await asyncio.sleep(0.1)
-                    page_data = QueryJobsWithResultSample.main(
-                        [],
-                        job_group_id=job_group_id,
-                        page_number=pn,
-                        page_size=page_size
-                    )
+                    if page_error is not None:
+                        raise page_error
                     page_jobs_list = safe_getattr(page_data, 'list', 'List', default=None)
                     updates_by_ref_id_p, updates_by_phone_p = collect_updates_from_jobs(page_jobs_list)
                     updated_count_p = 0
@@ -489,6 +497,7 @@ async def sync_call_job_ids_from_group(task_id: int, job_group_id: str):
                     continue
 
         print(f"[sync_call_job_ids] task_id={task_id} 同步完成，共 {total_pages} 页")
+        bump_task_org_version(task_id, LEADS_TASK_LIST)
     except Exception as e:
         print(f"[sync_call_job_ids] task_id={task_id} 同步 call_job_id 失败: {str(e)}")
 
@@ -519,6 +528,7 @@ def update_script_id_service(*, request: Any, token: Dict[str, Any]) -> Dict[str
         WHERE id = %s AND organization_id = %s
     """
     execute_update(update_query, (request.script_id, request.task_id, organization_id))
+    invalidate_call_task(request.task_id)
 
     return {
         "status": "success",
@@ -551,62 +561,159 @@ def get_task_statistics_service(*, request: Any, token: Dict[str, Any]) -> Dict[
             "message": "任务不存在或无权限访问"
         }
 
-    # 查询任务统计信息
-    # 1. 有意向：is_interested = 1
-    # 2. 无意向：is_interested = 2
-    # 3. 无法判断：is_interested = 0 且 leads_follow_id 不为空
-    # 4. 待跟进：is_interested 为空 或（is_interested = 0 且 leads_follow_id 为空）
-    stats_query = """
+    stats_data = task_follow_stats([request.task_id]).get(request.task_id) or dict.fromkeys(TASK_FOLLOW_STATS_KEYS, 0)
+
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "查询任务统计信息成功",
+        "data": stats_data
+    }
+
+
+# 任务跟进统计口径：
+# 1. 有意向：is_interested = 1
+# 2. 无意向：is_interested = 2
+# 3. 无法判断：is_interested = 0 且 leads_follow_id 不为空
+# 4. 待跟进：is_interested 为空 或（is_interested = 0 且 leads_follow_id 为空）
+TASK_FOLLOW_STATS_KEYS = ("total_leads", "pending_follow", "unable_to_judge", "interested", "not_interested")
+
+
+def task_follow_stats(task_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """按任务统计跟进情况（一次 GROUP BY 查询多个任务），返回 {task_id: 统计}；没有明细的任务不在结果中"""
+    if not task_ids:
+        return {}
+    placeholders = ','.join(['%s'] * len(task_ids))
+    stats_query = f"""
         SELECT 
+            task_id,
             COUNT(*) as total_leads,
             SUM(CASE WHEN (is_interested IS NULL OR (is_interested = 0 AND (leads_follow_id IS NULL OR leads_follow_id = ''))) THEN 1 ELSE 0 END) as pending_follow,
             SUM(CASE WHEN is_interested = 0 AND (leads_follow_id IS NOT NULL AND leads_follow_id != '') THEN 1 ELSE 0 END) as unable_to_judge,
             SUM(CASE WHEN is_interested = 1 THEN 1 ELSE 0 END) as interested,
             SUM(CASE WHEN is_interested = 2 THEN 1 ELSE 0 END) as not_interested
         FROM leads_task_list 
-        WHERE task_id = %s
+        WHERE task_id IN ({placeholders})
+        GROUP BY task_id
     """
-    stats_result = execute_query(stats_query, (request.task_id,))
-
-    if not stats_result:
-        stats_data = {
-            "total_leads": 0,
-            "pending_follow": 0,
-            "unable_to_judge": 0,
-            "interested": 0,
-            "not_interested": 0
-        }
-    else:
-        stats_data = stats_result[0]
-
+    rows = execute_query(stats_query, tuple(task_ids))
     return {
-        "status": "success",
-        "code": 200,
-        "message": "查询任务统计信息成功",
-        "data": {
-            "total_leads": stats_data["total_leads"],
-            "pending_follow": stats_data["pending_follow"],
-            "unable_to_judge": stats_data["unable_to_judge"],
-            "interested": stats_data["interested"],
-            "not_interested": stats_data["not_interested"]
-        }
+        row['task_id']: {key: int(row.get(key) or 0) for key in TASK_FOLLOW_STATS_KEYS}
+        for row in rows or []
     }
 
 
-def get_task_list_service(*, page: int, page_size: int, token: Dict[str, Any], task_types: Optional[List[int]] = None) -> Dict[str, Any]:
-    """分页查询任务列表（业务逻辑层）"""
-    user_id, organization_id = validate_user_token(token)
+def format_task_list_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """任务列表行转换为接口输出格式"""
+    items: List[Dict[str, Any]] = []
+    for r in rows or []:
+        create_time_val = r['create_time']
+        create_time_str = create_time_val.strftime("%Y-%m-%d %H:%M:%S") if hasattr(create_time_val, 'strftime') else str(create_time_val)
+        items.append({
+            "id": r['id'],
+            "task_name": r['task_name'],
+            "task_type": r['task_type'],
+            "create_time": create_time_str,
+            "leads_count": r['leads_count']
+        })
+    return items
+
 
+def _task_list_condition(organization_id: str, task_types: Optional[List[int]]) -> Tuple[str, List[Any]]:
+    """任务列表的过滤条件：组织 + 可选的任务类型"""
     base_condition = "organization_id = %s"
     base_params: List[Any] = [organization_id]
     if task_types:
         placeholders = ','.join(['%s'] * len(task_types))
         base_condition += f" AND task_type IN ({placeholders})"
         base_params.extend(task_types)
+    return base_condition, base_params
+
+
+def get_task_list_service(
+    *,
+    page: int,
+    page_size: int,
+    token: Dict[str, Any],
+    task_types: Optional[List[int]] = None,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    estimate_total: bool = False
+) -> Dict[str, Any]:
+    """
+    分页查询任务列表（业务逻辑层）
+
+    use_cursor=True 时使用键集分页（按 create_time、id 倒序，cursor 为上一页的 next_cursor），
+    不执行 COUNT(*)，estimate_total=True 时返回估算总数；游标无效时抛出 InvalidCursor
+    """
+    user_id, organization_id = validate_user_token(token)
+
+    base_condition, base_params = _task_list_condition(organization_id, task_types)
+
+    if use_cursor:
+        return query_task_list_by_cursor(
+            organization_id, page_size=page_size, cursor=cursor, task_types=task_types, estimate_total=estimate_total
+        )
+
+    return query_task_list_page(organization_id, page=page, page_size=page_size, task_types=task_types)
+
+
+def query_task_list_by_cursor(
+    organization_id: str,
+    *,
+    page_size: int,
+    cursor: Optional[str] = None,
+    task_types: Optional[List[int]] = None,
+    estimate_total: bool = False
+) -> Dict[str, Any]:
+    """
+    键集分页查询组织的任务列表（按 create_time、id 倒序，cursor 为上一页的 next_cursor）
+
+    不执行 COUNT(*)，estimate_total=True 时返回估算总数；游标无效时抛出 InvalidCursor
+    """
+    base_condition, base_params = _task_list_condition(organization_id, task_types)
+    page_size = max(1, page_size)
+    list_sql, list_params = build_keyset_query(
+        "SELECT id, task_name, task_type, create_time, leads_count FROM call_tasks",
+        base_condition, base_params, ("create_time", "id"),
+        scope="task_list", cursor=cursor, descending=True, page_size=page_size
+    )
+    rows, next_cursor = finish_keyset_page(
+        execute_query(list_sql, tuple(list_params), read_only=True),
+        ("create_time", "id"), scope="task_list", page_size=page_size
+    )
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取任务列表成功" if rows else "暂无任务数据",
+        "data": {
+            "items": format_task_list_rows(rows),
+            "pagination": {
+                "mode": "cursor",
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "estimated_total": estimate_count(
+                    f"FROM call_tasks WHERE {base_condition}", tuple(base_params)
+                ) if estimate_total else None
+            }
+        }
+    }
+
+
+def query_task_list_page(
+    organization_id: str,
+    *,
+    page: int,
+    page_size: int,
+    task_types: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """按页码分页查询组织的任务列表（按创建时间倒序，返回精确总数）"""
+    base_condition, base_params = _task_list_condition(organization_id, task_types)
 
     # 统计总数
     count_sql = f"SELECT COUNT(*) AS total FROM call_tasks WHERE {base_condition}"
-    count_res = execute_query(count_sql, tuple(base_params))
+    count_res = execute_query(count_sql, tuple(base_params), read_only=True)
     total = count_res[0]['total'] if count_res and count_res[0].get('total') else 0
 
     if total == 0:
@@ -640,19 +747,9 @@ def get_task_list_service(*, page: int, page_size: int, token: Dict[str, Any], t
         LIMIT %s OFFSET %s
     """
     list_params = base_params + [page_size, offset]
-    rows = execute_query(list_sql, tuple(list_params))
+    rows = execute_query(list_sql, tuple(list_params), read_only=True)
 
-    items: List[Dict[str, Any]] = []
-    for r in rows or []:
-        create_time_val = r['create_time']
-        create_time_str = create_time_val.strftime("%Y-%m-%d %H:%M:%S") if hasattr(create_time_val, 'strftime') else str(create_time_val)
-        items.append({
-            "id": r['id'],
-            "task_name": r['task_name'],
-            "task_type": r['task_type'],
-            "create_time": create_time_str,
-            "leads_count": r['leads_count']
-        })
+    items = format_task_list_rows(rows)
 
     return {
         "status": "success",
@@ -704,6 +801,7 @@ def suspend_resume_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[
             }
 
         execute_update("UPDATE call_tasks SET task_type = 5 WHERE id = %s", (request.task_id,))
+        invalidate_call_task(request.task_id)
         print(f"任务暂停成功: task_id={request.task_id}, job_group_id={job_group_id}, task_type: {current_task_type} -> 5")
 
         return {
@@ -732,6 +830,7 @@ def suspend_resume_task_service(*, request: Any, token: Dict[str, Any]) -> Dict[
             }
 
         execute_update("UPDATE call_tasks SET task_type = 2 WHERE id = %s", (request.task_id,))
+        invalidate_call_task(request.task_id)
         print(f"任务重启成功: task_id={request.task_id}, job_group_id={job_group_id}, task_type: {current_task_type} -> 2")
 
         return {
@@ -757,13 +856,10 @@ async def describe_job_group_service(*, request: Any, token: Dict[str, Any]) ->
     task_id = getattr(request, 'task_id', None)
     
     if task_id:
-        task_query = (
-            "SELECT id, task_name, organization_id, job_group_id, updated_time, task_type FROM call_tasks WHERE id = %s AND organization_id = %s"
-        )
-        task_result = execute_query(task_query, (task_id, organization_id))
-        if not task_result:
+        task_info = get_call_task(task_id, organization_id)
+        if not task_info:
             return {"status": "error", "code": 4004, "message": "任务不存在或无权限访问"}
-        job_group_id = task_result[0].get('job_group_id')
+        job_group_id = task_info.get('job_group_id')
         if not job_group_id:
             return {"status": "error", "code": 4005, "message": "该任务尚未开始外呼，没有job_group_id"}
     elif not job_group_id:
@@ -883,11 +979,21 @@ def get_task_stats_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
     """获取任务统计（带缓存逻辑在 API 层或此处由调用方控制刷新）。"""
     user_id, organization_id = validate_user_token(token)
 
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取任务统计信息成功",
+        "data": compute_task_stats(organization_id)
+    }
+
+
+def compute_task_stats(organization_id: str) -> List[Dict[str, Any]]:
+    """按任务类型统计组织的任务数与线索数（类型 1-4 均返回，没有任务的类型计数为 0）"""
     stats_query = (
         "SELECT task_type, COUNT(*) as count, COALESCE(SUM(leads_count), 0) as leads_count "
         "FROM call_tasks WHERE organization_id = %s GROUP BY task_type ORDER BY task_type"
     )
-    stats_result = execute_query(stats_query, (organization_id,))
+    stats_result = execute_query(stats_query, (organization_id,), read_only=True)
 
     task_types = [1, 2, 3, 4]
     stats_map = {row['task_type']: row for row in stats_result}
@@ -901,13 +1007,7 @@ def get_task_stats_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
             })
         else:
             stats_list.append({"task_type": t, "count": 0, "leads_count": 0})
-
-    return {
-        "status": "success",
-        "code": 200,
-        "message": "获取任务统计信息成功",
-        "data": stats_list
-    }
+    return stats_list
 
 
 async def get_tasks_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
@@ -942,13 +1042,12 @@ async def get_tasks_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
     checking_tasks = execute_query(checking_tasks_query, (organization_id,))
 
     if checking_tasks:
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-        from describe_job_group import Sample as DescribeJobGroupSample  # type: ignore
+        from openAPI.outbound_gateway import describe_job_group
         from .auto_call_utils import get_attr_value
 
         async def check_task_status(task_id, job_group_id, task_name):
             try:
-                job_group_data = await DescribeJobGroupSample.main_async([], job_group_id)  # type: ignore
+                job_group_data = await describe_job_group(job_group_id)
                 if job_group_data:
                     job_group_status = get_attr_value(job_group_data, 'Status', 'status', default='')
                     progress = get_attr_value(job_group_data, 'Progress', 'progress', default=None)
@@ -969,18 +1068,19 @@ async def get_tasks_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
                                 # 如果任务组状态已经是完成状态，且没有正在执行的任务，也认为已完成
                                 is_really_completed = True
 
-                    current_task_query = "SELECT task_type FROM call_tasks WHERE id = %s"
-                    current_task_result = execute_query(current_task_query, (task_id,))
-                    current_task_type = current_task_result[0]['task_type'] if current_task_result else None
+                    current_task = get_call_task(task_id)
+                    current_task_type = current_task['task_type'] if current_task else None
 
                     if job_group_status in ['Completed', 'Finished', 'Stopped'] and is_really_completed and current_task_type and current_task_type < 3:
                         execute_update("UPDATE call_tasks SET task_type = 3 WHERE id = %s", (task_id,))
+                        invalidate_call_task(task_id)
                         for task in tasks_result:
                             if task['id'] == task_id:
                                 task['task_type'] = 3
                                 break
                     elif job_group_status in ['Completed', 'Finished', 'Stopped'] and not is_really_completed and current_task_type == 3:
                         execute_update("UPDATE call_tasks SET task_type = 2 WHERE id = %s", (task_id,))
+                        invalidate_call_task(task_id)
                         for task in tasks_result:
                             if task['id'] == task_id:
                                 task['task_type'] = 2
@@ -1014,19 +1114,16 @@ async def get_tasks_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
         WHERE task_id IN ({})
         ORDER BY task_id, id
     """.format(','.join(['%s'] * len(task_ids)))
-    leads_result = execute_query(leads_query, task_ids)
 
-    # 将线索信息按task_id分组
+    # 流式读取线索信息并按task_id分组（服务端游标 + 元组行，避免一次性加载全部线索行）
     leads_by_task: Dict[int, List[Dict[str, Any]]] = {}
-    for lead in leads_result:
-        task_id = lead['task_id']
+    for task_id, leads_name, leads_phone, call_status in iter_query(leads_query, task_ids, batch_size=2000, as_tuple=True):
         if task_id not in leads_by_task:
             leads_by_task[task_id] = []
-        call_status = lead['call_status'] if lead['call_status'] else "未开始"
         leads_by_task[task_id].append({
-            "leads_name": lead['leads_name'],
-            "leads_phone": lead['leads_phone'],
-            "call_status": call_status
+            "leads_name": leads_name,
+            "leads_phone": leads_phone,
+            "call_status": call_status if call_status else "未开始"
         })
 
     # 构建返回数据
@@ -1063,15 +1160,116 @@ async def get_tasks_service(*, token: Dict[str, Any]) -> Dict[str, Any]:
         "data": tasks_data
     }
 
+# 执行情况明细读取的列（build_jobs_data 的输入）
+TASK_EXECUTION_COLUMNS = (
+    "id, leads_name, leads_phone, call_job_id, call_status, planed_time, call_task_id, "
+    "call_conversation, calling_number, recording_url, is_interested, leads_follow_id"
+)
+
+
+def build_jobs_data(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """将 leads_task_list 行转换为执行情况接口的 jobs_data 格式（批量附带跟进记录）"""
+    follow_data_map: Dict[Any, Any] = {}
+    follow_ids = [row['leads_follow_id'] for row in rows if row.get('leads_follow_id')]
+    if follow_ids:
+        follow_placeholders = ','.join(['%s'] * len(follow_ids))
+        follow_query = f"""
+            SELECT id, leads_id, follow_time, leads_remark,
+                   frist_follow_time, new_follow_time, next_follow_time,
+                   is_arrive, frist_arrive_time
+            FROM dcc_leads_follow
+            WHERE id IN ({follow_placeholders})
+        """
+        follow_result = execute_query(follow_query, follow_ids, read_only=True)
+        follow_data_map = {row['id']: row for row in follow_result} if follow_result else {}
+
+    def datetime_to_millis(dt: Optional[datetime]) -> Optional[int]:
+        if not dt:
+            return None
+        return int(dt.timestamp() * 1000)
+
+    def calculate_duration_from_conversation(conversation: Any) -> Optional[int]:
+        """从 conversation 数据中计算通话时长（毫秒）"""
+        if not conversation:
+            return None
+
+        # 如果 conversation 是列表，计算第一个和最后一个时间戳的差值
+        if isinstance(conversation, list) and len(conversation) > 0:
+            timestamps = []
+            for item in conversation:
+                if isinstance(item, dict):
+                    timestamp = item.get('Timestamp') or item.get('timestamp')
+                    if timestamp:
+                        try:
+                            timestamps.append(int(timestamp))
+                        except (ValueError, TypeError):
+                            pass
+
+            if len(timestamps) >= 2:
+                # 计算第一个和最后一个时间戳的差值（毫秒）
+                duration = max(timestamps) - min(timestamps)
+                return duration if duration > 0 else None
+
+        return None
+
+    jobs_data: List[Dict[str, Any]] = []
+    for row in rows:
+        # MySQL JSON类型字段返回时已经是字典/列表，不需要再次解析
+        raw_conversation = row.get('call_conversation')
+        conversation_data: Any = None
+        if raw_conversation:
+            # 如果已经是字典或列表类型，直接使用；否则尝试解析字符串
+            if isinstance(raw_conversation, (dict, list)):
+                conversation_data = raw_conversation
+            elif isinstance(raw_conversation, str):
+                try:
+                    conversation_data = fast_json_loads(raw_conversation)
+                except Exception:
+                    conversation_data = raw_conversation
+            else:
+                conversation_data = raw_conversation
+
+        # 计算通话时长
+        call_duration = calculate_duration_from_conversation(conversation_data)
+
+        task_payload = {
+            "TaskId": row.get('call_task_id'),
+            "PlanedTime": datetime_to_millis(row.get('planed_time')),
+            "Conversation": conversation_data,
+            "CallingNumber": row.get('calling_number'),
+            "Duration": call_duration  # 添加通话时长（毫秒）
+        }
+        job_entry = {
+            "id": row.get('id'),
+            "JobId": row.get('call_job_id'),
+            "Status": row.get('call_status') or "",
+            "Tasks": [task_payload] if any(task_payload.values()) else [],
+            "RecordingUrl": row.get('recording_url'),
+            "LeadsName": row.get('leads_name'),
+            "LeadsPhone": row.get('leads_phone'),
+            "calling_number": row.get('calling_number'),
+            "is_interested": row.get('is_interested'),
+            "follow_data": follow_data_map.get(row.get('leads_follow_id'))
+        }
+        jobs_data.append(job_entry)
+    return jobs_data
+
+
 def query_task_execution_core_service(
     *,
     request: Any,
     task_info: Dict[str, Any]
 ) -> Dict[str, Any]:
-    """查询外呼任务执行情况（仅读取数据库缓存的数据）。"""
+    """
+    查询外呼任务执行情况（仅读取数据库缓存的数据）。
+
+    request.paginate 为 "cursor" 时按 id 键集分页（request.cursor 为上一页的 next_cursor），
+    翻页代价与页码无关；否则按页码分页。
+    """
     try:
         page_size = max(1, request.page_size)
         page = max(1, request.page)
+        use_cursor = getattr(request, "paginate", "page") == "cursor"
 
         # 允许返回所有记录，包括 call_status 为空（未开始）的记录
         # 如果 call_job_id 为空，call_status 也为空，则视为未开始状态
@@ -1083,13 +1281,18 @@ def query_task_execution_core_service(
             base_condition += " AND is_interested = %s"
             condition_params.append(request.interest)
 
-        count_query = f"""
-            SELECT COUNT(*) as total
-            FROM leads_task_list
+        # 总数与分状态统计在同一次聚合中完成（call_status 为空视为未开始）
+        stats_query = f"""
+            SELECT 
+                COUNT(*) as total,
+                SUM(CASE WHEN call_status = 'Succeeded' THEN 1 ELSE 0 END) as connected_calls,
+                SUM(CASE WHEN call_status != 'Succeeded' AND call_status IS NOT NULL AND call_status != '' THEN 1 ELSE 0 END) as not_connected_calls,
+                SUM(CASE WHEN call_status IS NULL OR call_status = '' THEN 1 ELSE 0 END) as not_started_calls
+            FROM leads_task_list 
             WHERE {base_condition}
         """
-        count_result = execute_query(count_query, tuple(condition_params))
-        total_jobs = count_result[0]['total'] if count_result and count_result[0].get('total') else 0
+        stats_result = execute_query(stats_query, tuple(condition_params), read_only=True)
+        total_jobs = stats_result[0]['total'] if stats_result and stats_result[0].get('total') else 0
         if total_jobs == 0:
             error_message = "任务下没有已分配的外呼任务" if not getattr(request, "only_followed", False) else "任务下没有已跟进的记录"
             return {
@@ -1122,29 +1325,48 @@ def query_task_execution_core_service(
             }
 
         total_pages = (total_jobs + page_size - 1) // page_size
-        page = max(1, min(page, total_pages))
-        offset = (page - 1) * page_size
-
-        page_params = condition_params + [page_size, offset]
-        page_query = f"""
-            SELECT id,
-                   leads_name,
-                   leads_phone,
-                   call_job_id,
-                   call_status,
-                   planed_time,
-                   call_task_id,
-                   call_conversation,
-                   calling_number,
-                   recording_url,
-                   is_interested,
-                   leads_follow_id
-            FROM leads_task_list
-            WHERE {base_condition}
-            ORDER BY id
-            LIMIT %s OFFSET %s
-        """
-        page_rows = execute_query(page_query, tuple(page_params))
+        page_columns = f"SELECT {TASK_EXECUTION_COLUMNS} FROM leads_task_list"
+        if use_cursor:
+            try:
+                page_query, page_params = build_keyset_query(
+                    page_columns, base_condition, condition_params, ("id",),
+                    scope=f"task_execution:{request.task_id}", cursor=request.cursor, page_size=page_size
+                )
+            except InvalidCursor as e:
+                return {
+                    "status": "error",
+                    "code": 1003,
+                    "message": str(e),
+                    "data": {"task_id": request.task_id, "jobs_data": []}
+                }
+            page_rows, next_cursor = finish_keyset_page(
+                execute_query(page_query, tuple(page_params), read_only=True),
+                ("id",), scope=f"task_execution:{request.task_id}", page_size=page_size
+            )
+            pagination = {
+                "mode": "cursor",
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+                "total_pages": total_pages,
+                "total_count": total_jobs
+            }
+        else:
+            page = max(1, min(page, total_pages))
+            offset = (page - 1) * page_size
+            page_params = condition_params + [page_size, offset]
+            page_query = page_columns + """
+                WHERE {}
+                ORDER BY id
+                LIMIT %s OFFSET %s
+            """.format(base_condition)
+            page_rows = execute_query(page_query, tuple(page_params), read_only=True)
+            pagination = {
+                "page": page,
+                "page_size": page_size,
+                "total_pages": total_pages,
+                "total_count": total_jobs
+            }
         if not page_rows:
             return {
                 "status": "error",
@@ -1165,109 +1387,11 @@ def query_task_execution_core_service(
                         "not_connected_calls": 0,
                         "is_completed": task_info.get('task_type', 0) >= 3
                     },
-                    "pagination": {
-                        "page": page,
-                        "page_size": page_size,
-                        "total_pages": total_pages,
-                        "total_count": total_jobs
-                    }
+                    "pagination": pagination
                 }
             }
 
-        follow_data_map: Dict[Any, Any] = {}
-        follow_ids = [row['leads_follow_id'] for row in page_rows if row.get('leads_follow_id')]
-        if follow_ids:
-            follow_placeholders = ','.join(['%s'] * len(follow_ids))
-            follow_query = f"""
-                SELECT id, leads_id, follow_time, leads_remark,
-                       frist_follow_time, new_follow_time, next_follow_time,
-                       is_arrive, frist_arrive_time
-                FROM dcc_leads_follow
-                WHERE id IN ({follow_placeholders})
-            """
-            follow_result = execute_query(follow_query, follow_ids)
-            follow_data_map = {row['id']: row for row in follow_result} if follow_result else {}
-
-        def datetime_to_millis(dt: Optional[datetime]) -> Optional[int]:
-            if not dt:
-                return None
-            return int(dt.timestamp() * 1000)
-
-        def calculate_duration_from_conversation(conversation: Any) -> Optional[int]:
-            """从 conversation 数据中计算通话时长（毫秒）"""
-            if not conversation:
-                return None
-            
-            # 如果 conversation 是列表，计算第一个和最后一个时间戳的差值
-            if isinstance(conversation, list) and len(conversation) > 0:
-                timestamps = []
-                for item in conversation:
-                    if isinstance(item, dict):
-                        timestamp = item.get('Timestamp') or item.get('timestamp')
-                        if timestamp:
-                            try:
-                                timestamps.append(int(timestamp))
-                            except (ValueError, TypeError):
-                                pass
-                
-                if len(timestamps) >= 2:
-                    # 计算第一个和最后一个时间戳的差值（毫秒）
-                    duration = max(timestamps) - min(timestamps)
-                    return duration if duration > 0 else None
-            
-            return None
-
-        jobs_data: List[Dict[str, Any]] = []
-        for row in page_rows:
-            # MySQL JSON类型字段返回时已经是字典/列表，不需要再次解析
-            raw_conversation = row.get('call_conversation')
-            conversation_data: Any = None
-            if raw_conversation:
-                # 如果已经是字典或列表类型，直接使用；否则尝试解析字符串
-                if isinstance(raw_conversation, (dict, list)):
-                    conversation_data = raw_conversation
-                elif isinstance(raw_conversation, str):
-                    try:
-                        conversation_data = json.loads(raw_conversation)
-                    except Exception:
-                        conversation_data = raw_conversation
-                else:
-                    conversation_data = raw_conversation
-
-            # 计算通话时长
-            call_duration = calculate_duration_from_conversation(conversation_data)
-
-            task_payload = {
-                "TaskId": row.get('call_task_id'),
-                "PlanedTime": datetime_to_millis(row.get('planed_time')),
-                "Conversation": conversation_data,
-                "CallingNumber": row.get('calling_number'),
-                "Duration": call_duration  # 添加通话时长（毫秒）
-            }
-            job_entry = {
-                "JobId": row.get('call_job_id'),
-                "Status": row.get('call_status') or "",
-                "Tasks": [task_payload] if any(task_payload.values()) else [],
-                "RecordingUrl": row.get('recording_url'),
-                "LeadsName": row.get('leads_name'),
-                "LeadsPhone": row.get('leads_phone'),
-                "calling_number": row.get('calling_number'),
-                "is_interested": row.get('is_interested'),
-                "follow_data": follow_data_map.get(row.get('leads_follow_id'))
-            }
-            jobs_data.append(job_entry)
-
-        # 统计查询：使用与count_query相同的条件，避免重复查询
-        # call_status 为空视为未开始
-        stats_query = f"""
-            SELECT 
-                SUM(CASE WHEN call_status = 'Succeeded' THEN 1 ELSE 0 END) as connected_calls,
-                SUM(CASE WHEN call_status != 'Succeeded' AND call_status IS NOT NULL AND call_status != '' THEN 1 ELSE 0 END) as not_connected_calls,
-                SUM(CASE WHEN call_status IS NULL OR call_status = '' THEN 1 ELSE 0 END) as not_started_calls
-            FROM leads_task_list 
-            WHERE {base_condition}
-        """
-        stats_result = execute_query(stats_query, tuple(condition_params))
+        jobs_data = build_jobs_data(page_rows)
 
         task_stats = {
             "total_calls": total_jobs,
@@ -1295,12 +1419,7 @@ def query_task_execution_core_service(
                 "query_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "jobs_data": jobs_data,
                 "task_stats": task_stats,
-                "pagination": {
-                    "page": page,
-                    "page_size": page_size,
-                    "total_pages": total_pages,
-                    "total_count": total_jobs
-                }
+                "pagination": pagination
             }
         }
     except Exception as e:
@@ -1336,3 +1455,95 @@ def query_task_execution_core_service(
             }
         }
 
+
+
+def task_call_counters(task_id: int) -> Dict[str, int]:
+    """任务明细的外呼状态计数（call_status 为空视为未开始）"""
+    result = execute_query(
+        """
+        SELECT 
+            COUNT(*) as total_calls,
+            SUM(CASE WHEN call_status = 'Succeeded' THEN 1 ELSE 0 END) as connected_calls,
+            SUM(CASE WHEN call_status != 'Succeeded' AND call_status IS NOT NULL AND call_status != '' THEN 1 ELSE 0 END) as not_connected_calls,
+            SUM(CASE WHEN call_status IS NULL OR call_status = '' THEN 1 ELSE 0 END) as not_started_calls,
+            SUM(CASE WHEN is_interested = 1 THEN 1 ELSE 0 END) as interested_calls
+        FROM leads_task_list
+        WHERE task_id = %s
+        """,
+        (task_id,)
+    )
+    row = result[0] if result else {}
+    return {key: int(row.get(key) or 0) for key in (
+        "total_calls", "connected_calls", "not_connected_calls", "not_started_calls", "interested_calls"
+    )}
+
+
+def get_task_changes_service(*, task_info: Dict[str, Any], since: Optional[str], limit: int) -> Dict[str, Any]:
+    """
+    任务明细增量同步：返回游标之后变化的 leads_task_list 行（按 updated_time、id 排序）与新游标。
+
+    - since 为空：不返回明细，只返回当前计数与起始游标（客户端应先通过 /query-task-execution 加载页面）
+    - 有变化或首次调用时返回最新计数，没有变化时 counters 为 None（沿用客户端已有的计数）
+    - updated_time 只有秒级精度，且事务提交时间可能晚于行上的时间戳，因此游标最多推进到
+      数据库当前时间减去安全窗口（TASK_CHANGES_SAFETY_LAG_SECONDS）：先按游标分批返回安全时间之前的变化（has_more），
+      追平后游标停在安全时间，并在 limit 余量内附带窗口内的最新变化（不推进游标），窗口内的行可能被重复返回，客户端应按 id 覆盖
+    - 读主库：副本延迟可能导致已越过游标的行尚未同步
+    - 游标无效时抛出 InvalidCursor
+    """
+    task_id = task_info['id']
+    scope = f"task_changes:{task_id}"
+    limit = max(1, limit)
+    db_now = execute_query("SELECT NOW() AS db_now")[0]['db_now']
+    safe_time = db_now - timedelta(seconds=config.TASK_CHANGES_SAFETY_LAG_SECONDS)
+
+    rows: List[Dict[str, Any]] = []
+    has_more = False
+    if since:
+        decode_cursor(scope, since, 2)
+        select_sql = f"SELECT {TASK_EXECUTION_COLUMNS}, updated_time FROM leads_task_list"
+        # 只按游标推进安全时间之前的行：晚提交、时间戳更早的行不会被已越过的游标跳过
+        changes_query, changes_params = build_keyset_query(
+            select_sql, "task_id = %s AND updated_time < %s", [task_id, safe_time], ("updated_time", "id"),
+            scope=scope, cursor=since, page_size=limit
+        )
+        rows, next_cursor = finish_keyset_page(
+            execute_query(changes_query, tuple(changes_params)),
+            ("updated_time", "id"), scope=scope, page_size=limit
+        )
+        has_more = next_cursor is not None
+        if not has_more:
+            next_cursor = encode_cursor(scope, [safe_time, 0])
+            # 安全窗口内的最新变化：在 limit 余量内随本次返回，但游标不越过安全时间，下次调用会再次返回这些行
+            remaining = limit - len(rows)
+            if remaining > 0:
+                window_query, window_params = build_keyset_query(
+                    select_sql, "task_id = %s AND updated_time >= %s", [task_id, safe_time], ("updated_time", "id"),
+                    scope=scope, page_size=remaining
+                )
+                rows.extend(execute_query(window_query, tuple(window_params))[:remaining])
+    else:
+        next_cursor = encode_cursor(scope, [safe_time, 0])
+
+    changes = build_jobs_data(rows)
+    for entry, row in zip(changes, rows):
+        entry["updated_time"] = row['updated_time'].strftime("%Y-%m-%d %H:%M:%S") if row.get('updated_time') else None
+
+    counters = None
+    if rows or not since:
+        counters = task_call_counters(task_id)
+        counters["is_completed"] = task_info.get('task_type', 0) >= 3
+
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取任务变更成功",
+        "data": {
+            "task_id": task_id,
+            "task_type": task_info.get('task_type', 0),
+            "changes": changes,
+            "has_more": has_more,
+            "cursor": next_cursor,
+            "counters": counters,
+            "server_time": db_now.strftime("%Y-%m-%d %H:%M:%S")
+        }
+    }
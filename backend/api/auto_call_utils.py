@@ -4,7 +4,8 @@
 import json
 from typing import List, Optional, Tuple, Any, Dict
 from datetime import datetime
-from database.db import execute_query, execute_update
+from database.db import execute_update
+from .auth import resolve_principal
 
 
 def parse_time_ranges(start_str: Optional[str], end_str: Optional[str]) -> List[Tuple[Optional[str], Optional[str]]]:
@@ -240,33 +241,16 @@ def build_leads_query(size_desc: Any, organization_id: str) -> Tuple[str, List[A
 
 def validate_user_token(token: Dict[str, Any]) -> Tuple[str, str]:
     """验证用户token并返回user_id和organization_id"""
-    user_id = token.get("user_id")
-    if not user_id:
-        raise ValueError("令牌中缺少用户ID信息")
-    
-    org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-    org_result = execute_query(org_query, (user_id,))
-    
-    if not org_result or not org_result[0].get('dcc_user_org_id'):
+    principal = resolve_principal(token)
+    if not principal["organization_id"]:
         raise ValueError("用户未绑定组织或组织ID无效")
-    
-    organization_id = org_result[0]['dcc_user_org_id']
-    return user_id, organization_id
+    return principal["user_id"], principal["organization_id"]
 
 
 def validate_user_token_with_username(token: Dict[str, Any]) -> Tuple[str, str, str]:
     """验证用户token并返回user_id、organization_id和username"""
-    user_id = token.get("user_id")
-    if not user_id:
-        raise ValueError("令牌中缺少用户ID信息")
-    
-    org_query = "SELECT dcc_user_org_id, username FROM users WHERE id = %s"
-    org_result = execute_query(org_query, (user_id,))
-    
-    if not org_result or not org_result[0].get('dcc_user_org_id'):
+    principal = resolve_principal(token)
+    if not principal["organization_id"]:
         raise ValueError("用户未绑定组织或组织ID无效")
-    
-    organization_id = org_result[0]['dcc_user_org_id']
-    username = org_result[0].get('username', '')
-    return user_id, organization_id, username
+    return principal["user_id"], principal["organization_id"], principal["username"]
 
@@ -7,6 +7,8 @@ import os
 import time
 from typing import Dict, Any, List, Set
 from database.db import execute_query, execute_update
+from database.call_task_cache import get_call_task, invalidate_call_task
+from utils.task_events import EVENT_STATUS, publish_task_event
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,7 @@ class AutoTaskMonitor:
         self._processing_timeout = 300  # 处理超时时间（秒），超过此时间自动清除
         self._processing_start_time: Dict[int, float] = {}  # 任务开始处理的时间
         self._redis_client = None
+        self._redis_client_pid = None  # 创建 Redis 客户端的进程ID，fork 后需要在子进程中重新创建
         self._redis_processing_key = "auto_task_monitor:processing_tasks"
     
     def get_pending_tasks(self) -> List[Dict[str, Any]]:
@@ -325,8 +328,13 @@ class AutoTaskMonitor:
             self._processing_tasks.discard(task_id)
             self._processing_start_time.pop(task_id, None)
     
+    def reset_redis_client(self):
+        """丢弃当前缓存的 Redis 客户端（Celery 子进程启动时调用，避免沿用父进程的连接）"""
+        self._redis_client = None
+        self._redis_client_pid = None
+    
     def _get_redis_client(self):
-        if self._redis_client is not None:
+        if self._redis_client is not None and self._redis_client_pid == os.getpid():
             return self._redis_client
         try:
             import redis
@@ -358,6 +366,7 @@ class AutoTaskMonitor:
                 )
             client.ping()
             self._redis_client = client
+            self._redis_client_pid = os.getpid()
             logger.info("AutoTaskMonitor 已启用 Redis 作为分布式锁")
         except Exception as e:
             logger.warning(f"连接 Redis 失败，使用进程内存作为锁: {str(e)}")
@@ -392,18 +401,12 @@ class AutoTaskMonitor:
         - 如果所有需要创建跟进记录的任务（call_status 为最终状态 'Succeeded' 或 'Failed'）都已创建跟进记录，则更新 task_type = 4
         """
         try:
-            # 查询任务信息
-            task_query = """
-                SELECT id, task_name, task_type
-                FROM call_tasks
-                WHERE id = %s
-            """
-            task_result = execute_query(task_query, (task_id,))
+            # 查询任务信息（读缓存）
+            task_info = get_call_task(task_id)
             
-            if not task_result:
+            if not task_info:
                 return {"status": "error", "message": "任务不存在"}
             
-            task_info = task_result[0]
             current_task_type = task_info['task_type']
             
             # 统计已外呼的记录
@@ -464,6 +467,7 @@ class AutoTaskMonitor:
                     WHERE id = %s
                 """
                 execute_update(downgrade_query, (task_id,))
+                invalidate_call_task(task_id)
                 current_task_type = 3
                 updated = True
 
@@ -483,6 +487,7 @@ class AutoTaskMonitor:
                     WHERE id = %s
                 """
                 execute_update(downgrade_query, (task_id,))
+                invalidate_call_task(task_id)
                 current_task_type = 3
                 updated = True
             
@@ -497,6 +502,8 @@ class AutoTaskMonitor:
                     WHERE id = %s
                 """
                 execute_update(update_query, (task_id,))
+                invalidate_call_task(task_id)
+                current_task_type = 3
                 updated = True
                 logger.info(f"任务 {task_id} 状态更新为 3（外呼完成）")
             
@@ -520,6 +527,8 @@ class AutoTaskMonitor:
                     WHERE id = %s
                 """
                 execute_update(update_query, (task_id,))
+                invalidate_call_task(task_id)
+                current_task_type = 4
                 updated = True
                 logger.info(f"任务 {task_id} 状态更新为 4（跟进完成，所有最终状态的记录都已创建跟进记录）")
             elif total_final_status > 0:
@@ -541,6 +550,12 @@ class AutoTaskMonitor:
                 total_records = all_follow_result[0]['total_with_job_id'] if all_follow_result and all_follow_result[0].get('total_with_job_id') else 0
                 has_follow_all = all_follow_result[0]['has_follow_all'] if all_follow_result and all_follow_result[0].get('has_follow_all') else 0
                 logger.info(f"任务 {task_id} 没有最终状态的记录，检查所有记录: total_records={total_records}, has_follow_all={has_follow_all}")
+
+            if current_task_type != task_info['task_type']:
+                publish_task_event(task_id, EVENT_STATUS, {
+                    "task_type": current_task_type,
+                    "previous_task_type": task_info['task_type']
+                }, organization_id=task_info.get('organization_id'))
             
             return {
                 "status": "success",
@@ -60,19 +60,6 @@ async def create_organization(request: CreateOrganizationRequest):
                 message="组织类型必须为1(已认证)或2(未认证)"
             )
         
-        # 确保组织表存在
-        create_table_query = '''
-        CREATE TABLE IF NOT EXISTS organizations (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL UNIQUE COMMENT '公司名称',
-            organization_id VARCHAR(20) NOT NULL UNIQUE COMMENT '组织ID',
-            organization_type INT NOT NULL COMMENT '组织类型，1:已认证；2:未认证',
-            create_time DATETIME NOT NULL COMMENT '创建时间',
-            end_time DATETIME NOT NULL COMMENT '到期时间'
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='组织表';
-        '''
-        execute_update(create_table_query)
-        
         # 检查组织名称是否已存在
         check_name_query = "SELECT id, organization_id FROM organizations WHERE name = %s LIMIT 1"
         existing_org = execute_query(check_name_query, (request.name,))
@@ -0,0 +1,203 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+from database.call_task_cache import get_org_aggregate, org_aggregate_key, set_org_aggregate
+from database.org_version import CALL_TASKS, LEADS, LEADS_TASK_LIST, org_etag
+from utils.etag import conditional_response
+from utils.single_flight import single_flight
+from .auth import get_current_principal
+
+dashboard_router = APIRouter(tags=["首页看板"])
+
+
+class DashboardResponse(BaseModel):
+    """首页看板响应"""
+    status: str
+    code: int
+    message: str
+    data: Dict[str, Any]
+
+
+def _parse_task_types(task_types: Optional[str]) -> Optional[List[int]]:
+    """解析任务类型过滤（与 /task_list 相同：逗号分隔，忽略无效值，保留原顺序）"""
+    if not task_types:
+        return None
+    parsed: List[int] = []
+    for raw in task_types.split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            parsed.append(int(raw))
+        except ValueError:
+            continue
+    return parsed or None
+
+
+def _parse_leads_dimensions(value: Optional[str]) -> List[str]:
+    """解析线索统计维度：逗号分隔的 product/type/arrive，both 等同于 product,type"""
+    from .dcc_leads import LEADS_DIMENSIONS
+
+    dimensions: List[str] = []
+    for raw in (value or "").split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        expanded = ("product", "type") if raw == "both" else (raw,)
+        for dimension in expanded:
+            if dimension not in LEADS_DIMENSIONS:
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "status": "error",
+                        "code": 1003,
+                        "message": "leads_dimensions参数只能包含 product、type、arrive 或 both"
+                    }
+                )
+            if dimension not in dimensions:
+                dimensions.append(dimension)
+    return sorted(dimensions)
+
+
+async def _run_section(name: str, timing: Dict[str, float], errors: Dict[str, str],
+                       fn: Callable[[], Awaitable[Any]]) -> Any:
+    """执行看板的一个分区并记录耗时；失败时记录错误并返回 None，不影响其他分区"""
+    start = time.perf_counter()
+    try:
+        return await fn()
+    except HTTPException as e:
+        errors[name] = e.detail.get("message") if isinstance(e.detail, dict) else str(e.detail)
+    except Exception as e:
+        print(f"❌ 看板分区 {name} 失败: {str(e)}")
+        errors[name] = str(e)
+    finally:
+        timing[name] = round((time.perf_counter() - start) * 1000, 1)
+    return None
+
+
+@dashboard_router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    page: int = Query(1, ge=1, description="任务列表页码"),
+    page_size: int = Query(20, ge=1, le=200, description="任务列表每页数量"),
+    task_types: Optional[str] = Query(None, description="任务列表的任务类型过滤，逗号分隔，如 2,3,5"),
+    task_statistics: bool = Query(True, description="是否返回任务列表中各任务的跟进统计（同 /task-statistics）"),
+    leads_dimensions: Optional[str] = Query(None, description="线索统计维度，逗号分隔：product,type,arrive（both=product,type）；不传则不统计线索"),
+    principal: Dict[str, Any] = Depends(get_current_principal)
+):
+    """
+    首页看板：一次请求返回首页需要的全部数据，代替分别调用 /task-stats、/task_list、/task-statistics、/leads/statistics
+
+    - task_stats: 按任务类型的任务数与线索数（同 /task-stats，共用组织级聚合缓存与请求合并）
+    - task_list: 任务列表当前页（同 /task_list 页码分页，共用缓存）
+    - task_statistics: 当前页各任务的跟进统计 {task_id: 统计}，一次 GROUP BY 查询代替逐个任务调用 /task-statistics
+    - leads_statistics: 组织全部线索的总数与各维度分类统计，多个维度只扫描一次
+    - timing: 各分区耗时（毫秒）与总耗时；errors: 失败分区的错误信息（失败分区的数据为 null，其余分区照常返回）
+
+    组织只解析一次，相互独立的分区并发执行（任务跟进统计依赖任务列表，在其之后执行）。
+    支持条件 GET：相关数据均未变化且 If-None-Match 与当前 ETag 一致时返回 304
+
+    需要在请求头中提供access-token进行身份验证
+    """
+    from .auto_call_service import TASK_FOLLOW_STATS_KEYS, compute_task_stats, query_task_list_page, task_follow_stats
+    from .dcc_leads import count_leads_by_dimensions
+
+    organization_id = principal["organization_id"]
+    task_type_list = _parse_task_types(task_types)
+    dimensions = _parse_leads_dimensions(leads_dimensions)
+
+    scopes = [CALL_TASKS]
+    if task_statistics:
+        scopes.append(LEADS_TASK_LIST)
+    if dimensions:
+        scopes.append(LEADS)
+    etag_params = {
+        "page": page, "page_size": page_size, "task_types": task_type_list,
+        "task_statistics": task_statistics, "leads_dimensions": dimensions
+    }
+    not_modified = conditional_response(request, response, org_etag(organization_id, "dashboard", tuple(scopes), etag_params))
+    if not_modified:
+        return not_modified
+
+    started = time.perf_counter()
+    timing: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+
+    async def load_task_stats():
+        # 与 /task-stats 使用相同的缓存键与合并键
+        cache_key = org_aggregate_key(organization_id, "task_stats")
+        cached = get_org_aggregate(cache_key)
+        if cached:
+            return cached["data"]
+
+        async def compute():
+            result = {
+                "status": "success",
+                "code": 200,
+                "message": "获取任务统计信息成功",
+                "data": await asyncio.to_thread(compute_task_stats, organization_id)
+            }
+            set_org_aggregate(cache_key, result)
+            return result
+
+        return (await single_flight("task_stats", organization_id, {"cache_key": cache_key}, compute))["data"]
+
+    async def load_task_list():
+        # 与 /task_list 页码分页使用相同的缓存键
+        cache_key = org_aggregate_key(organization_id, "task_list", {"page": page, "page_size": page_size, "task_types": task_type_list})
+        cached = get_org_aggregate(cache_key)
+        if cached:
+            return cached["data"]
+        result = await asyncio.to_thread(
+            query_task_list_page, organization_id, page=page, page_size=page_size, task_types=task_type_list
+        )
+        set_org_aggregate(cache_key, result)
+        return result["data"]
+
+    async def load_task_list_and_statistics():
+        task_list = await _run_section("task_list", timing, errors, load_task_list)
+        if not task_statistics or not task_list:
+            return task_list, None
+        task_ids = [item["id"] for item in task_list.get("items", [])]
+
+        async def load_task_statistics():
+            stats = await asyncio.to_thread(task_follow_stats, task_ids)
+            return {str(task_id): stats.get(task_id) or dict.fromkeys(TASK_FOLLOW_STATS_KEYS, 0) for task_id in task_ids}
+
+        return task_list, await _run_section("task_statistics", timing, errors, load_task_statistics)
+
+    async def load_leads_statistics():
+        return await single_flight(
+            "dashboard_leads", organization_id, {"dimensions": dimensions},
+            lambda: asyncio.to_thread(count_leads_by_dimensions, organization_id, dimensions)
+        )
+
+    async def skip():
+        return None
+
+    task_stats, (task_list, task_statistics_data), leads_statistics = await asyncio.gather(
+        _run_section("task_stats", timing, errors, load_task_stats),
+        load_task_list_and_statistics(),
+        _run_section("leads_statistics", timing, errors, load_leads_statistics) if dimensions else skip()
+    )
+    timing["total"] = round((time.perf_counter() - started) * 1000, 1)
+    if errors and "etag" in response.headers:
+        # 部分分区失败的结果不应被客户端缓存后以 304 复用
+        del response.headers["etag"]
+
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取看板数据成功" if not errors else "获取看板数据成功（部分分区失败）",
+        "data": {
+            "task_stats": task_stats,
+            "task_list": task_list,
+            "task_statistics": task_statistics_data,
+            "leads_statistics": leads_statistics,
+            "timing": timing,
+            "errors": errors
+        }
+    }
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Request, Response
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
 import os
+import asyncio
 import pandas as pd
 import tempfile
-from database.db import execute_query, execute_update
-from .auth import verify_access_token
+from database.db import bulk_insert, execute_query, fetch_all, iter_query
+from database.org_version import LEADS, bump_org_version, org_etag
+from .auth import get_current_principal
+from utils.etag import conditional_response
+from utils.single_flight import single_flight
 
 dcc_leads_router = APIRouter(tags=["线索管理"])
 
@@ -52,6 +56,8 @@ class LeadsImportResponse(BaseModel):
 
 @dcc_leads_router.get("/leads/statistics", response_model=LeadsCountResponse)
 async def get_leads_statistics(
+    request: Request,
+    response: Response,
     filter_by: Optional[str] = Query(None, description="筛选维度：product-按产品，type-按等级，both-按产品和等级，arrive-按是否到店"),
     leads_product: Optional[str] = Query(None, description="线索产品筛选，多个值用逗号分隔，如：产品1,产品2,产品3"),
     leads_type: Optional[str] = Query(None, description="线索等级筛选，多个值用逗号分隔，如：等级1,等级2,等级3"),
@@ -64,7 +70,7 @@ async def get_leads_statistics(
     first_arrive_start: Optional[str] = Query(None, description="首次到店开始时间，多个区间用分号分隔，如：2024-01-01,2024-01-31;2024-03-01,2024-03-31"),
     first_arrive_end: Optional[str] = Query(None, description="首次到店结束时间，多个区间用分号分隔，如：2024-01-01,2024-01-31;2024-03-01,2024-03-31"),
     is_arrive: Optional[str] = Query(None, description="是否到店筛选，多个值用逗号分隔，如：0,1（0-否，1-是）"),
-    token: str = Depends(verify_access_token)
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     获取线索统计信息，支持多种筛选条件叠加
@@ -85,6 +91,8 @@ async def get_leads_statistics(
     - first_arrive_start/end: 首次到店时间区间，支持多区间，格式：开始时间,结束时间;开始时间,结束时间
     - is_arrive: 是否到店筛选，支持多选，多个值用逗号分隔
     
+    支持条件 GET：线索与跟进记录未变化且 If-None-Match 与当前 ETag 一致时返回 304，不执行统计扫描
+    
     需要在请求头中提供access-token进行身份验证
     """
     try:
@@ -100,31 +108,22 @@ async def get_leads_statistics(
         first_arrive_ranges = _parse_time_ranges(first_arrive_start, first_arrive_end)
         
         # 获取用户组织ID
-        user_id = token.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "令牌中缺少用户ID信息"
-                }
-            )
-        
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
-        
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "用户未绑定组织或组织ID无效"
-                }
-            )
-        
-        dcc_user_org_id = org_result[0]['dcc_user_org_id']
+        dcc_user_org_id = principal["organization_id"]
+        
+        # 多值参数排序后作为条件 GET 与请求合并的键，取值顺序不影响结果
+        flight_params = {
+            "filter_by": filter_by,
+            "leads_product": sorted(leads_product_list),
+            "leads_type": sorted(leads_type_list),
+            "is_arrive": sorted(is_arrive_list),
+            "first_follow": sorted(first_follow_ranges, key=str),
+            "latest_follow": sorted(latest_follow_ranges, key=str),
+            "next_follow": sorted(next_follow_ranges, key=str),
+            "first_arrive": sorted(first_arrive_ranges, key=str),
+        }
+        not_modified = conditional_response(request, response, org_etag(dcc_user_org_id, "leads_statistics", (LEADS,), flight_params))
+        if not_modified:
+            return not_modified
         
         # 构建基础查询条件（组织ID限定）
         base_conditions = ["dl.organization_id = %s"]
@@ -230,28 +229,28 @@ async def get_leads_statistics(
         all_params = base_params + filter_params
         
         # 构建查询SQL
-        query = """
-            SELECT DISTINCT
-                dl.leads_id,
-                dl.leads_product,
-                dl.leads_type,
-                dlf.frist_follow_time,
-                dlf.new_follow_time,
-                dlf.next_follow_time,
-                dlf.frist_arrive_time,
-                dlf.is_arrive
-            FROM dcc_leads dl
-            LEFT JOIN dcc_leads_follow dlf ON dl.leads_id = CAST(dlf.leads_id AS CHAR)
-        """
+        query = LEADS_STATISTICS_QUERY
         
         if all_conditions:
             query += " WHERE " + " AND ".join(all_conditions)
         
-        # 执行查询
-        results = execute_query(query, all_params)
+        # 如果指定了filter_by，验证参数
+        if filter_by is not None and filter_by not in ['product', 'type', 'both', 'arrive']:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "status": "error",
+                    "code": 1003,
+                    "message": "filter_by参数必须是 product、type、both 或 arrive"
+                }
+            )
         
-        # 提取线索ID列表（去重）
-        leads_ids = list(set([str(row['leads_id']) for row in results]))
+        # 流式扫描并累计统计（服务端游标，放到线程池执行，避免阻塞事件循环）
+        # 同一组织相同筛选条件的并发请求合并为一次扫描
+        leads_ids, stats = await single_flight(
+            "leads_statistics", dcc_user_org_id, flight_params,
+            lambda: asyncio.to_thread(_stream_leads_statistics, query, all_params, filter_by)
+        )
         
         # 如果没有指定filter_by，返回总数和线索ID列表
         if filter_by is None:
@@ -265,30 +264,6 @@ async def get_leads_statistics(
                 }
             )
         
-        # 如果指定了filter_by，验证参数
-        if filter_by not in ['product', 'type', 'both', 'arrive']:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "filter_by参数必须是 product、type、both 或 arrive"
-                }
-            )
-        
-        # 按维度统计
-        if filter_by == 'product':
-            stats = _count_by_product(results)
-        elif filter_by == 'type':
-            stats = _count_by_type(results)
-        elif filter_by == 'arrive':
-            stats = _count_by_arrive(results)
-        else:  # both
-            stats = {
-                'by_product': _count_by_product(results),
-                'by_type': _count_by_type(results)
-            }
-        
         return LeadsCountResponse(
             status="success",
             code=1000,
@@ -321,7 +296,7 @@ async def get_leads_count(
     first_arrive_start: Optional[str] = Query(None, description="首次到店开始时间，多个区间用分号分隔，如：2024-01-01,2024-01-31;2024-03-01,2024-03-31"),
     first_arrive_end: Optional[str] = Query(None, description="首次到店结束时间，多个区间用分号分隔，如：2024-01-01,2024-01-31;2024-03-01,2024-03-31"),
     is_arrive: Optional[str] = Query(None, description="是否到店筛选，多个值用逗号分隔，如：0,1（0-否，1-是）"),
-    token: str = Depends(verify_access_token)
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     获取符合条件的线索总数和线索ID列表
@@ -345,32 +320,7 @@ async def get_leads_count(
         params = []
         
         # 组织ID限定（必须）
-        user_id = token.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "令牌中缺少用户ID信息"
-                }
-            )
-        
-        # 从数据库中获取用户的组织ID
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
-        
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "用户未绑定组织或组织ID无效"
-                }
-            )
-        
-        dcc_user_org_id = org_result[0]['dcc_user_org_id']
+        dcc_user_org_id = principal["organization_id"]
         where_conditions.append("dl.organization_id = %s")
         params.append(dcc_user_org_id)
         
@@ -468,7 +418,7 @@ async def get_leads_count(
             query += " WHERE " + " AND ".join(where_conditions)
         
         # 执行查询
-        results = execute_query(query, params)
+        results = await fetch_all(query, params, read_only=True)
         
         # 提取线索ID列表
         leads_ids = [str(row['leads_id']) for row in results]
@@ -493,92 +443,99 @@ async def get_leads_count(
             }
         )
 
-def _count_by_product(results: List[Dict]) -> List[LeadsCountItem]:
-    """按产品统计线索"""
-    product_stats = {}
-    
-    for row in results:
-        product = row['leads_product'] or '未知产品'
-        leads_id = str(row['leads_id'])
-        
-        if product not in product_stats:
-            product_stats[product] = {
-                'count': 0,
-                'leads_ids': []
-            }
-        
-        # 只统计不重复的线索ID
-        if leads_id not in product_stats[product]['leads_ids']:
-            product_stats[product]['leads_ids'].append(leads_id)
-            product_stats[product]['count'] += 1
-    
-    return [
-        LeadsCountItem(
-            category=product,
-            count=stats['count'],
-            leads_ids=stats['leads_ids']
-        )
-        for product, stats in product_stats.items()
-    ]
+# 线索统计扫描的查询（不含 WHERE），列顺序与下方的列下标常量保持一致
+LEADS_STATISTICS_QUERY = """
+    SELECT DISTINCT
+        dl.leads_id,
+        dl.leads_product,
+        dl.leads_type,
+        dlf.frist_follow_time,
+        dlf.new_follow_time,
+        dlf.next_follow_time,
+        dlf.frist_arrive_time,
+        dlf.is_arrive
+    FROM dcc_leads dl
+    LEFT JOIN dcc_leads_follow dlf ON dl.leads_id = CAST(dlf.leads_id AS CHAR)
+"""
 
-def _count_by_type(results: List[Dict]) -> List[LeadsCountItem]:
-    """按等级统计线索"""
-    type_stats = {}
-    
-    for row in results:
-        leads_type = row['leads_type'] or '未知等级'
-        leads_id = str(row['leads_id'])
-        
-        if leads_type not in type_stats:
-            type_stats[leads_type] = {
-                'count': 0,
-                'leads_ids': []
-            }
-        
-        # 只统计不重复的线索ID
-        if leads_id not in type_stats[leads_type]['leads_ids']:
-            type_stats[leads_type]['leads_ids'].append(leads_id)
-            type_stats[leads_type]['count'] += 1
-    
-    return [
-        LeadsCountItem(
-            category=leads_type,
-            count=stats['count'],
-            leads_ids=stats['leads_ids']
-        )
-        for leads_type, stats in type_stats.items()
-    ]
+_LEADS_ID_COL = 0
+_LEADS_PRODUCT_COL = 1
+_LEADS_TYPE_COL = 2
+_IS_ARRIVE_COL = 7
 
-def _count_by_arrive(results: List[Dict]) -> List[LeadsCountItem]:
-    """按是否到店统计线索"""
-    arrive_stats = {}
-    
-    for row in results:
-        # 从跟进表中获取是否到店信息
-        is_arrive = row.get('is_arrive', 0)  # 默认为0（未到店）
-        arrive_status = ARRIVE_STATUS_CONSTANTS["ARRIVED"] if is_arrive == 1 else ARRIVE_STATUS_CONSTANTS["NOT_ARRIVED"]
-        leads_id = str(row['leads_id'])
-        
-        if arrive_status not in arrive_stats:
-            arrive_stats[arrive_status] = {
-                'count': 0,
-                'leads_ids': []
-            }
-        
-        # 只统计不重复的线索ID
-        if leads_id not in arrive_stats[arrive_status]['leads_ids']:
-            arrive_stats[arrive_status]['leads_ids'].append(leads_id)
-            arrive_stats[arrive_status]['count'] += 1
-    
+# 统计维度：product-按产品，type-按等级，arrive-按是否到店
+LEADS_DIMENSIONS = ("product", "type", "arrive")
+
+def _add_to_bucket(bucket_stats: Dict[str, Dict], category: str, leads_id: str):
+    """将线索ID累计到指定分类（同一分类内去重）"""
+    stats = bucket_stats.get(category)
+    if stats is None:
+        stats = bucket_stats[category] = {'seen': set(), 'leads_ids': []}
+    if leads_id not in stats['seen']:
+        stats['seen'].add(leads_id)
+        stats['leads_ids'].append(leads_id)
+
+def _bucket_items(bucket_stats: Dict[str, Dict]) -> List[Dict[str, Any]]:
+    """将分类累计结果转换为响应项（LeadsCountItem 结构的字典，可直接 JSON 序列化，便于跨进程共享结果）"""
     return [
         LeadsCountItem(
-            category=arrive_status,
-            count=stats['count'],
+            category=category,
+            count=len(stats['leads_ids']),
             leads_ids=stats['leads_ids']
-        )
-        for arrive_status, stats in arrive_stats.items()
+        ).model_dump()
+        for category, stats in bucket_stats.items()
     ]
 
+def scan_leads_statistics(query: str, params: List[Any], dimensions):
+    """
+    使用服务端游标逐行扫描线索查询结果，一次扫描同时累计多个维度，
+    返回 (去重后的线索ID列表, {维度: [LeadsCountItem 结构的字典]})
+    """
+    seen_ids = set()
+    leads_ids: List[str] = []
+    buckets: Dict[str, Dict[str, Dict]] = {dimension: {} for dimension in dimensions}
+    by_product = buckets.get('product')
+    by_type = buckets.get('type')
+    by_arrive = buckets.get('arrive')
+
+    for row in iter_query(query, params, batch_size=2000, as_tuple=True, read_only=True):
+        leads_id = str(row[_LEADS_ID_COL])
+        if leads_id not in seen_ids:
+            seen_ids.add(leads_id)
+            leads_ids.append(leads_id)
+        if by_product is not None:
+            _add_to_bucket(by_product, row[_LEADS_PRODUCT_COL] or '未知产品', leads_id)
+        if by_type is not None:
+            _add_to_bucket(by_type, row[_LEADS_TYPE_COL] or '未知等级', leads_id)
+        if by_arrive is not None:
+            # 从跟进表中获取是否到店信息（无跟进记录时视为未到店）
+            arrive_status = ARRIVE_STATUS_CONSTANTS["ARRIVED"] if row[_IS_ARRIVE_COL] == 1 else ARRIVE_STATUS_CONSTANTS["NOT_ARRIVED"]
+            _add_to_bucket(by_arrive, arrive_status, leads_id)
+
+    return leads_ids, {dimension: _bucket_items(bucket) for dimension, bucket in buckets.items()}
+
+def _stream_leads_statistics(query: str, params: List[Any], filter_by: Optional[str]):
+    """按 filter_by 扫描线索统计，返回 (去重后的线索ID列表, 分维度统计)"""
+    dimensions = ('product', 'type') if filter_by == 'both' else ((filter_by,) if filter_by in LEADS_DIMENSIONS else ())
+    leads_ids, by_dimension = scan_leads_statistics(query, params, dimensions)
+    if filter_by == 'both':
+        stats = {
+            'by_product': by_dimension['product'],
+            'by_type': by_dimension['type']
+        }
+    else:
+        stats = by_dimension.get(filter_by)
+    return leads_ids, stats
+
+def count_leads_by_dimensions(organization_id: str, dimensions) -> Dict[str, Any]:
+    """不带筛选条件统计组织全部线索：一次扫描返回总数与各维度的分类统计（{"total_count", "product", ...}）"""
+    leads_ids, by_dimension = scan_leads_statistics(
+        LEADS_STATISTICS_QUERY + " WHERE dl.organization_id = %s", [organization_id], dimensions
+    )
+    result: Dict[str, Any] = dict(by_dimension)
+    result["total_count"] = len(leads_ids)
+    return result
+
 def _parse_multi_values(value_str: Optional[str]) -> List[str]:
     """解析多选字符串参数"""
     if not value_str:
@@ -635,10 +592,26 @@ def _parse_time_ranges(start_str: Optional[str], end_str: Optional[str]) -> List
     
     return time_ranges
 
+# 线索导入写入的字段（按 INSERT 列顺序）
+LEADS_IMPORT_COLUMNS = (
+    'organization_id', 'leads_id', 'leads_user_name', 'leads_user_phone',
+    'leads_create_time', 'leads_product', 'leads_type'
+)
+
+def _find_existing_leads_ids(leads_ids: List[str], batch_size: int = 1000) -> set:
+    """按批次（IN 列表）查询库中已存在的 leads_id"""
+    existing = set()
+    for offset in range(0, len(leads_ids), batch_size):
+        batch = leads_ids[offset:offset + batch_size]
+        placeholders = ','.join(['%s'] * len(batch))
+        rows = execute_query(f"SELECT leads_id FROM dcc_leads WHERE leads_id IN ({placeholders})", tuple(batch))
+        existing.update(str(row['leads_id']) for row in rows)
+    return existing
+
 @dcc_leads_router.post("/leads/import", response_model=LeadsImportResponse)
 async def import_leads_from_excel(
     file: UploadFile = File(..., description="Excel文件，支持.xlsx和.xls格式"),
-    token: str = Depends(verify_access_token)
+    principal: Dict[str, Any] = Depends(get_current_principal)
 ):
     """
     通过Excel文件导入线索数据
@@ -672,31 +645,7 @@ async def import_leads_from_excel(
             )
         
         # 获取用户组织ID
-        user_id = token.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "令牌中缺少用户ID信息"
-                }
-            )
-        
-        org_query = "SELECT dcc_user_org_id FROM users WHERE id = %s"
-        org_result = execute_query(org_query, (user_id,))
-        
-        if not org_result or not org_result[0].get('dcc_user_org_id'):
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "status": "error",
-                    "code": 1003,
-                    "message": "用户未绑定组织或组织ID无效"
-                }
-            )
-        
-        default_organization_id = org_result[0]['dcc_user_org_id']
+        default_organization_id = principal["organization_id"]
         
         # 读取上传的文件
         file_content = await file.read()
@@ -740,6 +689,9 @@ async def import_leads_from_excel(
             errors = []
             imported_leads = []
             
+            # 第一遍：校验并整理行数据（文件内重复的 leads_id 只保留第一条）
+            candidates = []
+            seen_leads_ids = set()
             for idx, row in df.iterrows():
                 try:
                     # 检查leads_id是否为空
@@ -749,16 +701,14 @@ async def import_leads_from_excel(
                         error_count += 1
                         continue
                     
-                    # 检查是否已存在相同的leads_id
-                    existing = execute_query('SELECT id FROM dcc_leads WHERE leads_id = %s', (leads_id,))
-                    
-                    if existing:
-                        errors.append(f'第{idx + 1}行: leads_id {leads_id} 已存在，跳过')
+                    if leads_id in seen_leads_ids:
+                        errors.append(f'第{idx + 1}行: leads_id {leads_id} 在文件中重复，跳过')
                         skipped_count += 1
                         continue
+                    seen_leads_ids.add(leads_id)
                     
                     # 准备插入数据
-                    insert_data = {
+                    candidates.append((idx, {
                         'leads_id': leads_id,
                         'leads_user_name': str(row['leads_user_name']).strip() if pd.notna(row.get('leads_user_name')) else '',
                         'leads_user_phone': str(row['leads_user_phone']).strip() if pd.notna(row.get('leads_user_phone')) else '',
@@ -766,28 +716,44 @@ async def import_leads_from_excel(
                         'leads_type': str(row['leads_type']).strip() if pd.notna(row.get('leads_type')) else '',
                         'organization_id': str(row['organization_id']).strip() if pd.notna(row.get('organization_id')) else default_organization_id,
                         'leads_create_time': row['leads_create_time'] if pd.notna(row.get('leads_create_time')) else datetime.now()
-                    }
-                    
-                    # 插入数据
-                    insert_sql = '''
-                    INSERT INTO dcc_leads 
-                    (organization_id, leads_id, leads_user_name, leads_user_phone, leads_create_time, leads_product, leads_type)
-                    VALUES (%(organization_id)s, %(leads_id)s, %(leads_user_name)s, %(leads_user_phone)s, %(leads_create_time)s, %(leads_product)s, %(leads_type)s)
-                    '''
-                    
-                    result = execute_update(insert_sql, insert_data)
-                    success_count += 1
-                    imported_leads.append({
-                        'leads_id': insert_data['leads_id'],
-                        'leads_user_name': insert_data['leads_user_name'],
-                        'leads_user_phone': insert_data['leads_user_phone']
-                    })
+                    }))
                     
                 except Exception as e:
                     error_msg = f'第{idx + 1}行导入失败: {str(e)}'
                     errors.append(error_msg)
                     error_count += 1
             
+            # 第二遍：按批次查询已存在的 leads_id（替代逐行查询）
+            existing_leads_ids = _find_existing_leads_ids([data['leads_id'] for _, data in candidates])
+            insert_rows = []
+            for idx, data in candidates:
+                if data['leads_id'] in existing_leads_ids:
+                    errors.append(f'第{idx + 1}行: leads_id {data["leads_id"]} 已存在，跳过')
+                    skipped_count += 1
+                    continue
+                insert_rows.append(data)
+            
+            # 在一个事务内分块批量插入
+            if insert_rows:
+                try:
+                    bulk_insert("dcc_leads", LEADS_IMPORT_COLUMNS, [
+                        tuple(data[column] for column in LEADS_IMPORT_COLUMNS) for data in insert_rows
+                    ])
+                    success_count = len(insert_rows)
+                    for organization_id in {data['organization_id'] for data in insert_rows}:
+                        bump_org_version(organization_id, LEADS)
+                    imported_leads = [
+                        {
+                            'leads_id': data['leads_id'],
+                            'leads_user_name': data['leads_user_name'],
+                            'leads_user_phone': data['leads_user_phone']
+                        }
+                        for data in insert_rows[:10]
+                    ]
+                except Exception as e:
+                    errors.append(f'批量写入失败，已整体回滚: {str(e)}')
+                    error_count += len(insert_rows)
+            
             # 返回导入结果
             result_data = {
                 'success_count': success_count,
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from typing import Optional
 import hashlib
 import time
 from database.db import execute_query, execute_update
+from database.pagination import InvalidCursor, build_keyset_query, estimate_count, finish_keyset_page
 
 # 创建路由
 dcc_user_router = APIRouter(tags=["DCC用户管理"])
@@ -177,26 +178,64 @@ async def verify_dcc_user(user: DccUserVerify):
 
 # 获取DCC用户列表接口
 @dcc_user_router.get("/dcc/user/list", response_model=DccUserResponse, description="获取DCC用户列表")
-async def get_dcc_user_list():
+async def get_dcc_user_list(
+    paginate: str = Query("none", description="分页方式：none-返回全部（默认），page-页码，cursor-游标（按id）"),
+    page: int = Query(1, ge=1, description="页码分页：页码，从1开始"),
+    page_size: int = Query(50, ge=1, le=500, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="游标分页：上一页返回的 next_cursor，首页不传"),
+    estimate_total: bool = Query(False, description="游标分页：是否返回估算总数（不执行 COUNT）")
+):
     """
     获取DCC用户列表接口
     
-    返回所有DCC用户的基本信息
+    返回DCC用户的基本信息；不指定分页方式时返回全部用户
     """
     try:
-        users = execute_query(
-            "SELECT id, user_name, user_org_id, user_status FROM dcc_user ORDER BY id"
-        )
+        select_sql = "SELECT id, user_name, user_org_id, user_status FROM dcc_user"
+        pagination = None
+        if paginate == "cursor":
+            try:
+                list_sql, list_params = build_keyset_query(
+                    select_sql, None, None, ("id",), scope="dcc_user_list", cursor=cursor, page_size=page_size
+                )
+            except InvalidCursor as e:
+                return DccUserResponse(status="error", code=400, message=str(e))
+            users, next_cursor = finish_keyset_page(
+                execute_query(list_sql, tuple(list_params)), ("id",), scope="dcc_user_list", page_size=page_size
+            )
+            total = estimate_count("FROM dcc_user") if estimate_total else None
+            pagination = {
+                "mode": "cursor",
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            }
+        elif paginate == "page":
+            count_result = execute_query("SELECT COUNT(*) AS total FROM dcc_user")
+            total = count_result[0]["total"] if count_result else 0
+            users = execute_query(f"{select_sql} ORDER BY id LIMIT %s OFFSET %s", (page_size, (page - 1) * page_size))
+            pagination = {
+                "mode": "page",
+                "page": page,
+                "page_size": page_size,
+                "total_pages": (total + page_size - 1) // page_size
+            }
+        else:
+            users = execute_query(f"{select_sql} ORDER BY id")
+            total = len(users)
         
+        data = {
+            "users": users,
+            "total": total,
+            "org_id": users[0]["user_org_id"] if users else None
+        }
+        if pagination:
+            data["pagination"] = pagination
         return DccUserResponse(
             status="success",
             code=200,
             message="获取DCC用户列表成功",
-            data={
-                "users": users,
-                "total": len(users),
-                "org_id": users[0]["user_org_id"]
-            }
+            data=data
         )
         
     except Exception as e:
@@ -1,10 +1,81 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+from database.db import get_pool_stats, render_pool_metrics
+from database.query_stats import get_top_statements
+from utils.cache import get_cache_stats
+from utils.single_flight import get_single_flight_stats
+from utils.task_events import get_task_event_stats
+from openAPI.outbound_client import get_outbound_client_stats
+from utils.rate_limiter import get_rate_limiter_stats
+from database.call_task_cache import register_call_task_caches
+from config import config
+from .auth import verify_access_token, get_principal_stats
 
 health_router = APIRouter(tags=["健康检查"])
 
+# /health/cache 需要看到 call_task / org_aggregate 缓存，即使尚未有其他模块导入它们
+register_call_task_caches()
+
 @health_router.get("/health")
 async def health_check():
     """
     健康检查接口，用于确认服务是否正常运行
     """
-    return {"status": "ok", "message": "服务运行正常"}
\ No newline at end of file
+    return {"status": "ok", "message": "服务运行正常"}
+
+@health_router.get("/health/db-pool")
+async def db_pool_stats():
+    """
+    数据库连接池运行指标（当前进程）：借出等待、占用时长、使用中/空闲连接数、耗尽次数
+    """
+    return {"status": "success", "code": 200, "message": "获取连接池指标成功", "data": get_pool_stats()}
+
+@health_router.get("/metrics/db-pool", response_class=PlainTextResponse)
+async def db_pool_metrics():
+    """
+    数据库连接池指标（Prometheus 文本格式），供监控系统抓取
+    """
+    return PlainTextResponse(render_pool_metrics(), media_type="text/plain; version=0.0.4")
+
+@health_router.get("/health/slow-queries")
+async def slow_queries(
+    limit: int = Query(20, ge=1, le=200, description="返回的语句指纹数量"),
+    order_by: str = Query("total", description="排序字段：total/count/avg/p99/max"),
+    token: Dict[str, Any] = Depends(verify_access_token)
+):
+    """
+    当前进程内按指纹聚合的 SQL 耗时统计（次数、p50/p95/p99、最大耗时、慢查询次数），返回前 N 条
+
+    需要在请求头中提供access-token进行身份验证
+    """
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取SQL耗时统计成功",
+        "data": {
+            "slow_query_threshold_ms": config.DB_SLOW_QUERY_MS,
+            "statements": get_top_statements(limit=limit, order_by=order_by)
+        }
+    }
+
+@health_router.get("/health/cache")
+async def cache_stats():
+    """
+    当前进程的缓存命中统计：各缓存的进程内/Redis 命中、未命中、写入与失效次数，用户身份解析，
+    相同请求合并（single-flight）的各接口合并率，任务事件推送（SSE 订阅数、分发与丢弃次数），外呼客户端创建次数，
+    以及 OpenAPI 限流统计（各接口的令牌等待次数与耗时、等待超时、阿里云限流次数）
+    """
+    return {
+        "status": "success",
+        "code": 200,
+        "message": "获取缓存统计成功",
+        "data": {
+            "caches": get_cache_stats(),
+            "principal": get_principal_stats(),
+            "single_flight": get_single_flight_stats(),
+            "task_events": get_task_event_stats(),
+            "outbound_client": get_outbound_client_stats(),
+            "openapi_rate_limit": get_rate_limiter_stats()
+        }
+    }
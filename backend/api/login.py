@@ -5,6 +5,7 @@ import hashlib
 import time
 from database.db import execute_query, execute_update
 from utils.jwt_utils import create_access_token, get_token_expiry_info
+from .auth import invalidate_principal
 
 # 创建路由
 login_router = APIRouter(tags=["用户管理"])
@@ -82,19 +83,6 @@ def get_or_create_default_organization():
                     return org_id
             raise Exception("无法生成唯一的组织ID，请重试")
         
-        # 确保组织表存在
-        create_table_query = '''
-        CREATE TABLE IF NOT EXISTS organizations (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100) NOT NULL UNIQUE COMMENT '公司名称',
-            organization_id VARCHAR(20) NOT NULL UNIQUE COMMENT '组织ID',
-            organization_type INT NOT NULL COMMENT '组织类型，1:已认证；2:未认证',
-            create_time DATETIME NOT NULL COMMENT '创建时间',
-            end_time DATETIME NOT NULL COMMENT '到期时间'
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='组织表';
-        '''
-        execute_update(create_table_query)
-        
         # 生成唯一的组织ID
         organization_id = generate_unique_organization_id()
         
@@ -518,6 +506,8 @@ async def associate_dcc_user(
                 "UPDATE users SET dcc_user = %s, dcc_user_org_id = %s WHERE id = %s",
                 (request.dcc_user, request.dcc_user_org_id, user_id)
             )
+            # 组织绑定已变更：清除身份缓存，旧令牌中的组织声明不再被信任
+            invalidate_principal(user_id)
         except Exception as e:
             return DccUserResponse(
                 status="error",
@@ -628,6 +618,8 @@ async def disassociate_dcc_user(
                 "UPDATE users SET dcc_user = NULL, dcc_user_org_id = NULL WHERE id = %s",
                 (user_id,)
             )
+            # 组织绑定已变更：清除身份缓存，旧令牌中的组织声明不再被信任
+            invalidate_principal(user_id)
         except Exception as e:
             return DccUserResponse(
                 status="error",
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 import uuid
-from database.db import execute_update, execute_query
+from database.db import execute_query, unit_of_work
+from database.org_version import SCENES, bump_org_version, org_etag
+from utils.etag import conditional_response
 from .auth import verify_access_token
 import requests
 import json
@@ -212,18 +214,18 @@ async def create_scene(request: CreateSceneRequest, token: dict = Depends(verify
             request.dialogue_flow, request.dialogue_constraint, request.dialogue_opening_prompt
         )
         
-        execute_update(scene_sql, scene_params)
-        
-        # 如果有场景标签，插入标签数据
-        if request.scene_tags:
-            tag_sql = """
-            INSERT INTO scene_tags (script_id, tag_name, tag_detail, tags)
-            VALUES (%s, %s, %s, %s)
-            """
+        # 场景与标签在同一事务内写入，保证原子性
+        with unit_of_work() as tx:
+            tx.execute(scene_sql, scene_params)
             
-            for tag in request.scene_tags:
-                tag_params = (script_id, tag.tag_name, tag.tag_detail, tag.tags)
-                execute_update(tag_sql, tag_params)
+            # 如果有场景标签，分块批量插入标签数据
+            if request.scene_tags:
+                tx.bulk_insert(
+                    "scene_tags",
+                    ("script_id", "tag_name", "tag_detail", "tags"),
+                    [(script_id, tag.tag_name, tag.tag_detail, tag.tags) for tag in request.scene_tags],
+                )
+        bump_org_version(org_id, SCENES)
         
         return {
             "status": "success",
@@ -245,11 +247,16 @@ async def create_scene(request: CreateSceneRequest, token: dict = Depends(verify
                  response_model=SceneListResponse,
                  summary="查询自动外呼场景",
                  description="根据token查询对应组织中创建的上线场景（包括官方场景）")
-async def get_scenes(token: dict = Depends(verify_access_token)):
-    """查询自动外呼场景"""
+async def get_scenes(request: Request, response: Response, token: dict = Depends(verify_access_token)):
+    """查询自动外呼场景（支持条件 GET：If-None-Match 与当前 ETag 一致时返回 304）"""
     try:
         # 获取用户信息
         org_id = token.get("organization_id")
+
+        if org_id:
+            not_modified = conditional_response(request, response, org_etag(org_id, "scenes", (SCENES,)))
+            if not_modified:
+                return not_modified
         
         # 查询场景：用户组织创建的上线场景 + 官方上线场景（也按组织过滤）
         scene_sql = """
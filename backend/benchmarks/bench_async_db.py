@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步数据库访问层并发基准测试
+对比 async 路由中直接调用阻塞的 execute_query 与使用 fetch_all 两种方式下的并发吞吐量
+
+用法（在 backend 目录下执行，需可连接的 MySQL）：
+    python benchmarks/bench_async_db.py --concurrency 50 --requests 500 --sleep 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import execute_query, fetch_all, close_async_pool, AIOMYSQL_AVAILABLE
+
+
+def _percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _blocking_handler(sql, params):
+    """模拟现有写法：async 函数内直接调用同步查询"""
+    return execute_query(sql, params)
+
+
+async def _async_handler(sql, params):
+    """新写法：await 异步查询"""
+    return await fetch_all(sql, params)
+
+
+async def _run(handler, total, concurrency, sql, params):
+    """以固定并发度执行 total 次请求，返回 (总耗时, 单次延迟列表)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(sql, params)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - started, latencies
+
+
+def _report(name, elapsed, latencies):
+    total = len(latencies)
+    print(f"[{name}] 请求数={total} 总耗时={elapsed:.3f}s 吞吐={total / elapsed:.1f} req/s "
+          f"p50={_percentile(latencies, 50) * 1000:.1f}ms "
+          f"p95={_percentile(latencies, 95) * 1000:.1f}ms "
+          f"p99={_percentile(latencies, 99) * 1000:.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="异步数据库访问层并发基准测试")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发请求数")
+    parser.add_argument("--requests", type=int, default=500, help="总请求数")
+    parser.add_argument("--sleep", type=float, default=0.02, help="每条语句在服务端的模拟耗时（秒）")
+    parser.add_argument("--sql", type=str, default=None, help="自定义查询语句（覆盖 --sleep）")
+    args = parser.parse_args()
+
+    sql = args.sql or "SELECT SLEEP(%s) AS s"
+    params = None if args.sql else (args.sleep,)
+
+    print(f"aiomysql 可用: {AIOMYSQL_AVAILABLE}（不可用时 fetch_all 退化为线程池执行）")
+    print(f"并发={args.concurrency} 总请求={args.requests} SQL={sql}")
+
+    # 预热连接池
+    await fetch_all("SELECT 1")
+    execute_query("SELECT 1")
+
+    elapsed, latencies = await _run(_blocking_handler, args.requests, args.concurrency, sql, params)
+    _report("阻塞 execute_query", elapsed, latencies)
+
+    elapsed, latencies = await _run(_async_handler, args.requests, args.concurrency, sql, params)
+    _report("异步 fetch_all", elapsed, latencies)
+
+    await close_async_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
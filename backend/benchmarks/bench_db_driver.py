@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MySQL 驱动行解码基准测试
+对比 pymysql 与 mysqlclient 读取 leads_task_list 典型分页（宽表 + JSON call_conversation）时的解码吞吐量
+
+用法（在 backend 目录下执行，需可连接的 MySQL，且 leads_task_list 中有数据）：
+    python benchmarks/bench_db_driver.py --page-size 500 --rounds 50
+    python benchmarks/bench_db_driver.py --task-id 123 --drivers pymysql mysqlclient
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from database.db import load_driver
+
+# 与 query_task_execution_core_service 分页查询相同的列
+PAGE_QUERY = """
+    SELECT id, leads_name, leads_phone, call_job_id, call_status, planed_time,
+           call_task_id, call_conversation, calling_number, recording_url,
+           is_interested, leads_follow_id
+    FROM leads_task_list
+    WHERE task_id = %s
+    ORDER BY id
+    LIMIT %s OFFSET %s
+"""
+
+
+def _connect(driver, cursorclass):
+    return driver.connect(
+        host=config.DB_HOST,
+        port=config.DB_PORT,
+        user=config.DB_USER,
+        password=config.DB_PASSWORD,
+        db=config.DB_NAME,
+        charset='utf8mb4',
+        cursorclass=cursorclass,
+    )
+
+
+def _pick_task_id(driver, dict_cursor):
+    """未指定任务时选择明细行数最多的任务"""
+    conn = _connect(driver, dict_cursor)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT task_id, COUNT(*) AS total FROM leads_task_list GROUP BY task_id ORDER BY total DESC LIMIT 1")
+            row = cursor.fetchone()
+            return (row['task_id'], row['total']) if row else (None, 0)
+    finally:
+        conn.close()
+
+
+def _bench(driver, cursorclass, task_id, total, page_size, rounds):
+    """循环读取分页，返回 (总行数, 总耗时)；只统计 execute + fetchall 的时间"""
+    conn = _connect(driver, cursorclass)
+    pages = max(1, (total + page_size - 1) // page_size)
+    rows_read = 0
+    elapsed = 0.0
+    try:
+        with conn.cursor() as cursor:
+            for round_index in range(rounds):
+                offset = (round_index % pages) * page_size
+                start = time.perf_counter()
+                cursor.execute(PAGE_QUERY, (task_id, page_size, offset))
+                rows = cursor.fetchall()
+                elapsed += time.perf_counter() - start
+                rows_read += len(rows)
+    finally:
+        conn.close()
+    return rows_read, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MySQL 驱动行解码基准测试")
+    parser.add_argument("--drivers", nargs="+", default=["pymysql", "mysqlclient"], help="要对比的驱动")
+    parser.add_argument("--task-id", type=int, default=None, help="读取的任务ID（默认取明细最多的任务）")
+    parser.add_argument("--page-size", type=int, default=500, help="每页行数")
+    parser.add_argument("--rounds", type=int, default=50, help="每个驱动读取的页数")
+    args = parser.parse_args()
+
+    for name in args.drivers:
+        driver_name, driver, dict_cursor, _, _ = load_driver(name)
+        if driver_name != name:
+            print(f"[{name}] 驱动不可用，跳过")
+            continue
+
+        task_id, total = (args.task_id, args.page_size * args.rounds) if args.task_id else _pick_task_id(driver, dict_cursor)
+        if task_id is None:
+            print("leads_task_list 中没有数据，无法测试")
+            return
+
+        # 预热：建立连接、填充服务端缓存
+        _bench(driver, dict_cursor, task_id, total, args.page_size, 1)
+
+        for cursor_name, cursorclass in (("DictCursor", dict_cursor), ("Cursor", driver.cursors.Cursor)):
+            rows_read, elapsed = _bench(driver, cursorclass, task_id, total, args.page_size, args.rounds)
+            print(f"[{driver_name} {cursor_name}] 任务={task_id} 行数={rows_read} 耗时={elapsed:.3f}s "
+                  f"吞吐={rows_read / elapsed if elapsed else 0:.0f} rows/s "
+                  f"单页={elapsed / args.rounds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
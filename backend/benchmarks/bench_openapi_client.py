@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外呼 OpenAPI 客户端单次调用开销基准测试
+对比每次调用新建客户端（原 Sample.create_client() 的做法）与进程内共享客户端（openAPI/outbound_client.py）：
+- 离线：只测量获取客户端 + 运行时参数的耗时，不发起网络请求
+- --live：实际调用 ListJobs，对比两种方式的端到端耗时（共享客户端可复用 HTTPS 连接）；
+  需要配置 ALIBABA_CLOUD_ACCESS_KEY_ID / SECRET、INSTANCE_ID，并通过 --job-id 指定一个已存在的 job_id
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_openapi_client.py --rounds 1000
+    python benchmarks/bench_openapi_client.py --live --job-id <job_id> --rounds 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openAPI import outbound_client
+from openAPI.list_jobs import Sample as ListJobsSample
+
+
+def fresh_client():
+    """原做法：每次调用都新建客户端"""
+    return outbound_client._create_client()
+
+
+def shared_client():
+    return outbound_client.get_outbound_client()
+
+
+def _measure(fn, rounds):
+    """返回每次耗时（毫秒）列表"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"[{label}] 平均 {statistics.mean(timings):.3f}ms，中位数 {statistics.median(timings):.3f}ms，p95 {p95:.3f}ms")
+    return statistics.mean(timings)
+
+
+def list_jobs_once(get_client, job_id):
+    from alibabacloud_openapi_util.client import Client as OpenApiUtilClient
+    from alibabacloud_tea_openapi import models as open_api_models
+
+    request = open_api_models.OpenApiRequest(
+        query=OpenApiUtilClient.query({"InstanceId": os.getenv("INSTANCE_ID"), "JobId.1": job_id})
+    )
+    get_client().call_api(ListJobsSample.create_api_info(), request, outbound_client.runtime_options())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="外呼 OpenAPI 客户端单次调用开销基准测试")
+    parser.add_argument("--rounds", type=int, default=1000, help="每种方式重复次数（--live 时建议 20 左右）")
+    parser.add_argument("--live", action="store_true", help="实际调用 ListJobs（需要阿里云凭据）")
+    parser.add_argument("--job-id", default=None, help="--live 时查询的 job_id")
+    args = parser.parse_args()
+
+    if args.live:
+        if not args.job_id:
+            parser.error("--live 需要指定 --job-id")
+        # 预热：建立共享客户端的连接，避免首次握手计入
+        list_jobs_once(shared_client, args.job_id)
+        fresh = _report("每次新建客户端 + ListJobs", _measure(lambda: list_jobs_once(fresh_client, args.job_id), args.rounds))
+        shared = _report("共享客户端 + ListJobs", _measure(lambda: list_jobs_once(shared_client, args.job_id), args.rounds))
+    else:
+        shared_client()
+        fresh = _report("每次新建客户端", _measure(lambda: (fresh_client(), outbound_client.runtime_options()), args.rounds))
+        shared = _report("共享客户端", _measure(lambda: (shared_client(), outbound_client.runtime_options()), args.rounds))
+
+    print(f"单次调用节省 {fresh - shared:.3f}ms（{fresh / shared if shared else 0:.1f}x）")
+    print(f"客户端统计: {outbound_client.get_outbound_client_stats()}")
+
+
+if __name__ == "__main__":
+    main()
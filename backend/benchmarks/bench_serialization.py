@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大响应序列化基准测试
+以 /query-task-execution 的一页执行明细（默认 200 行，每行带完整通话记录）为样本，对比：
+- 默认路径：response_model 校验 + 转换为 JSON 兼容对象 + 标准库 json 编码（FastAPI 返回 dict 时的处理过程）
+- 快速路径：utils/fast_json.dumps 直接编码（安装 orjson 时为 C 实现）
+- call_conversation 列解码：json.loads 与 fast_json.loads
+- 响应体压缩：gzip 与 br（需安装 brotli）的压缩后大小与耗时
+
+不需要数据库，样本数据按 leads_task_list 的真实结构生成。
+
+用法（在 backend 目录下执行）：
+    python benchmarks/bench_serialization.py --rows 200 --turns 20 --rounds 50
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel, TypeAdapter
+
+from utils.fast_json import brotli, compress, dumps, loads, orjson
+
+_SENTENCES = [
+    "您好，这里是某某汽车4S店，请问您最近有看车的打算吗？",
+    "有的，我想了解一下新款SUV的价格。",
+    "好的，目前这款车型有限时优惠，到店试驾还可以领取礼品。",
+    "周末有空的话我过去看看。",
+    "那我帮您预约周六上午十点可以吗？",
+    "可以，谢谢。",
+]
+
+
+class TaskExecutionResponse(BaseModel):
+    """与 api/auto_call_api.py 中的 TaskExecutionResponse 相同"""
+    status: str
+    code: int
+    message: str
+    data: Dict[str, Any]
+
+
+def _conversation(turns, start):
+    return [
+        {
+            "Role": "robot" if i % 2 == 0 else "user",
+            "Script": random.choice(_SENTENCES),
+            "Timestamp": int((start + timedelta(seconds=i * 6)).timestamp() * 1000),
+            "Action": "Broadcast" if i % 2 == 0 else "Listen",
+        }
+        for i in range(turns)
+    ]
+
+
+def build_page(rows, turns):
+    """生成一页执行明细：返回 (响应 dict, 数据库中 call_conversation 列的原始字符串列表)"""
+    now = datetime.now()
+    raw_conversations = []
+    jobs_data = []
+    for i in range(rows):
+        start = now - timedelta(minutes=i)
+        conversation = _conversation(turns, start)
+        raw_conversations.append(json.dumps(conversation))
+        jobs_data.append({
+            "id": 100000 + i,
+            "JobId": f"job-{i:08d}",
+            "Status": "Succeeded" if i % 3 else "Failed",
+            "Tasks": [{
+                "TaskId": f"task-{i:08d}",
+                "PlanedTime": int(start.timestamp() * 1000),
+                "Conversation": conversation,
+                "CallingNumber": "057100000000",
+                "Duration": turns * 6000,
+            }],
+            "RecordingUrl": f"https://example.com/recording/{i}.wav",
+            "LeadsName": f"客户{i}",
+            "LeadsPhone": f"138{i:08d}",
+            "calling_number": "057100000000",
+            "is_interested": i % 3,
+            "follow_data": {
+                "id": 5000 + i,
+                "leads_id": 9000 + i,
+                "follow_time": start,
+                "leads_remark": "客户有意向，周末到店试驾",
+                "next_follow_time": start + timedelta(days=2),
+            },
+        })
+    payload = {
+        "status": "success",
+        "code": 200,
+        "message": "查询外呼任务执行情况成功",
+        "data": {
+            "task_id": 1,
+            "task_name": "基准测试任务",
+            "task_type": 2,
+            "total_jobs": rows,
+            "query_time": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "jobs_data": jobs_data,
+            "task_stats": {"total_calls": rows, "connected_calls": rows * 2 // 3, "not_connected_calls": rows // 3},
+            "pagination": {"page": 1, "page_size": rows, "total_pages": 1, "total_count": rows},
+        },
+    }
+    return payload, raw_conversations
+
+
+def _timeit(fn, rounds):
+    """返回 (最后一次的结果, 平均耗时毫秒)"""
+    fn()  # 预热
+    start = time.perf_counter()
+    result = None
+    for _ in range(rounds):
+        result = fn()
+    return result, (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大响应序列化基准测试")
+    parser.add_argument("--rows", type=int, default=200, help="每页明细行数")
+    parser.add_argument("--turns", type=int, default=20, help="每条通话记录的对话轮数")
+    parser.add_argument("--rounds", type=int, default=50, help="每种方式重复次数")
+    args = parser.parse_args()
+
+    random.seed(42)
+    payload, raw_conversations = build_page(args.rows, args.turns)
+    adapter = TypeAdapter(TaskExecutionResponse)
+
+    def default_path():
+        validated = adapter.validate_python(payload)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_path():
+        return dumps(payload)
+
+    print(f"样本：{args.rows} 行 × {args.turns} 轮对话，orjson={'已安装' if orjson else '未安装（标准库 json）'}，"
+          f"brotli={'已安装' if brotli else '未安装'}")
+
+    default_body, default_ms = _timeit(default_path, args.rounds)
+    fast_body, fast_ms = _timeit(fast_path, args.rounds)
+    print(f"[默认路径] 校验+转换+json 编码 {default_ms:.2f}ms，{len(default_body) / 1024:.1f}KB")
+    print(f"[快速路径] fast_json.dumps   {fast_ms:.2f}ms，{len(fast_body) / 1024:.1f}KB，"
+          f"加速 {default_ms / fast_ms if fast_ms else 0:.1f}x")
+
+    _, std_loads_ms = _timeit(lambda: [json.loads(raw) for raw in raw_conversations], args.rounds)
+    _, fast_loads_ms = _timeit(lambda: [loads(raw) for raw in raw_conversations], args.rounds)
+    print(f"[通话记录解码] json.loads {std_loads_ms:.2f}ms，fast_json.loads {fast_loads_ms:.2f}ms")
+
+    for encoding in (["gzip", "br"] if brotli else ["gzip"]):
+        compressed, compress_ms = _timeit(lambda: compress(fast_body, encoding), args.rounds)
+        print(f"[{encoding}] {len(fast_body) / 1024:.1f}KB -> {len(compressed) / 1024:.1f}KB "
+              f"({len(compressed) / len(fast_body) * 100:.1f}%)，压缩耗时 {compress_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Celery 应用配置
 """
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 import os
 from dotenv import load_dotenv
 
@@ -84,3 +85,33 @@ celery_app.conf.task_default_exchange = 'tasks'
 celery_app.conf.task_default_exchange_type = 'direct'
 celery_app.conf.task_default_routing_key = 'default'
 
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    prefork 子进程启动时重置进程级资源
+
+    父进程在 fork 前可能已经创建了数据库连接池或 Redis 客户端，子进程继续使用会与其他进程共享同一个 socket，
+    因此在这里丢弃继承来的连接，由子进程在首次使用时重新创建；开启预热时立即建立连接并加载 SDK 客户端模块
+    """
+    from config import config
+    from database.db import reset_pools, warm_up_pools
+    from api.auto_task_monitor import auto_task_monitor
+
+    reset_pools()
+    auto_task_monitor.reset_redis_client()
+
+    if not config.CELERY_WORKER_WARMUP:
+        return
+    try:
+        warm_up_pools()
+    except Exception as e:
+        print(f"⚠️  数据库连接池预热失败（将在首次使用时重试）: {str(e)}")
+    try:
+        # 预先导入外呼 SDK 封装并创建本进程共享的客户端，避免每个子进程的第一个任务承担导入与初始化开销
+        from openAPI import list_jobs, query_jobs_with_result, describe_job_group, download_recording  # noqa: F401
+        from openAPI.outbound_client import get_outbound_client
+        get_outbound_client()
+        print(f"✅ 外呼 SDK 模块与客户端预热完成 (PID: {os.getpid()})")
+    except Exception as e:
+        print(f"⚠️  外呼 SDK 模块预热失败: {str(e)}")
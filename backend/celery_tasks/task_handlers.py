@@ -11,7 +11,11 @@ from typing import Dict, Any
 from celery import Task
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from celery_app import celery_app
-from database.db import execute_query, execute_update
+from config import config
+from database.db import execute_query, execute_update, unit_of_work
+from database.call_task_cache import bump_task_org_version, get_call_task
+from database.org_version import LEADS, LEADS_TASK_LIST
+from utils.task_events import EVENT_FOLLOW_CREATED, publish_task_event
 from openAPI.ali_bailian_api import ali_bailian_api
 
 logger = logging.getLogger(__name__)
@@ -32,8 +36,7 @@ def sync_call_job_ids(self, task_id: int, job_group_id: str):
     同步 call_job_id 从 job_group
     """
     try:
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-        from query_jobs_with_result import Sample as QueryJobsWithResultSample
+        from openAPI.query_jobs_with_result import Sample as QueryJobsWithResultSample
         from api.auto_call_utils import safe_getattr
 
         # 先获取第一页，确定总页数
@@ -121,6 +124,8 @@ def sync_call_job_ids(self, task_id: int, job_group_id: str):
                     logger.warning(f"更新 call_job_id 失败: task_id={task_id}, phone={phone}, error={str(e)}")
 
         logger.info(f"同步 call_job_id 完成: task_id={task_id}, 更新了 {matched_count} 条记录")
+        if matched_count:
+            bump_task_org_version(task_id, LEADS_TASK_LIST)
         return {
             "status": "success", 
             "updated_count": matched_count
@@ -137,10 +142,7 @@ def download_recording(self, task_id: str, call_job_id: str):
     下载录音URL
     """
     try:
-        import sys
-        import os
-        sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'openAPI'))
-        from download_recording import Sample as DownloadRecordingSample
+        from openAPI.download_recording import Sample as DownloadRecordingSample
 
         new_url = DownloadRecordingSample.main([], task_id=task_id)
         if new_url:
@@ -204,20 +206,11 @@ def query_task_execution(self, task_id: int):
     查询任务执行状态并更新
     """
     try:
-        # 获取任务信息
-        task_info_rows = execute_query(
-            """
-            SELECT id, task_name, task_type, job_group_id
-            FROM call_tasks
-            WHERE id = %s
-            """,
-            (task_id,)
-        )
-        if not task_info_rows:
+        # 获取任务信息（读缓存）
+        task_info = get_call_task(task_id)
+        if not task_info:
             logger.warning(f"未找到 task_id={task_id} 的任务")
             return {"status": "failed", "message": "任务不存在"}
-        
-        task_info = task_info_rows[0]
 
         # 延用请求模型并触发核心查询
         from api.auto_call_api import QueryTaskExecutionRequest, _query_task_execution_core
@@ -357,8 +350,8 @@ def query_task_execution(self, task_id: int):
             auto_task_monitor.mark_task_completed(task_id)
             return {"status": "success", "message": "没有需要处理的记录", "total_jobs": 0}
         
-        # 分页处理所有数据
-        page_size = 200
+        # 分页处理所有数据：每页的 list_jobs 批次（每批 100 条）并发调用，页大小至少覆盖一轮并发
+        page_size = max(200, 100 * config.LIST_JOBS_CONCURRENCY)
         total_pages = (total_jobs + page_size - 1) // page_size
         logger.info(f"任务 {task_id} 共有 {total_jobs} 条记录，需要处理 {total_pages} 页")
         
@@ -570,6 +563,7 @@ def query_task_execution(self, task_id: int):
                 try:
                     execute_update(sync_update_query, (task_id,))
                     logger.info(f"已更新 {sync_interest_total} 条记录的 is_interested 为默认值 0")
+                    bump_task_org_version(task_id, LEADS_TASK_LIST)
                 except Exception as e:
                     logger.warning(f"更新 is_interested 失败: {str(e)}")
             
@@ -703,6 +697,7 @@ def query_task_execution(self, task_id: int):
                     try:
                         execute_update(sync_update_query2, (task_id,))
                         logger.info(f"已更新 {sync_interest_total2} 条记录的 is_interested 为默认值 0")
+                        bump_task_org_version(task_id, LEADS_TASK_LIST)
                     except Exception as e:
                         logger.warning(f"更新 is_interested 失败: {str(e)}")
                 
@@ -951,14 +946,6 @@ def create_leads_follow(self, call_job_id: str):
             """
             
             current_time = datetime.now()
-            follow_id = execute_update(insert_query, (
-                leads_id,
-                current_time,
-                leads_remark,
-                current_time,
-                current_time,
-                next_follow_time
-            ))
             
             # 更新 leads_task_list 表中的 leads_follow_id 和 is_interested（只更新 is_interested IS NULL 的记录）
             update_query = """
@@ -968,7 +955,19 @@ def create_leads_follow(self, call_job_id: str):
                   AND is_interested IS NULL
             """
             
-            affected_rows = execute_update(update_query, (follow_id, is_interested, call_job_id))
+            # 插入跟进记录与回写任务表在同一事务内完成；回写未命中时整体回滚，避免留下孤立的跟进记录
+            with unit_of_work() as tx:
+                follow_id = tx.execute(insert_query, (
+                    leads_id,
+                    current_time,
+                    leads_remark,
+                    current_time,
+                    current_time,
+                    next_follow_time
+                ))
+                affected_rows = tx.execute(update_query, (follow_id, is_interested, call_job_id))
+                if affected_rows == 0:
+                    tx.rollback()
             if affected_rows == 0:
                 logger.warning(f"更新失败：call_job_id={call_job_id} 的 is_interested 可能已被其他任务设置，跳过")
                 return {"status": "skipped", "message": "is_interested 已被其他任务设置"}
@@ -985,6 +984,10 @@ def create_leads_follow(self, call_job_id: str):
                 if task_id_result:
                     task_id = task_id_result[0].get('task_id')
                     if task_id:
+                        bump_task_org_version(task_id, LEADS, LEADS_TASK_LIST)
+                        publish_task_event(task_id, EVENT_FOLLOW_CREATED, {
+                            "call_job_id": call_job_id, "follow_id": follow_id, "is_interested": is_interested
+                        })
                         from api.auto_task_monitor import auto_task_monitor
                         status_result = auto_task_monitor.check_and_update_task_status(task_id)
                         logger.info(f"跟进记录创建后触发任务状态检查: task_id={task_id}, result={status_result}")
@@ -1086,14 +1089,6 @@ def create_leads_follow(self, call_job_id: str):
         """
         
         current_time = datetime.now()
-        follow_id = execute_update(insert_query, (
-            leads_id,
-            current_time,
-            leads_remark,
-            current_time,
-            current_time,
-            next_follow_time
-        ))
         
         # 4. 更新leads_task_list表中的leads_follow_id和is_interested（只更新 is_interested IS NULL 的记录）
         update_query = """
@@ -1103,7 +1098,19 @@ def create_leads_follow(self, call_job_id: str):
               AND is_interested IS NULL
         """
         
-        affected_rows = execute_update(update_query, (follow_id, is_interested, call_job_id))
+        # 插入跟进记录与回写任务表在同一事务内完成；回写未命中时整体回滚，避免留下孤立的跟进记录
+        with unit_of_work() as tx:
+            follow_id = tx.execute(insert_query, (
+                leads_id,
+                current_time,
+                leads_remark,
+                current_time,
+                current_time,
+                next_follow_time
+            ))
+            affected_rows = tx.execute(update_query, (follow_id, is_interested, call_job_id))
+            if affected_rows == 0:
+                tx.rollback()
         if affected_rows == 0:
             logger.warning(f"更新失败：call_job_id={call_job_id} 的 is_interested 可能已被其他任务设置，跳过")
             return {"status": "skipped", "message": "is_interested 已被其他任务设置"}
@@ -1120,6 +1127,10 @@ def create_leads_follow(self, call_job_id: str):
             if task_id_result:
                 task_id = task_id_result[0].get('task_id')
                 if task_id:
+                    bump_task_org_version(task_id, LEADS, LEADS_TASK_LIST)
+                    publish_task_event(task_id, EVENT_FOLLOW_CREATED, {
+                        "call_job_id": call_job_id, "follow_id": follow_id, "is_interested": is_interested
+                    })
                     from api.auto_task_monitor import auto_task_monitor
                     status_result = auto_task_monitor.check_and_update_task_status(task_id)
                     logger.info(f"跟进记录创建后触发任务状态检查: task_id={task_id}, result={status_result}")
@@ -1332,14 +1343,6 @@ def create_leads_follow_by_task_and_phone(self, task_id: int, leads_phone: str):
         """
         
         current_time = datetime.now()
-        follow_id = execute_update(insert_query, (
-            leads_id,
-            current_time,
-            leads_remark,
-            current_time,
-            current_time,
-            next_follow_time
-        ))
         
         # 更新 leads_task_list 表中的 leads_follow_id 和 is_interested（只更新 is_interested IS NULL 的记录）
         update_query = """
@@ -1351,12 +1354,28 @@ def create_leads_follow_by_task_and_phone(self, task_id: int, leads_phone: str):
               AND is_interested IS NULL
         """
         
-        affected_rows = execute_update(update_query, (follow_id, is_interested, task_id, leads_phone))
+        # 插入跟进记录与回写任务表在同一事务内完成；回写未命中时整体回滚，避免留下孤立的跟进记录
+        with unit_of_work() as tx:
+            follow_id = tx.execute(insert_query, (
+                leads_id,
+                current_time,
+                leads_remark,
+                current_time,
+                current_time,
+                next_follow_time
+            ))
+            affected_rows = tx.execute(update_query, (follow_id, is_interested, task_id, leads_phone))
+            if affected_rows == 0:
+                tx.rollback()
         if affected_rows == 0:
             logger.warning(f"更新失败：task_id={task_id}, leads_phone={leads_phone} 的 is_interested 可能已被其他任务设置，跳过")
             return {"status": "skipped", "message": "is_interested 已被其他任务设置"}
         
         logger.info(f"任务 task_id={task_id}, leads_phone={leads_phone} 的跟进记录创建成功")
+        bump_task_org_version(task_id, LEADS, LEADS_TASK_LIST)
+        publish_task_event(task_id, EVENT_FOLLOW_CREATED, {
+            "leads_phone": leads_phone, "follow_id": follow_id, "is_interested": is_interested
+        })
         
         # 创建跟进记录成功后，触发任务状态检查，确保及时更新 task_type
         try:
@@ -10,6 +10,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from celery_app import celery_app
 from api.auto_task_monitor import auto_task_monitor
+from database.call_task_cache import bump_task_org_version
+from database.org_version import LEADS_TASK_LIST
 from .task_handlers import (
     sync_call_job_ids,
     query_task_execution,
@@ -267,7 +269,7 @@ def monitor_pending_tasks(self):
                                         break
                             
                             # 再次检查队列长度（等待一小段时间让任务进入队列）
-                            # 注意：worker 使用 solo pool 且 concurrency=1，处理速度较慢，需要等待更长时间
+                            # 注意：worker 并发受 CELERY_WORKER_CONCURRENCY 限制，队列积压时需要等待更长时间
                             wait_time = min(2.0, total_triggered * 0.01)  # 等待时间：最多2秒，或根据任务数量计算（每个任务约0.01秒）
                             time.sleep(wait_time)
                             final_queue_length = redis_client.llen('follow_queue')
@@ -352,6 +354,7 @@ def monitor_pending_tasks(self):
                         try:
                             execute_update(sync_update_query, (task_id,))
                             logger.info(f"已更新 {sync_interest_total} 条记录的 is_interested 为默认值 0")
+                            bump_task_org_version(task_id, LEADS_TASK_LIST)
                         except Exception as e:
                             logger.warning(f"更新 is_interested 失败: {str(e)}")
                 
@@ -441,21 +444,15 @@ def process_task_after_creation(self, task_id: int):
     在 start_call_task 后调用，立即开始处理任务
     """
     try:
-        # 查询任务信息
-        from database.db import execute_query
+        # 查询任务信息（读缓存）
+        from database.call_task_cache import get_call_task
         
-        task_query = """
-            SELECT id, task_name, task_type, job_group_id
-            FROM call_tasks
-            WHERE id = %s
-        """
-        task_result = execute_query(task_query, (task_id,))
+        task = get_call_task(task_id)
         
-        if not task_result:
+        if not task:
             logger.warning(f"未找到任务: task_id={task_id}")
             return {"status": "failed", "message": "任务不存在"}
         
-        task = task_result[0]
         task_type = task['task_type']
         job_group_id = task.get('job_group_id')
         
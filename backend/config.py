@@ -13,15 +13,101 @@ class Config:
     DB_USER: str = os.getenv('DB_USER', 'root')
     DB_PASSWORD: str = os.getenv('DB_PASSWORD', '')
     DB_NAME: str = os.getenv('DB_NAME', 'dcc_employee_db')
+    # MySQL 驱动：pymysql（纯 Python，默认）或 mysqlclient（C 扩展，行解码更快；未安装时回退到 pymysql）
+    DB_DRIVER: str = os.getenv('DB_DRIVER', 'pymysql').lower()
+    # 只读副本配置（DB_REPLICA_HOST 为空时不启用，只读查询也走主库）
+    DB_REPLICA_HOST: str = os.getenv('DB_REPLICA_HOST', '')
+    DB_REPLICA_PORT: int = int(os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT', '3306')))
+    DB_REPLICA_USER: str = os.getenv('DB_REPLICA_USER', os.getenv('DB_USER', 'root'))
+    DB_REPLICA_PASSWORD: str = os.getenv('DB_REPLICA_PASSWORD', os.getenv('DB_PASSWORD', ''))
+    # 读己之写：同一会话写操作后的该时长（秒）内，只读查询仍走主库
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+    # 同步连接池配置（按进程角色区分，角色由 DB_POOL_ROLE 指定：api / celery / 队列名如 query_queue）
+    # 角色级覆盖使用 DB_POOL_<ROLE>_MAX_CONNECTIONS / _MIN_CACHED / _MAX_CACHED，例如 DB_POOL_QUERY_QUEUE_MAX_CONNECTIONS
+    DB_POOL_ROLE: str = os.getenv('DB_POOL_ROLE', 'api')
+    DB_POOL_MAX_CONNECTIONS: int = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '10'))
+    DB_POOL_MIN_CACHED: int = int(os.getenv('DB_POOL_MIN_CACHED', '2'))
+    DB_POOL_MAX_CACHED: int = int(os.getenv('DB_POOL_MAX_CACHED', '5'))
+    # 异步连接池（aiomysql）配置
+    DB_ASYNC_POOL_MINSIZE: int = int(os.getenv('DB_ASYNC_POOL_MINSIZE', '2'))
+    DB_ASYNC_POOL_MAXSIZE: int = int(os.getenv('DB_ASYNC_POOL_MAXSIZE', '10'))
+    # 启动时自动执行未应用的数据库迁移（database/migrations）
+    DB_AUTO_MIGRATE: bool = os.getenv('DB_AUTO_MIGRATE', 'True').lower() == 'true'
+    # 慢查询配置：超过阈值（毫秒）的语句写入慢查询日志；日志路径为空时只输出到默认日志
+    DB_SLOW_QUERY_MS: int = int(os.getenv('DB_SLOW_QUERY_MS', '500'))
+    DB_SLOW_QUERY_LOG: str = os.getenv('DB_SLOW_QUERY_LOG', '')
+    # 批量插入分块配置：单条 INSERT 语句的字节上限（需小于 MySQL max_allowed_packet）与行数上限
+    DB_BULK_INSERT_MAX_BYTES: int = int(os.getenv('DB_BULK_INSERT_MAX_BYTES', str(1024 * 1024)))
+    DB_BULK_INSERT_MAX_ROWS: int = int(os.getenv('DB_BULK_INSERT_MAX_ROWS', '2000'))
+    # 任务明细增量同步（/tasks/{id}/changes）：游标回退的安全窗口（秒，覆盖 updated_time 秒级精度与晚提交的事务）与单次返回行数默认值
+    TASK_CHANGES_SAFETY_LAG_SECONDS: int = int(os.getenv('TASK_CHANGES_SAFETY_LAG_SECONDS', '5'))
+    TASK_CHANGES_MAX_ROWS: int = int(os.getenv('TASK_CHANGES_MAX_ROWS', '500'))
+    
+    # 外呼执行查询（list_jobs）：单个进程内并发调用的批次数上限（每批 100 个 job_id），用于控制 OpenAPI 调用频率；
+    # 多进程部署时总并发为 进程数 × 该值，需保持在 OpenAPI 限流配额以内
+    LIST_JOBS_CONCURRENCY: int = int(os.getenv('LIST_JOBS_CONCURRENCY', '4'))
+    
+    # Celery Worker 配置：进程池类型（prefork / solo）、并发进程数（默认 CPU 核数）、子进程启动时是否预热数据库与 SDK 客户端
+    CELERY_WORKER_POOL: str = os.getenv('CELERY_WORKER_POOL', 'prefork')
+    CELERY_WORKER_CONCURRENCY: int = int(os.getenv('CELERY_WORKER_CONCURRENCY', str(os.cpu_count() or 1)))
+    CELERY_WORKER_WARMUP: bool = os.getenv('CELERY_WORKER_WARMUP', 'True').lower() == 'true'
+    
+    # Redis 配置（Celery broker、分布式锁与共享缓存）
+    REDIS_HOST: str = os.getenv('REDIS_HOST', 'localhost')
+    REDIS_PORT: int = int(os.getenv('REDIS_PORT', '6379'))
+    REDIS_DB: int = int(os.getenv('REDIS_DB', '0'))
+    REDIS_PASSWORD: str = os.getenv('REDIS_PASSWORD', '')
+    # call_tasks 行缓存：进程内 LRU 条目数与过期时间（秒，宜短，用于限制其他进程修改后的陈旧窗口），Redis 过期时间（秒）
+    CALL_TASK_CACHE_SIZE: int = int(os.getenv('CALL_TASK_CACHE_SIZE', '2000'))
+    CALL_TASK_CACHE_LOCAL_TTL: int = int(os.getenv('CALL_TASK_CACHE_LOCAL_TTL', '5'))
+    CALL_TASK_CACHE_REDIS_TTL: int = int(os.getenv('CALL_TASK_CACHE_REDIS_TTL', '300'))
+    # 组织级聚合缓存（/task-stats、/task_list 等）：条目数上限与过期时间（秒）；任务变化时通过组织版本号失效
+    ORG_AGGREGATE_CACHE_SIZE: int = int(os.getenv('ORG_AGGREGATE_CACHE_SIZE', '5000'))
+    ORG_AGGREGATE_CACHE_TTL: int = int(os.getenv('ORG_AGGREGATE_CACHE_TTL', '300'))
+    # 相同请求合并（single-flight）：是否启用 Redis 锁跨进程合并，锁过期时间、结果保留时间与跟随方最长等待时间（秒）
+    SINGLE_FLIGHT_REDIS_LOCK: bool = os.getenv('SINGLE_FLIGHT_REDIS_LOCK', 'False').lower() == 'true'
+    SINGLE_FLIGHT_LOCK_TTL: int = int(os.getenv('SINGLE_FLIGHT_LOCK_TTL', '30'))
+    SINGLE_FLIGHT_RESULT_TTL: int = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '5'))
+    SINGLE_FLIGHT_WAIT_TIMEOUT: int = int(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', '30'))
+    # 任务进度实时推送（Redis pub/sub + SSE）：是否启用，单个连接的事件队列长度、心跳间隔（秒）与客户端重连间隔（毫秒）
+    TASK_EVENTS_ENABLED: bool = os.getenv('TASK_EVENTS_ENABLED', 'True').lower() == 'true'
+    TASK_EVENTS_QUEUE_SIZE: int = int(os.getenv('TASK_EVENTS_QUEUE_SIZE', '100'))
+    TASK_EVENTS_HEARTBEAT_SECONDS: int = int(os.getenv('TASK_EVENTS_HEARTBEAT_SECONDS', '15'))
+    TASK_EVENTS_RETRY_MS: int = int(os.getenv('TASK_EVENTS_RETRY_MS', '3000'))
+    # 大响应快速序列化路径（/query-task-execution、/tasks）：是否启用（跳过 response_model 校验，安装 orjson 时使用其编码），
+    # 以及响应体压缩（br/gzip）的最小字节数
+    FAST_JSON_RESPONSE: bool = os.getenv('FAST_JSON_RESPONSE', 'False').lower() == 'true'
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024'))
     
     # JWT配置
     JWT_SECRET_KEY: str = os.getenv('JWT_SECRET_KEY', 'dcc-jwt-secret-key-2024')
     JWT_EXPIRE_HOURS: int = int(os.getenv('JWT_EXPIRE_HOURS', '24'))
+    # 用户身份（用户ID/组织ID/用户名）缓存：条目数上限与过期时间（秒）
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv('PRINCIPAL_CACHE_TTL', '300'))
     
     # 阿里云配置
     ALIBABA_CLOUD_ACCESS_KEY_ID: Optional[str] = os.getenv('ALIBABA_CLOUD_ACCESS_KEY_ID')
     ALIBABA_CLOUD_ACCESS_KEY_SECRET: Optional[str] = os.getenv('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
     INSTANCE_ID: Optional[str] = os.getenv('INSTANCE_ID')
+    # 外呼 OpenAPI 客户端（进程内共享，见 openAPI/outbound_client.py）：接入地址、连接/读取超时（毫秒）与保持的空闲连接数
+    OUTBOUND_API_ENDPOINT: str = os.getenv('OUTBOUND_API_ENDPOINT', 'outboundbot.cn-shanghai.aliyuncs.com')
+    OUTBOUND_API_CONNECT_TIMEOUT_MS: int = int(os.getenv('OUTBOUND_API_CONNECT_TIMEOUT_MS', '5000'))
+    OUTBOUND_API_READ_TIMEOUT_MS: int = int(os.getenv('OUTBOUND_API_READ_TIMEOUT_MS', '10000'))
+    OUTBOUND_API_MAX_IDLE_CONNS: int = int(os.getenv('OUTBOUND_API_MAX_IDLE_CONNS', '20'))
+    # 外呼异步网关（openAPI/outbound_gateway.py）批量接口在同一事件循环上同时在途的请求数上限
+    OUTBOUND_API_ASYNC_CONCURRENCY: int = int(os.getenv('OUTBOUND_API_ASYNC_CONCURRENCY', '8'))
+    # 外呼 OpenAPI 分布式限流（Redis 令牌桶，按 INSTANCE_ID + 接口名）：是否启用，默认每秒令牌数与突发容量，
+    # 按接口覆盖（如 ListJobs=20,AssignJobs=5:10），后台调用不可使用的预留容量比例，最长等待时间（秒），
+    # 收到阿里云限流错误后的全局冷却时间（秒）与单次调用的限流重试次数
+    OPENAPI_RATE_LIMIT_ENABLED: bool = os.getenv('OPENAPI_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    OPENAPI_RATE_LIMIT_QPS: float = float(os.getenv('OPENAPI_RATE_LIMIT_QPS', '10'))
+    OPENAPI_RATE_LIMIT_BURST: float = float(os.getenv('OPENAPI_RATE_LIMIT_BURST', '20'))
+    OPENAPI_RATE_LIMITS: str = os.getenv('OPENAPI_RATE_LIMITS', '')
+    OPENAPI_RATE_LIMIT_BACKGROUND_RESERVE: float = float(os.getenv('OPENAPI_RATE_LIMIT_BACKGROUND_RESERVE', '0.3'))
+    OPENAPI_RATE_LIMIT_MAX_WAIT_SECONDS: int = int(os.getenv('OPENAPI_RATE_LIMIT_MAX_WAIT_SECONDS', '30'))
+    OPENAPI_THROTTLE_COOLDOWN_SECONDS: float = float(os.getenv('OPENAPI_THROTTLE_COOLDOWN_SECONDS', '1'))
+    OPENAPI_THROTTLE_RETRIES: int = int(os.getenv('OPENAPI_THROTTLE_RETRIES', '2'))
     
     # 阿里百炼配置
     DASHSCOPE_API_KEY: Optional[str] = os.getenv('DASHSCOPE_API_KEY')
@@ -41,6 +127,18 @@ class Config:
         """获取数据库连接URL"""
         return f"mysql+pymysql://{cls.DB_USER}:{cls.DB_PASSWORD}@{cls.DB_HOST}:{cls.DB_PORT}/{cls.DB_NAME}"
     
+    @classmethod
+    def get_pool_settings(cls, role: Optional[str] = None) -> dict:
+        """获取指定进程角色的连接池配置（角色级环境变量优先，其次为全局默认值）"""
+        role = (role or os.getenv('DB_POOL_ROLE') or cls.DB_POOL_ROLE or 'api').strip().lower()
+        prefix = f"DB_POOL_{role.upper()}_"
+        return {
+            'role': role,
+            'maxconnections': int(os.getenv(prefix + 'MAX_CONNECTIONS', str(cls.DB_POOL_MAX_CONNECTIONS))),
+            'mincached': int(os.getenv(prefix + 'MIN_CACHED', str(cls.DB_POOL_MIN_CACHED))),
+            'maxcached': int(os.getenv(prefix + 'MAX_CACHED', str(cls.DB_POOL_MAX_CACHED))),
+        }
+
     @classmethod
     def get_database_config(cls) -> dict:
         """获取数据库配置字典"""
@@ -0,0 +1,123 @@
+"""
+call_tasks 行缓存与组织级聚合缓存
+
+行缓存（读穿透：进程内 LRU -> Redis -> 数据库）：
+- API 与 Celery 轮询中反复按 id 读取同一任务的元数据（task_type / job_group_id / script_id 等），这些字段很少变化
+- 所有修改 call_tasks 的代码路径在写入后调用 invalidate_call_task，清除本进程 LRU 与 Redis 中的缓存
+- 进程内 LRU 的过期时间较短（CALL_TASK_CACHE_LOCAL_TTL），用于限制其他进程修改后的陈旧窗口
+- 对状态敏感的判断（如开始外呼前的状态检查）应继续直接查询数据库
+
+组织级聚合缓存（/task-stats、/task_list 等按组织统计的结果）：
+- 键中带组织 call_tasks 版本号（见 database/org_version.py），任务创建或状态变化时递增版本号
+  （invalidate_call_task / bump_org_version），旧键自然失效
+- 聚合结果从只读副本读取：组织刚写入、副本可能尚未同步时不写缓存，避免写入前的数据以新版本号缓存 ORG_AGGREGATE_CACHE_TTL
+"""
+import hashlib
+import json
+
+from config import config
+from database.db import execute_query
+from database.org_version import CALL_TASKS, bump_org_version, get_org_version, in_replica_lag_window
+from utils.cache import TieredCache, register_cache
+
+CALL_TASK_COLUMNS = (
+    "id, task_name, organization_id, create_name_id, create_name, create_time, "
+    "leads_count, script_id, task_type, size_desc, job_group_id, updated_time"
+)
+
+_call_task_cache = TieredCache(
+    "call_task",
+    max_entries=config.CALL_TASK_CACHE_SIZE,
+    local_ttl=config.CALL_TASK_CACHE_LOCAL_TTL,
+    shared_ttl=config.CALL_TASK_CACHE_REDIS_TTL,
+)
+# 键中带版本号，进程内缓存可以与 Redis 使用相同的过期时间
+_org_aggregate_cache = TieredCache(
+    "org_aggregate",
+    max_entries=config.ORG_AGGREGATE_CACHE_SIZE,
+    local_ttl=config.ORG_AGGREGATE_CACHE_TTL,
+    shared_ttl=config.ORG_AGGREGATE_CACHE_TTL,
+)
+
+
+def register_call_task_caches():
+    """把 call_task / org_aggregate 缓存登记到统计表（构造时已登记，重复调用无副作用）"""
+    register_cache(_call_task_cache)
+    register_cache(_org_aggregate_cache)
+
+
+def get_call_task(task_id, organization_id=None):
+    """
+    按 id 获取 call_tasks 行（返回副本，不存在时返回 None）
+
+    传入 organization_id 时同时校验任务归属，不属于该组织的任务视为不存在
+    """
+    try:
+        task_id = int(task_id)
+    except (TypeError, ValueError):
+        return None
+
+    row = _call_task_cache.get(task_id)
+    if row is None:
+        result = execute_query(f"SELECT {CALL_TASK_COLUMNS} FROM call_tasks WHERE id = %s", (task_id,))
+        if not result:
+            return None
+        row = result[0]
+        _call_task_cache.set(task_id, row)
+
+    if organization_id is not None and str(row.get("organization_id")) != str(organization_id):
+        return None
+    return dict(row)
+
+
+def invalidate_call_task(task_id, organization_id=None):
+    """任务行被修改后调用：清除行缓存，并使所属组织的聚合缓存失效"""
+    try:
+        task_id = int(task_id)
+    except (TypeError, ValueError):
+        return
+    if organization_id is None:
+        row = _call_task_cache.get(task_id)
+        if row is None:
+            result = execute_query("SELECT organization_id FROM call_tasks WHERE id = %s", (task_id,))
+            row = result[0] if result else None
+        organization_id = row.get("organization_id") if row else None
+    _call_task_cache.delete(task_id)
+    if organization_id is not None:
+        bump_org_version(organization_id, CALL_TASKS)
+
+
+def bump_task_org_version(task_id, *scopes):
+    """任务相关数据（如 leads_task_list 明细、跟进记录）变化后调用：递增任务所属组织的对应版本号"""
+    task = get_call_task(task_id)
+    if task:
+        bump_org_version(task["organization_id"], *scopes)
+
+
+def org_aggregate_key(organization_id, name, params=None) -> str:
+    """
+    生成组织级聚合缓存键（name 区分接口，params 为影响结果的查询参数）
+
+    键中包含当前组织版本号：应在计算结果之前生成，计算期间版本号变化时结果写入旧键，不会被后续请求读到
+    """
+    version = get_org_version(organization_id, CALL_TASKS)
+    params_digest = hashlib.md5(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{organization_id}:{version}:{name}:{params_digest}"
+
+
+def _key_organization(key) -> str:
+    """从 org_aggregate_key 生成的键中取出组织ID（组织:版本号:接口:参数摘要）"""
+    return key.rsplit(":", 3)[0]
+
+
+def get_org_aggregate(key):
+    """读取组织级聚合缓存，未命中返回 None"""
+    return _org_aggregate_cache.get(key)
+
+
+def set_org_aggregate(key, value):
+    """写入组织级聚合缓存；组织处于副本同步窗口内时跳过（本次结果照常返回，窗口结束后的请求再缓存）"""
+    if in_replica_lag_window(_key_organization(key)):
+        return
+    _org_aggregate_cache.set(key, value)
+
@@ -1,8 +1,43 @@
-import pymysql
-from pymysql.cursors import DictCursor
+import asyncio
+import contextvars
+import os
+import threading
+import time
 from contextlib import contextmanager
 from dbutils.pooled_db import PooledDB
 from config import config
+from database.org_version import mark_org_written, org_recently_written
+from database.query_stats import record as record_statement
+
+def load_driver(name):
+    """
+    加载 MySQL 驱动，返回 (driver_name, module, DictCursor, SSCursor, SSDictCursor)
+
+    两个驱动都遵循 DB-API 2.0，连接参数与游标类一一对应，因此上层 execute_* 接口不变；
+    选择 mysqlclient 但未安装时回退到 pymysql
+    """
+    if name == 'mysqlclient':
+        try:
+            import MySQLdb
+            from MySQLdb.cursors import DictCursor, SSCursor, SSDictCursor
+            return 'mysqlclient', MySQLdb, DictCursor, SSCursor, SSDictCursor
+        except ImportError:
+            print("⚠️  未安装 mysqlclient，回退使用 pymysql 驱动")
+    elif name != 'pymysql':
+        print(f"⚠️  未知的数据库驱动 {name}，使用 pymysql 驱动")
+    import pymysql
+    from pymysql.cursors import DictCursor, SSCursor, SSDictCursor
+    return 'pymysql', pymysql, DictCursor, SSCursor, SSDictCursor
+
+DB_DRIVER, db_driver, DictCursor, SSCursor, SSDictCursor = load_driver(config.DB_DRIVER)
+
+# aiomysql 为可选依赖：未安装时异步接口退化为在线程池中执行同步接口
+try:
+    import aiomysql
+    AIOMYSQL_AVAILABLE = True
+except ImportError:
+    aiomysql = None
+    AIOMYSQL_AVAILABLE = False
 
 # 数据库配置
 DB_CONFIG = {
@@ -15,33 +50,287 @@ DB_CONFIG = {
     'cursorclass': DictCursor
 }
 
-# 创建连接池
-pool = PooledDB(
-    creator=pymysql,
-    maxconnections=10,  # 连接池最大连接数
-    mincached=2,        # 初始化连接数
-    maxcached=5,        # 最大空闲连接数
-    blocking=True,      # 连接池中如果没有可用连接，是否阻塞等待
-    **DB_CONFIG
-)
+# 只读副本配置（未配置 DB_REPLICA_HOST 时为 None）
+REPLICA_DB_CONFIG = dict(
+    DB_CONFIG,
+    host=config.DB_REPLICA_HOST,
+    port=config.DB_REPLICA_PORT,
+    user=config.DB_REPLICA_USER,
+    password=config.DB_REPLICA_PASSWORD,
+) if config.DB_REPLICA_HOST else None
+
+# 按进程角色读取连接池配置（API 与各 Celery 队列可分别设置）
+POOL_SETTINGS = config.get_pool_settings()
+
+def _create_pool(db_config, setsession=None):
+    """按当前进程角色的连接池配置创建连接池"""
+    return PooledDB(
+        creator=db_driver,
+        maxconnections=POOL_SETTINGS['maxconnections'],  # 连接池最大连接数
+        mincached=POOL_SETTINGS['mincached'],            # 初始化连接数
+        maxcached=POOL_SETTINGS['maxcached'],            # 最大空闲连接数
+        blocking=True,      # 连接池中如果没有可用连接，是否阻塞等待
+        setsession=setsession,
+        **db_config
+    )
+
+# 连接池按进程惰性创建：Celery prefork 子进程不会继承父进程已建立的连接（socket 被多进程共享会导致数据错乱）
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+def get_pool(replica=False):
+    """获取当前进程的连接池（主库或只读副本），首次使用或 fork 后在当前进程中创建"""
+    global _pools, _pools_pid
+    name = 'replica' if replica and REPLICA_DB_CONFIG else 'primary'
+    pid = os.getpid()
+    if _pools_pid == pid and name in _pools:
+        return _pools[name]
+    with _pools_lock:
+        if _pools_pid != pid:
+            # fork 后丢弃继承来的连接池，不调用 close，避免在共享的 socket 上向服务端发送断开请求
+            _pools = {}
+            _pools_pid = pid
+        if name not in _pools:
+            if name == 'replica':
+                # 副本会话设为只读，防止误写
+                _pools[name] = _create_pool(REPLICA_DB_CONFIG, setsession=['SET SESSION TRANSACTION READ ONLY'])
+            else:
+                _pools[name] = _create_pool(DB_CONFIG)
+        return _pools[name]
+
+
+class _PoolStats:
+    """连接池运行指标（线程安全）：借出等待、占用时长、使用中连接数与耗尽事件"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.exhaustion_events = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.errors = 0
+
+    def before_checkout(self, max_connections):
+        """借出前检查是否已耗尽（所有连接都在使用中，需要排队等待）"""
+        with self._lock:
+            if max_connections and self.in_use >= max_connections:
+                self.exhaustion_events += 1
+
+    def on_checkout(self, wait_seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_total += wait_seconds
+            self.wait_max = max(self.wait_max, wait_seconds)
+
+    def on_release(self, hold_seconds, failed=False):
+        with self._lock:
+            self.in_use -= 1
+            self.hold_total += hold_seconds
+            self.hold_max = max(self.hold_max, hold_seconds)
+            if failed:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "exhaustion_events": self.exhaustion_events,
+                "errors": self.errors,
+                "wait_seconds_total": round(self.wait_total, 6),
+                "wait_seconds_max": round(self.wait_max, 6),
+                "wait_seconds_avg": round(self.wait_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "hold_seconds_total": round(self.hold_total, 6),
+                "hold_seconds_max": round(self.hold_max, 6),
+                "hold_seconds_avg": round(self.hold_total / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+
+_pool_stats = _PoolStats()
+_replica_pool_stats = _PoolStats()
+
+def reset_pools():
+    """
+    丢弃当前进程持有的连接池与统计（Celery worker_process_init 中调用）
+
+    子进程中的第一次数据库访问会重新创建连接池
+    """
+    global _pools, _pools_pid, _pools_lock, _pool_stats, _replica_pool_stats
+    global _async_pools, _async_pool_loop, _async_pool_lock
+    _pools_lock = threading.Lock()
+    _pools = {}
+    _pools_pid = os.getpid()
+    _pool_stats = _PoolStats()
+    _replica_pool_stats = _PoolStats()
+    _async_pools = {}
+    _async_pool_loop = None
+    _async_pool_lock = None
+
+def warm_up_pools():
+    """预热当前进程的连接池：创建连接池（建立 mincached 个连接）并执行一次探活查询"""
+    started = time.perf_counter()
+    targets = [False, True] if REPLICA_DB_CONFIG else [False]
+    for replica in targets:
+        conn = get_pool(replica=replica).connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+        finally:
+            conn.close()
+    print(f"✅ 数据库连接池预热完成 (PID: {os.getpid()}, 耗时 {(time.perf_counter() - started) * 1000:.1f}ms)")
+
+# 读己之写：
+# - 当前会话（请求协程/线程上下文）最近一次写操作的时间
+# - 会话所属组织（身份解析时绑定）：写操作同时记录组织最近写入时间（Redis 共享，见 database/org_version.py），
+#   同一组织后续的请求、其他进程以及 asyncio.to_thread 中完成的写入都会让该组织的只读查询在窗口内改走主库
+_last_write_at = contextvars.ContextVar('db_last_write_at', default=None)
+_session_org = contextvars.ContextVar('db_session_org', default=None)
+
+def bind_organization(organization_id):
+    """将当前会话绑定到组织（由身份解析调用），读己之写按组织生效"""
+    _session_org.set(organization_id or None)
+
+def mark_write():
+    """标记当前会话刚执行过写操作，读写一致性窗口内的只读查询改走主库"""
+    _last_write_at.set(time.monotonic())
+    if REPLICA_DB_CONFIG:
+        mark_org_written(_session_org.get())
+
+async def _mark_write_async():
+    """mark_write 的异步版本：会话标记在当前上下文中设置，组织写入时间（Redis）在线程池中记录，避免阻塞事件循环"""
+    _last_write_at.set(time.monotonic())
+    if REPLICA_DB_CONFIG:
+        await asyncio.to_thread(mark_org_written, _session_org.get())
+
+def _use_replica(read_only):
+    """只读查询且配置了副本、且当前会话与所属组织都不在读己之写窗口内时走副本"""
+    if not read_only or not REPLICA_DB_CONFIG:
+        return False
+    last_write = _last_write_at.get()
+    if last_write is not None and time.monotonic() - last_write < config.DB_READ_YOUR_WRITES_SECONDS:
+        return False
+    return not org_recently_written(_session_org.get())
 
 @contextmanager
-def get_connection():
-    """获取数据库连接的上下文管理器"""
-    conn = pool.connection()
+def get_connection(read_only=False):
+    """获取数据库连接的上下文管理器（read_only=True 时优先使用只读副本）"""
+    if _use_replica(read_only):
+        target_pool, stats = get_pool(replica=True), _replica_pool_stats
+    else:
+        target_pool, stats = get_pool(), _pool_stats
+    stats.before_checkout(POOL_SETTINGS['maxconnections'])
+    wait_start = time.perf_counter()
+    conn = target_pool.connection()
+    checkout_at = time.perf_counter()
+    stats.on_checkout(checkout_at - wait_start)
+    failed = False
     try:
         yield conn
     except Exception as e:
+        failed = True
         conn.rollback()
         raise e
     finally:
         conn.close()
+        stats.on_release(time.perf_counter() - checkout_at, failed)
 
-def execute_query(query, params=None):
-    """执行查询语句并返回结果"""
-    with get_connection() as conn:
+def _timed_execute(cursor, query, params=None):
+    """执行单条语句并记录耗时（用于按指纹统计与慢查询日志）"""
+    start = time.perf_counter()
+    try:
+        return cursor.execute(query, params or ())
+    finally:
+        record_statement(query, time.perf_counter() - start, params)
+
+def _timed_executemany(cursor, query, params_list):
+    """批量执行语句并记录耗时"""
+    start = time.perf_counter()
+    try:
+        return cursor.executemany(query, params_list)
+    finally:
+        record_statement(query, time.perf_counter() - start, params_list, many=True)
+
+def get_pool_stats():
+    """获取当前进程连接池的运行指标"""
+    stats = _pool_stats.snapshot()
+    # PooledDB 未公开空闲连接数，读取其内部缓存长度（不可用时返回 None）
+    primary_pool = _pools.get('primary') if _pools_pid == os.getpid() else None
+    idle_cache = getattr(primary_pool, '_idle_cache', None)
+    stats.update({
+        "role": POOL_SETTINGS['role'],
+        "driver": DB_DRIVER,
+        "pid": os.getpid(),
+        "max_connections": POOL_SETTINGS['maxconnections'],
+        "min_cached": POOL_SETTINGS['mincached'],
+        "max_cached": POOL_SETTINGS['maxcached'],
+        "idle": len(idle_cache) if idle_cache is not None else None,
+        "async_pool": None,
+        "replica": None,
+    })
+    async_pool = _async_pools.get('primary')
+    if async_pool is not None:
+        stats["async_pool"] = {
+            "size": async_pool.size,
+            "free": async_pool.freesize,
+            "in_use": async_pool.size - async_pool.freesize,
+            "max_size": async_pool.maxsize,
+        }
+    replica_pool = _pools.get('replica') if _pools_pid == os.getpid() else None
+    if replica_pool is not None:
+        replica_idle_cache = getattr(replica_pool, '_idle_cache', None)
+        stats["replica"] = _replica_pool_stats.snapshot()
+        stats["replica"]["idle"] = len(replica_idle_cache) if replica_idle_cache is not None else None
+    return stats
+
+def render_pool_metrics():
+    """将连接池指标渲染为 Prometheus 文本格式，供抓取"""
+    stats = get_pool_stats()
+    labels = f'role="{stats["role"]}",pid="{stats["pid"]}",driver="{stats["driver"]}"'
+    metrics = [
+        ("db_pool_checkouts_total", "counter", "连接借出次数", stats["checkouts"]),
+        ("db_pool_in_use_connections", "gauge", "使用中的连接数", stats["in_use"]),
+        ("db_pool_idle_connections", "gauge", "空闲连接数", stats["idle"] if stats["idle"] is not None else 0),
+        ("db_pool_max_connections", "gauge", "连接池最大连接数", stats["max_connections"]),
+        ("db_pool_exhaustion_events_total", "counter", "连接池耗尽（需排队等待）次数", stats["exhaustion_events"]),
+        ("db_pool_errors_total", "counter", "持有连接期间发生异常的次数", stats["errors"]),
+        ("db_pool_checkout_wait_seconds_sum", "counter", "借出等待总时长", stats["wait_seconds_total"]),
+        ("db_pool_checkout_wait_seconds_max", "gauge", "借出等待最大时长", stats["wait_seconds_max"]),
+        ("db_pool_hold_seconds_sum", "counter", "连接占用总时长", stats["hold_seconds_total"]),
+        ("db_pool_hold_seconds_max", "gauge", "连接占用最大时长", stats["hold_seconds_max"]),
+    ]
+    if stats["async_pool"]:
+        metrics.extend([
+            ("db_async_pool_size", "gauge", "异步连接池当前连接数", stats["async_pool"]["size"]),
+            ("db_async_pool_in_use_connections", "gauge", "异步连接池使用中的连接数", stats["async_pool"]["in_use"]),
+        ])
+    if stats["replica"]:
+        metrics.extend([
+            ("db_replica_pool_checkouts_total", "counter", "只读副本连接借出次数", stats["replica"]["checkouts"]),
+            ("db_replica_pool_in_use_connections", "gauge", "只读副本使用中的连接数", stats["replica"]["in_use"]),
+            ("db_replica_pool_exhaustion_events_total", "counter", "只读副本连接池耗尽次数", stats["replica"]["exhaustion_events"]),
+            ("db_replica_pool_checkout_wait_seconds_sum", "counter", "只读副本借出等待总时长", stats["replica"]["wait_seconds_total"]),
+        ])
+    lines = []
+    for name, metric_type, help_text, value in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name}{{{labels}}} {value}")
+    return "\n".join(lines) + "\n"
+
+def execute_query(query, params=None, read_only=False):
+    """执行查询语句并返回结果（read_only=True 时可路由到只读副本）"""
+    with get_connection(read_only=read_only) as conn:
         with conn.cursor() as cursor:
-            cursor.execute(query, params or ())
+            _timed_execute(cursor, query, params)
             result = cursor.fetchall()
         conn.commit()
         return result
@@ -50,19 +339,338 @@ def execute_update(query, params=None):
     """执行更新、插入或删除操作"""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            affected_rows = cursor.execute(query, params or ())
+            affected_rows = _timed_execute(cursor, query, params)
             # 如果是INSERT操作，返回插入的ID
             if query.strip().upper().startswith('INSERT'):
                 last_id = cursor.lastrowid
                 conn.commit()
+                mark_write()
                 return last_id
         conn.commit()
+        mark_write()
         return affected_rows
 
 def execute_many(query, params_list):
     """批量执行SQL语句"""
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            affected_rows = cursor.executemany(query, params_list)
+            affected_rows = _timed_executemany(cursor, query, params_list)
         conn.commit()
+        mark_write()
         return affected_rows
+
+class Transaction:
+    """工作单元内的事务句柄：所有语句在同一连接上执行，由 unit_of_work 统一提交"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rolled_back = False
+
+    def rollback(self):
+        """主动回滚当前事务（之后 unit_of_work 不再提交）"""
+        self.conn.rollback()
+        self.rolled_back = True
+
+    def query(self, query, params=None):
+        """执行查询语句并返回结果（不提交）"""
+        with self.conn.cursor() as cursor:
+            _timed_execute(cursor, query, params)
+            return cursor.fetchall()
+
+    def execute(self, query, params=None):
+        """执行更新、插入或删除操作（不提交）；INSERT 返回插入ID，其余返回影响行数"""
+        with self.conn.cursor() as cursor:
+            affected_rows = _timed_execute(cursor, query, params)
+            if query.strip().upper().startswith('INSERT'):
+                return cursor.lastrowid
+            return affected_rows
+
+    def execute_many(self, query, params_list):
+        """批量执行SQL语句（不提交）"""
+        with self.conn.cursor() as cursor:
+            return _timed_executemany(cursor, query, params_list)
+
+    def bulk_insert(self, table, columns, rows, *, ignore=False, max_bytes=None, max_rows=None):
+        """
+        分块批量插入（不提交）：按语句字节数与行数把 rows 切成多条多行 INSERT 依次执行
+
+        - rows: 可迭代的行（元组/列表，按 columns 顺序），可以是生成器，不会一次性全部载入内存
+        - ignore: 为 True 时使用 INSERT IGNORE，跳过唯一键冲突的行
+        - max_bytes / max_rows: 单条语句上限，默认取 DB_BULK_INSERT_MAX_BYTES / DB_BULK_INSERT_MAX_ROWS
+
+        返回 {"rows", "chunks", "elapsed_ms", "chunk_timings": [{"rows", "bytes", "ms"}]}
+        """
+        max_bytes = max_bytes or config.DB_BULK_INSERT_MAX_BYTES
+        max_rows = max_rows or config.DB_BULK_INSERT_MAX_ROWS
+        column_sql = ", ".join(f"`{column}`" for column in columns)
+        prefix = f"INSERT {'IGNORE ' if ignore else ''}INTO `{table}` ({column_sql}) VALUES "
+        row_template = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        # 慢查询统计只用模板语句做指纹，避免把整块数据作为 SQL 文本缓存
+        stats_sql = prefix + row_template
+        prefix_bytes = len(prefix.encode('utf-8'))
+
+        result = {"rows": 0, "chunks": 0, "elapsed_ms": 0.0, "chunk_timings": []}
+
+        def flush(cursor, values, size):
+            start = time.perf_counter()
+            try:
+                cursor.execute(prefix + ",".join(values))
+            finally:
+                elapsed = time.perf_counter() - start
+                record_statement(stats_sql, elapsed, values, many=True)
+            elapsed_ms = round(elapsed * 1000, 3)
+            result["rows"] += len(values)
+            result["chunks"] += 1
+            result["elapsed_ms"] = round(result["elapsed_ms"] + elapsed_ms, 3)
+            result["chunk_timings"].append({"rows": len(values), "bytes": size, "ms": elapsed_ms})
+
+        with self.conn.cursor() as cursor:
+            values, size = [], prefix_bytes
+            for row in rows:
+                literal = cursor.mogrify(row_template, tuple(row))
+                literal_bytes = len(literal.encode('utf-8')) + 1
+                if values and (size + literal_bytes > max_bytes or len(values) >= max_rows):
+                    flush(cursor, values, size)
+                    values, size = [], prefix_bytes
+                values.append(literal)
+                size += literal_bytes
+            if values:
+                flush(cursor, values, size)
+        return result
+
+    def bulk_update(self, table, key_column, columns, rows, *, max_bytes=None, max_rows=None):
+        """
+        分块批量更新（不提交）：每块一条 UPDATE ... JOIN，按 key_column 把派生表（多行 SELECT ... UNION ALL）中的值写回 table
+
+        - rows: 可迭代的行，每行为 (key, *columns 的新值)；key 宜为整数主键（字符串键与派生表比较时受连接排序规则影响），同一 key 不应重复
+        - max_bytes / max_rows: 单条语句上限，默认取 DB_BULK_INSERT_MAX_BYTES / DB_BULK_INSERT_MAX_ROWS
+
+        每块更新后在同一事务内查询该块中存在的 key，得到逐行结果：不存在（已被删除）的 key 列入 missing。
+        返回 {"rows", "chunks", "affected", "missing", "elapsed_ms", "chunk_timings": [{"rows", "bytes", "ms"}]}；
+        affected 为 MySQL 报告的实际变化行数（值未变化的行不计入）
+        """
+        max_bytes = max_bytes or config.DB_BULK_INSERT_MAX_BYTES
+        max_rows = max_rows or config.DB_BULK_INSERT_MAX_ROWS
+        all_columns = (key_column, *columns)
+        first_template = "SELECT " + ", ".join(f"%s AS `{column}`" for column in all_columns)
+        row_template = "SELECT " + ", ".join(["%s"] * len(all_columns))
+        set_sql = ", ".join(f"t.`{column}` = v.`{column}`" for column in columns)
+        prefix = f"UPDATE `{table}` AS t JOIN ("
+        suffix = f") AS v ON t.`{key_column}` = v.`{key_column}` SET {set_sql}"
+        # 慢查询统计只用模板语句做指纹，避免把整块数据作为 SQL 文本缓存
+        stats_sql = prefix + first_template + suffix
+        base_bytes = len(prefix.encode('utf-8')) + len(suffix.encode('utf-8'))
+
+        result = {"rows": 0, "chunks": 0, "affected": 0, "missing": [], "elapsed_ms": 0.0, "chunk_timings": []}
+
+        def flush(cursor, values, keys, size):
+            start = time.perf_counter()
+            try:
+                affected = cursor.execute(prefix + " UNION ALL ".join(values) + suffix)
+                placeholders = ", ".join(["%s"] * len(keys))
+                cursor.execute(f"SELECT `{key_column}` FROM `{table}` WHERE `{key_column}` IN ({placeholders})", keys)
+                found = {row[key_column] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+            finally:
+                elapsed = time.perf_counter() - start
+                record_statement(stats_sql, elapsed, values, many=True)
+            elapsed_ms = round(elapsed * 1000, 3)
+            result["rows"] += len(values)
+            result["chunks"] += 1
+            result["affected"] += affected
+            result["missing"].extend(key for key in keys if key not in found)
+            result["elapsed_ms"] = round(result["elapsed_ms"] + elapsed_ms, 3)
+            result["chunk_timings"].append({"rows": len(values), "bytes": size, "ms": elapsed_ms})
+
+        with self.conn.cursor() as cursor:
+            values, keys, size = [], [], base_bytes
+            for row in rows:
+                row = tuple(row)
+                literal = cursor.mogrify(row_template if values else first_template, row)
+                literal_bytes = len(literal.encode('utf-8')) + len(" UNION ALL ")
+                if values and (size + literal_bytes > max_bytes or len(values) >= max_rows):
+                    flush(cursor, values, keys, size)
+                    values, keys, size = [], [], base_bytes
+                    # 新块的第一行需要带列别名
+                    literal = cursor.mogrify(first_template, row)
+                    literal_bytes = len(literal.encode('utf-8')) + len(" UNION ALL ")
+                values.append(literal)
+                keys.append(row[0])
+                size += literal_bytes
+            if values:
+                flush(cursor, values, keys, size)
+        return result
+
+@contextmanager
+def unit_of_work():
+    """
+    工作单元：复用同一个连接执行多条语句，正常结束时只提交一次，发生异常时整体回滚
+
+    用法:
+        with unit_of_work() as tx:
+            follow_id = tx.execute(insert_sql, params)
+            tx.execute(update_sql, (follow_id, ...))
+    """
+    with get_connection() as conn:
+        tx = Transaction(conn)
+        yield tx
+        if not tx.rolled_back:
+            conn.commit()
+            mark_write()
+
+def bulk_insert(table, columns, rows, *, ignore=False, max_bytes=None, max_rows=None):
+    """在单个事务内分块批量插入，全部成功后提交；参数与返回值见 Transaction.bulk_insert"""
+    with unit_of_work() as tx:
+        return tx.bulk_insert(table, columns, rows, ignore=ignore, max_bytes=max_bytes, max_rows=max_rows)
+
+def bulk_update(table, key_column, columns, rows, *, max_bytes=None, max_rows=None):
+    """在单个事务内按主键分块批量更新，全部成功后提交；参数与返回值见 Transaction.bulk_update"""
+    with unit_of_work() as tx:
+        return tx.bulk_update(table, key_column, columns, rows, max_bytes=max_bytes, max_rows=max_rows)
+
+def iter_query(query, params=None, batch_size=1000, as_tuple=False, read_only=False):
+    """
+    流式执行查询（服务端无缓冲游标），逐行产出结果，内存占用不随结果集大小增长
+
+    - batch_size: 每次从服务端读取的行数
+    - as_tuple: 为 True 时行以元组返回（按 SELECT 列顺序），省去构造字典的开销
+    - read_only: 为 True 时可路由到只读副本
+
+    注意：遍历期间独占一个连接，且该连接上不能再执行其他语句；应尽快消费完毕，
+    避免在遍历过程中穿插耗时的外部调用。
+    """
+    cursor_class = SSCursor if as_tuple else SSDictCursor
+    batch_size = max(1, int(batch_size or 1))
+    with get_connection(read_only=read_only) as conn:
+        cursor = conn.cursor(cursor_class)
+        try:
+            _timed_execute(cursor, query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            # 提前退出时 close 会读完剩余结果，保证连接可安全归还连接池
+            cursor.close()
+        conn.commit()
+
+
+# ==================== 异步接口（供 async def 路由使用，避免阻塞事件循环） ====================
+
+# 异步连接池与事件循环绑定，按需在当前事件循环中创建（primary / replica）
+_async_pools = {}
+_async_pool_loop = None
+_async_pool_lock = None
+
+async def get_async_pool(replica=False):
+    """获取（必要时创建）当前事件循环的异步连接池；未安装 aiomysql 时返回 None"""
+    global _async_pools, _async_pool_loop, _async_pool_lock
+    if not AIOMYSQL_AVAILABLE:
+        return None
+    name = 'replica' if replica and REPLICA_DB_CONFIG else 'primary'
+    loop = asyncio.get_running_loop()
+    if _async_pool_loop is not loop:
+        _async_pools = {}
+        _async_pool_lock = asyncio.Lock()
+        _async_pool_loop = loop
+    async_pool = _async_pools.get(name)
+    if async_pool is not None:
+        return async_pool
+    db_config = REPLICA_DB_CONFIG if name == 'replica' else DB_CONFIG
+    async with _async_pool_lock:
+        if name not in _async_pools:
+            _async_pools[name] = await aiomysql.create_pool(
+                host=db_config['host'],
+                port=db_config['port'],
+                user=db_config['user'],
+                password=db_config['password'],
+                db=db_config['db'],
+                charset='utf8mb4',
+                cursorclass=aiomysql.DictCursor,
+                minsize=config.DB_ASYNC_POOL_MINSIZE,
+                maxsize=config.DB_ASYNC_POOL_MAXSIZE,
+                autocommit=False,
+                init_command='SET SESSION TRANSACTION READ ONLY' if name == 'replica' else None,
+            )
+    return _async_pools[name]
+
+async def close_async_pool():
+    """关闭异步连接池（应用关闭时调用）"""
+    global _async_pools, _async_pool_loop, _async_pool_lock
+    for async_pool in _async_pools.values():
+        async_pool.close()
+        await async_pool.wait_closed()
+    _async_pools = {}
+    _async_pool_loop = None
+    _async_pool_lock = None
+
+async def fetch_all(query, params=None, read_only=False):
+    """异步执行查询语句并返回结果（read_only=True 时可路由到只读副本）"""
+    # 判断组织读己之写窗口需要访问 Redis，放到线程池执行，避免阻塞事件循环
+    replica = await asyncio.to_thread(_use_replica, read_only) if read_only and REPLICA_DB_CONFIG else False
+    async_pool = await get_async_pool(replica=replica)
+    if async_pool is None:
+        return await asyncio.to_thread(execute_query, query, params, read_only)
+    async with async_pool.acquire() as conn:
+        try:
+            async with conn.cursor() as cursor:
+                start = time.perf_counter()
+                try:
+                    await cursor.execute(query, params or ())
+                    result = await cursor.fetchall()
+                finally:
+                    record_statement(query, time.perf_counter() - start, params)
+            await conn.commit()
+            return result
+        except Exception:
+            await conn.rollback()
+            raise
+
+async def execute(query, params=None):
+    """异步执行更新、插入或删除操作（INSERT 返回插入ID，其余返回影响行数）"""
+    async_pool = await get_async_pool()
+    if async_pool is None:
+        result = await asyncio.to_thread(execute_update, query, params)
+        # 线程池中的 mark_write 只作用于上下文副本，在当前会话中补充标记
+        _last_write_at.set(time.monotonic())
+        return result
+    async with async_pool.acquire() as conn:
+        try:
+            async with conn.cursor() as cursor:
+                start = time.perf_counter()
+                try:
+                    affected_rows = await cursor.execute(query, params or ())
+                finally:
+                    record_statement(query, time.perf_counter() - start, params)
+                if query.strip().upper().startswith('INSERT'):
+                    affected_rows = cursor.lastrowid
+            await conn.commit()
+            await _mark_write_async()
+            return affected_rows
+        except Exception:
+            await conn.rollback()
+            raise
+
+async def execute_many_async(query, params_list):
+    """异步批量执行SQL语句"""
+    async_pool = await get_async_pool()
+    if async_pool is None:
+        result = await asyncio.to_thread(execute_many, query, params_list)
+        # 线程池中的 mark_write 只作用于上下文副本，在当前会话中补充标记
+        _last_write_at.set(time.monotonic())
+        return result
+    async with async_pool.acquire() as conn:
+        try:
+            async with conn.cursor() as cursor:
+                start = time.perf_counter()
+                try:
+                    affected_rows = await cursor.executemany(query, params_list)
+                finally:
+                    record_statement(query, time.perf_counter() - start, params_list, many=True)
+            await conn.commit()
+            await _mark_write_async()
+            return affected_rows
+        except Exception:
+            await conn.rollback()
+            raise
@@ -1,65 +1,14 @@
-import os
-import pymysql
-from dotenv import load_dotenv
+"""
+数据库初始化入口（兼容旧脚本）
 
-# 加载环境变量
-load_dotenv()
+表结构由版本化迁移统一管理，等价于: python database/migrate.py init
+"""
+import os
+import sys
 
-# 数据库配置
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': int(os.getenv('DB_PORT', 3306)),
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'charset': 'utf8mb4'
-}
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def init_database():
-    """初始化数据库和表结构"""
-    # 连接到MySQL服务器（不指定数据库）
-    conn = pymysql.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    
-    try:
-        # 创建数据库（如果不存在）
-        db_name = os.getenv('DB_NAME', 'dcc_employee')
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}` DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-        print(f"数据库 '{db_name}' 创建成功或已存在")
-        
-        # 选择数据库
-        cursor.execute(f"USE `{db_name}`")
-        
-        # 读取并执行create_tables.sql文件
-        create_tables_path = os.path.join(os.path.dirname(__file__), 'create_tables.sql')
-        with open(create_tables_path, 'r', encoding='utf-8') as sql_file:
-            # 拆分SQL语句
-            sql_commands = sql_file.read().split(';')
-            
-            # 执行每个SQL语句
-            for command in sql_commands:
-                if command.strip():
-                    cursor.execute(command)
-                    conn.commit()
-        
-        # 读取并执行call_tasks.sql文件
-        call_tasks_path = os.path.join(os.path.dirname(__file__), 'call_tasks.sql')
-        with open(call_tasks_path, 'r', encoding='utf-8') as sql_file:
-            # 拆分SQL语句
-            sql_commands = sql_file.read().split(';')
-            
-            # 执行每个SQL语句
-            for command in sql_commands:
-                if command.strip():
-                    cursor.execute(command)
-                    conn.commit()
-        
-        print("表结构初始化成功")
-    
-    except Exception as e:
-        print(f"初始化过程中出错: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+from database.migrate import init_database
 
 if __name__ == "__main__":
-    init_database() 
\ No newline at end of file
+    init_database()
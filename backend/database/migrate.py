@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+版本化数据库迁移工具
+
+- 迁移文件位于 database/migrations/，命名为 V<四位版本号>__<说明>.py，模块内提供 upgrade(cursor)
+- 已执行的版本记录在 schema_migrations 表中，重复执行只会应用尚未执行的版本
+- 通过 MySQL 命名锁（GET_LOCK）保证多进程同时启动时只有一个进程执行迁移
+- 迁移内的 DDL 应当幂等（使用 ensure_* 辅助函数），索引以 ALGORITHM=INPLACE, LOCK=NONE 在线创建
+
+用法（在 backend 目录下执行）:
+    python database/migrate.py            # 执行全部未应用的迁移
+    python database/migrate.py status     # 查看迁移状态
+    python database/migrate.py init       # 空库初始化：创建数据库与基础表，然后执行迁移
+"""
+
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE_RE = re.compile(r"^V(\d{4})__(\w+)\.py$")
+MIGRATION_LOCK_NAME = "dcc_schema_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+# 空库初始化时按顺序执行的基础表结构文件
+BASE_SCHEMA_FILES = (
+    "01_create_tables.sql",
+    "02_call_tasks.sql",
+    "03_auto_call_tables.sql",
+    "04_dcc_leads.sql",
+)
+
+
+def get_migration_connection(with_database: bool = True):
+    """创建迁移专用连接（自动提交，DDL 本身也会隐式提交）"""
+    params = {
+        "host": config.DB_HOST,
+        "port": config.DB_PORT,
+        "user": config.DB_USER,
+        "password": config.DB_PASSWORD,
+        "charset": "utf8mb4",
+        "autocommit": True,
+    }
+    if with_database:
+        params["db"] = config.DB_NAME
+    return pymysql.connect(**params)
+
+
+# ==================== 幂等 DDL 辅助函数（供迁移文件使用） ====================
+
+def table_exists(cursor, table: str) -> bool:
+    """判断当前库中表是否存在"""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone() is not None
+
+
+def column_exists(cursor, table: str, column: str) -> bool:
+    """判断表中字段是否存在"""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone() is not None
+
+
+def index_exists(cursor, table: str, index_name: str) -> bool:
+    """判断表中索引是否存在"""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index_name)
+    )
+    return cursor.fetchone() is not None
+
+
+def ensure_column(cursor, table: str, column: str, definition: str):
+    """字段不存在时在线添加"""
+    if not table_exists(cursor, table):
+        print(f"   ⏭️  表 {table} 不存在，跳过字段 {column}")
+        return
+    if column_exists(cursor, table, column):
+        print(f"   ✅ 字段 {table}.{column} 已存在")
+        return
+    cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}, ALGORITHM=INPLACE, LOCK=NONE")
+    print(f"   ➕ 已添加字段 {table}.{column}")
+
+
+def ensure_index(cursor, table: str, index_name: str, columns: str):
+    """索引不存在时在线创建（不阻塞读写）"""
+    if not table_exists(cursor, table):
+        print(f"   ⏭️  表 {table} 不存在，跳过索引 {index_name}")
+        return
+    if index_exists(cursor, table, index_name):
+        print(f"   ✅ 索引 {table}.{index_name} 已存在")
+        return
+    started = time.perf_counter()
+    cursor.execute(f"ALTER TABLE `{table}` ADD INDEX `{index_name}` ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+    print(f"   ➕ 已创建索引 {table}.{index_name} ({columns})，耗时 {time.perf_counter() - started:.2f}s")
+
+
+# ==================== 迁移执行 ====================
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) NOT NULL PRIMARY KEY COMMENT '迁移版本号',
+            description VARCHAR(200) NOT NULL COMMENT '迁移说明',
+            checksum VARCHAR(64) NOT NULL COMMENT '迁移文件校验和',
+            execution_ms INT NOT NULL DEFAULT 0 COMMENT '执行耗时（毫秒）',
+            applied_at DATETIME NOT NULL COMMENT '执行时间'
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据库迁移记录表'
+    """)
+
+
+def discover_migrations():
+    """扫描迁移目录，返回按版本号排序的 [(version, description, path)]"""
+    migrations = []
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return migrations
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def _file_checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_module(version: str, path: str):
+    spec = importlib.util.spec_from_file_location(f"dcc_migration_{version}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "upgrade"):
+        raise RuntimeError(f"迁移文件缺少 upgrade(cursor) 函数: {path}")
+    return module
+
+
+def get_applied_versions(cursor):
+    """获取已执行的迁移版本 {version: checksum}"""
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def run_migrations():
+    """执行所有尚未应用的迁移，返回本次应用的版本列表"""
+    applied_now = []
+    conn = get_migration_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("获取迁移锁超时，可能有其他进程正在执行迁移")
+            try:
+                applied = get_applied_versions(cursor)
+                for version, description, path in discover_migrations():
+                    checksum = _file_checksum(path)
+                    if version in applied:
+                        if applied[version] != checksum:
+                            print(f"⚠️  迁移 V{version} 在执行后被修改（校验和不一致），不会重新执行")
+                        continue
+                    print(f"🚀 执行迁移 V{version}__{description} ...")
+                    module = _load_module(version, path)
+                    started = time.perf_counter()
+                    module.upgrade(cursor)
+                    execution_ms = int((time.perf_counter() - started) * 1000)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, description, checksum, execution_ms, applied_at) "
+                        "VALUES (%s, %s, %s, %s, %s)",
+                        (version, getattr(module, "DESCRIPTION", description), checksum, execution_ms, datetime.now())
+                    )
+                    applied_now.append(version)
+                    print(f"✅ 迁移 V{version} 完成，耗时 {execution_ms}ms")
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+    finally:
+        conn.close()
+    if not applied_now:
+        print("✅ 数据库结构已是最新版本")
+    return applied_now
+
+
+def migration_status():
+    """打印每个迁移的执行状态"""
+    conn = get_migration_connection()
+    try:
+        with conn.cursor() as cursor:
+            applied = get_applied_versions(cursor)
+            for version, description, path in discover_migrations():
+                if version not in applied:
+                    state = "待执行"
+                elif applied[version] != _file_checksum(path):
+                    state = "已执行（文件已变更）"
+                else:
+                    state = "已执行"
+                print(f"V{version}__{description}: {state}")
+    finally:
+        conn.close()
+
+
+def _split_sql(sql_text: str):
+    """
+    按语句末尾的分号拆分 SQL 文件：跳过引号内（COMMENT '1:xx;2:yy' 等）与注释中的分号，
+    去掉 -- / # / /* */ 注释，忽略空语句
+    """
+    statement = []
+    i, length = 0, len(sql_text)
+    while i < length:
+        ch = sql_text[i]
+        if ch in ("'", '"', "`"):
+            # 引号内原样保留，支持反斜杠转义与连续两个引号的转义写法
+            end = i + 1
+            while end < length:
+                if sql_text[end] == "\\" and ch != "`":
+                    end += 2
+                    continue
+                if sql_text[end] == ch:
+                    if end + 1 < length and sql_text[end + 1] == ch:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            statement.append(sql_text[i:end + 1])
+            i = end + 1
+        elif sql_text.startswith("--", i) or ch == "#":
+            end = sql_text.find("\n", i)
+            i = length if end == -1 else end
+        elif sql_text.startswith("/*", i):
+            end = sql_text.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif ch == ";":
+            text = "".join(statement).strip()
+            if text:
+                yield "\n".join(line for line in text.splitlines() if line.strip())
+            statement = []
+            i += 1
+        else:
+            statement.append(ch)
+            i += 1
+    text = "".join(statement).strip()
+    if text:
+        yield "\n".join(line for line in text.splitlines() if line.strip())
+
+
+def init_database():
+    """空库初始化：创建数据库、按顺序创建基础表（已存在的表跳过），然后执行迁移"""
+    conn = get_migration_connection(with_database=False)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"CREATE DATABASE IF NOT EXISTS `{config.DB_NAME}` DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            )
+            cursor.execute(f"USE `{config.DB_NAME}`")
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            for filename in BASE_SCHEMA_FILES:
+                with open(os.path.join(base_dir, filename), "r", encoding="utf-8") as f:
+                    sql_text = f.read()
+                for statement in _split_sql(sql_text):
+                    match = re.search(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?", statement, re.I)
+                    if match and table_exists(cursor, match.group(1)):
+                        continue
+                    cursor.execute(statement)
+                print(f"✅ 基础表结构 {filename} 已就绪")
+    finally:
+        conn.close()
+    return run_migrations()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "up"
+    if command == "up":
+        run_migrations()
+    elif command == "status":
+        migration_status()
+    elif command == "init":
+        init_database()
+    else:
+        print(f"未知命令: {command}（可用: up / status / init）")
+        sys.exit(1)
@@ -0,0 +1,27 @@
+"""
+热点查询索引包
+
+leads_task_list 原先只有主键，轮询/回写/统计均按 task_id、call_job_id、reference_id 等条件过滤，
+每次都是全表扫描。此迁移在线（INPLACE, LOCK=NONE）补齐索引，可重复执行。
+"""
+from database.migrate import ensure_column, ensure_index
+
+DESCRIPTION = "热点查询索引包（leads_task_list / call_tasks / dcc_leads_follow）"
+
+
+def upgrade(cursor):
+    # 代码写入 reference_id，但早期建表脚本没有该字段，先确保字段存在
+    ensure_column(cursor, "leads_task_list", "reference_id", "VARCHAR(100) DEFAULT NULL COMMENT '外呼联系人引用ID'")
+
+    # leads_task_list：按任务的状态/意向统计、reference_id/手机号回写、按外呼ID查询
+    ensure_index(cursor, "leads_task_list", "idx_task_status", "`task_id`, `call_status`")
+    ensure_index(cursor, "leads_task_list", "idx_task_reference", "`task_id`, `reference_id`")
+    ensure_index(cursor, "leads_task_list", "idx_task_phone", "`task_id`, `leads_phone`")
+    ensure_index(cursor, "leads_task_list", "idx_task_interested", "`task_id`, `is_interested`")
+    ensure_index(cursor, "leads_task_list", "idx_call_job_id", "`call_job_id`")
+    ensure_index(cursor, "leads_task_list", "idx_call_task_id", "`call_task_id`")
+    ensure_index(cursor, "leads_task_list", "idx_leads_follow_id", "`leads_follow_id`")
+
+    # call_tasks：组织下按状态筛选并按创建时间排序的列表/统计，以及按任务组查询
+    ensure_index(cursor, "call_tasks", "idx_org_type_create_time", "`organization_id`, `task_type`, `create_time`")
+    ensure_index(cursor, "call_tasks", "idx_job_group_id", "`job_group_id`")
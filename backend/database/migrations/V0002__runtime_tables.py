@@ -0,0 +1,35 @@
+"""
+运行期建表迁移
+
+organizations 与 call_task_execution_runs 原先在请求处理过程中执行 CREATE TABLE IF NOT EXISTS，
+改为由迁移统一创建，请求路径不再执行 DDL。
+"""
+
+DESCRIPTION = "创建运行期依赖的 organizations / call_task_execution_runs 表"
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS organizations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL UNIQUE COMMENT '公司名称',
+            organization_id VARCHAR(20) NOT NULL UNIQUE COMMENT '组织ID',
+            organization_type INT NOT NULL COMMENT '组织类型，1:已认证；2:未认证',
+            create_time DATETIME NOT NULL COMMENT '创建时间',
+            end_time DATETIME NOT NULL COMMENT '到期时间'
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='组织表'
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS call_task_execution_runs (
+            id SERIAL PRIMARY KEY,
+            task_id INT NOT NULL,
+            params JSON NULL,
+            status VARCHAR(32) NOT NULL,
+            total_jobs INT DEFAULT 0,
+            processed_jobs INT DEFAULT 0,
+            error TEXT NULL,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            INDEX idx_task_id (task_id)
+        )
+    """)
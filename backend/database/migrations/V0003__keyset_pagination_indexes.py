@@ -0,0 +1,16 @@
+"""
+键集分页索引
+
+- call_tasks 按组织列出任务时按 (create_time, id) 倒序翻页；idx_org_type_create_time 的第二列是 task_type，
+  不筛选状态时无法用于排序。(organization_id, create_time) 二级索引隐含主键 id，正好覆盖排序键
+- leads_task_list 按任务列出明细时按 id 翻页；(task_id) 二级索引隐含主键，等价于 (task_id, id)，
+  从游标位置直接范围扫描，不再对整个任务的明细排序
+"""
+from database.migrate import ensure_index
+
+DESCRIPTION = "键集分页索引（call_tasks / leads_task_list）"
+
+
+def upgrade(cursor):
+    ensure_index(cursor, "call_tasks", "idx_org_create_time", "`organization_id`, `create_time`")
+    ensure_index(cursor, "leads_task_list", "idx_task_id", "`task_id`")
@@ -0,0 +1,13 @@
+"""
+任务明细增量同步索引
+
+/tasks/{id}/changes 按 (updated_time, id) 读取某任务在游标之后变化的明细行。
+(task_id, updated_time) 二级索引隐含主键 id，增量查询只扫描变化的行，而不是整个任务的明细。
+"""
+from database.migrate import ensure_index
+
+DESCRIPTION = "任务明细增量同步索引（leads_task_list.task_id, updated_time）"
+
+
+def upgrade(cursor):
+    ensure_index(cursor, "leads_task_list", "idx_task_updated_time", "`task_id`, `updated_time`")
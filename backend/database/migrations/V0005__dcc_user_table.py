@@ -0,0 +1,25 @@
+"""
+DCC 账号表
+
+dcc_user 表与 users.dcc_user / dcc_user_org_id 字段原先由 update_dcc_user.sql 单独创建，
+基础表结构文件中没有，改为由迁移统一创建（已存在时跳过）。
+"""
+from database.migrate import ensure_column
+
+DESCRIPTION = "创建 dcc_user 表并补齐 users 的 DCC 账号字段"
+
+
+def upgrade(cursor):
+    ensure_column(cursor, "users", "dcc_user", "VARCHAR(100) DEFAULT NULL COMMENT 'DCC账号'")
+    ensure_column(cursor, "users", "dcc_user_org_id", "VARCHAR(100) DEFAULT NULL COMMENT 'DCC组织ID'")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dcc_user (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_name VARCHAR(50) NOT NULL COMMENT '用户名称',
+            user_password VARCHAR(50) NOT NULL COMMENT '用户密码',
+            user_org_id VARCHAR(50) NOT NULL COMMENT '用户组织ID',
+            user_status INT NOT NULL COMMENT '用户状态:1:启用；0:禁用',
+            INDEX idx_user_name (user_name),
+            INDEX idx_user_org_id (user_org_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='DCC用户表'
+    """)
@@ -0,0 +1,179 @@
+"""
+组织数据版本号
+
+每个组织按数据范围（scope）维护一个版本号，对应表的数据变化时递增：
+- call_tasks: 任务创建、任务状态/脚本等字段变化
+- leads_task_list: 任务明细（外呼状态、通话记录、意向等）变化
+- auto_call_scene: 场景创建/修改
+- dcc_leads: 线索导入、跟进记录（dcc_leads_follow）变化
+
+用途：
+- 组织级聚合缓存的键中带版本号，版本变化后旧键自然失效（get_org_version，Redis 不可用时退化为进程内版本号）
+- 由版本号生成 ETag，轮询客户端带 If-None-Match 时直接返回 304（org_etag）。
+  进程内版本号无法反映其他进程的修改，因此 Redis 不可用时不生成 ETag，组织刚写入、副本可能尚未同步时也不生成
+
+版本号保存在 Redis 中（cache:org_version:<scope>:<org>），首次使用时以毫秒时间戳初始化，
+Redis 数据被清空后也不会与清空前的版本号重复。
+
+递增版本号时同时记录组织的最近写入时间（cache:org_written:<org>，保留 DB_READ_YOUR_WRITES_SECONDS 秒），
+该窗口内组织的只读查询改走主库（见 database/db.py 读己之写），不会读到副本上写入前的数据。
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from config import config
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
+
+CALL_TASKS = "call_tasks"
+LEADS_TASK_LIST = "leads_task_list"
+SCENES = "auto_call_scene"
+LEADS = "dcc_leads"
+
+_VERSION_KEY_PREFIX = "cache:org_version:"
+_WRITTEN_KEY_PREFIX = "cache:org_written:"
+
+_local_versions_lock = threading.Lock()
+_local_versions = {}  # Redis 不可用时使用的进程内版本号 (scope, org) -> version
+_local_written = {}  # org -> 本进程记录的读己之写窗口截止时间（monotonic）
+
+
+def _version_key(organization_id, scope):
+    return f"{_VERSION_KEY_PREFIX}{scope}:{organization_id}"
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def _get_shared_versions(client, organization_id, scopes):
+    keys = [_version_key(organization_id, scope) for scope in scopes]
+    values = client.mget(keys)
+    missing = [key for key, value in zip(keys, values) if value is None]
+    if missing:
+        pipe = client.pipeline()
+        for key in missing:
+            pipe.set(key, _initial_version(), nx=True)
+        pipe.execute()
+        values = client.mget(keys)
+    return [int(value or 0) for value in values]
+
+
+def get_org_versions(organization_id, scopes):
+    """读取组织多个数据范围的共享版本号；Redis 不可用时返回 None"""
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        return _get_shared_versions(client, organization_id, scopes)
+    except Exception as e:
+        logger.warning(f"读取组织版本号失败: {str(e)}")
+        mark_redis_failure()
+        return None
+
+
+def get_org_version(organization_id, scope=CALL_TASKS) -> int:
+    """读取组织数据版本号（用于缓存键，Redis 不可用时退化为进程内版本号）"""
+    versions = get_org_versions(organization_id, (scope,))
+    if versions is not None:
+        return versions[0]
+    with _local_versions_lock:
+        return _local_versions.get((scope, str(organization_id)), 0)
+
+
+def _written_window_ms():
+    return max(1, int(config.DB_READ_YOUR_WRITES_SECONDS * 1000))
+
+
+def _mark_local_written(organization_id):
+    with _local_versions_lock:
+        _local_written[str(organization_id)] = time.monotonic() + config.DB_READ_YOUR_WRITES_SECONDS
+
+
+def bump_org_version(organization_id, *scopes):
+    """递增组织数据版本号（默认 call_tasks），使相关聚合缓存与 ETag 失效，并记录组织最近写入时间"""
+    if organization_id is None or organization_id == "":
+        return
+    scopes = scopes or (CALL_TASKS,)
+    with _local_versions_lock:
+        for scope in scopes:
+            key = (scope, str(organization_id))
+            _local_versions[key] = _local_versions.get(key, 0) + 1
+    _mark_local_written(organization_id)
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline()
+        for scope in scopes:
+            key = _version_key(organization_id, scope)
+            pipe.set(key, _initial_version(), nx=True)
+            pipe.incr(key)
+        pipe.set(f"{_WRITTEN_KEY_PREFIX}{organization_id}", _initial_version(), px=_written_window_ms())
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"递增组织版本号失败: {str(e)}")
+        mark_redis_failure()
+
+
+def mark_org_written(organization_id):
+    """记录组织刚发生写入（跨进程共享）：DB_READ_YOUR_WRITES_SECONDS 内该组织的只读查询改走主库"""
+    if organization_id is None or organization_id == "":
+        return
+    _mark_local_written(organization_id)
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        client.set(f"{_WRITTEN_KEY_PREFIX}{organization_id}", _initial_version(), px=_written_window_ms())
+    except Exception as e:
+        logger.warning(f"记录组织写入时间失败: {str(e)}")
+        mark_redis_failure()
+
+
+def org_recently_written(organization_id) -> bool:
+    """组织是否处于读己之写窗口内（任一进程最近写入过）；Redis 不可用时只能判断本进程的写入"""
+    if organization_id is None or organization_id == "":
+        return False
+    with _local_versions_lock:
+        deadline = _local_written.get(str(organization_id))
+    if deadline is not None:
+        if deadline > time.monotonic():
+            return True
+        with _local_versions_lock:
+            if _local_written.get(str(organization_id)) == deadline:
+                del _local_written[str(organization_id)]
+    client = get_redis_client()
+    if client is None:
+        return False
+    try:
+        return bool(client.exists(f"{_WRITTEN_KEY_PREFIX}{organization_id}"))
+    except Exception as e:
+        logger.warning(f"读取组织写入时间失败: {str(e)}")
+        mark_redis_failure()
+        return False
+
+
+def in_replica_lag_window(organization_id) -> bool:
+    """配置了只读副本且组织刚写入过：副本可能尚未同步，此时读到的数据不应与新版本号关联（缓存或 ETag）"""
+    return bool(config.DB_REPLICA_HOST) and org_recently_written(organization_id)
+
+
+def org_etag(organization_id, name, scopes, params=None):
+    """
+    由组织版本号生成弱 ETag（name 区分接口，params 为影响结果的查询参数）；Redis 不可用时返回 None
+
+    应在查询数据之前生成：查询期间版本号变化时，客户端拿到的是旧版本 ETag，下次请求会重新获取。
+    组织刚写入、副本可能落后时也返回 None：避免客户端以新版本号的 ETag 缓存副本上写入前的数据，之后一直得到 304
+    """
+    if in_replica_lag_window(organization_id):
+        return None
+    versions = get_org_versions(organization_id, scopes)
+    if versions is None:
+        return None
+    payload = json.dumps([str(organization_id), name, versions, params or {}], sort_keys=True, default=str)
+    return f'W/"{hashlib.md5(payload.encode("utf-8")).hexdigest()}"'
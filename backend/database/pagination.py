@@ -0,0 +1,140 @@
+"""
+键集（keyset / seek）分页
+
+LIMIT/OFFSET 翻到深页时，数据库需要扫描并丢弃 OFFSET 之前的全部行，页越深越慢；
+键集分页记住上一页最后一行的排序键，下一页直接从该位置开始读取（WHERE (create_time, id) < (...)），
+每页的代价与页码无关。配合以排序键结尾的索引，每页只读取 page_size + 1 行。
+
+- 游标对客户端不透明：base64url 编码的 JSON（保留 datetime 类型），带作用域标识，不能跨接口混用
+- 排序键必须唯一（通常以主键 id 结尾），否则相同键值的行可能被跳过
+- 精确总数（COUNT(*)）需要扫描全部匹配行；需要总数时可使用 estimate_count（EXPLAIN 的估算行数）
+
+用法：
+    sql, params = build_keyset_query(
+        "SELECT id, task_name, create_time FROM call_tasks", "organization_id = %s", [org_id],
+        ("create_time", "id"), scope="task_list", cursor=cursor, descending=True, page_size=20
+    )
+    rows, next_cursor = finish_keyset_page(execute_query(sql, params), ("create_time", "id"),
+                                           scope="task_list", page_size=20)
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from database.db import execute_query, fetch_all
+from utils.cache import dumps, loads
+
+
+# 游标中允许出现的排序键类型（utils.cache.loads 还原 datetime/date/Decimal）
+_CURSOR_VALUE_TYPES = (str, int, float, datetime, date, Decimal)
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误、已被篡改或不属于当前接口"""
+
+
+def encode_cursor(scope, values) -> str:
+    """将排序键的值编码为不透明游标"""
+    raw = dumps({"s": scope, "v": list(values)}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(scope, cursor, size):
+    """解码游标，返回排序键的值列表；游标无效时抛出 InvalidCursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, TypeError, UnicodeError, binascii.Error, json.JSONDecodeError):
+        raise InvalidCursor("分页游标无效")
+    if not isinstance(payload, dict) or payload.get("s") != scope:
+        raise InvalidCursor("分页游标不属于当前接口")
+    values = payload.get("v")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("分页游标无效")
+    # 排序键只能是标量：篡改后的列表/对象会作为 SQL 参数传入，导致查询报错
+    if not all(value is None or isinstance(value, _CURSOR_VALUE_TYPES) for value in values):
+        raise InvalidCursor("分页游标无效")
+    return values
+
+
+def keyset_clause(columns, values, descending=False):
+    """
+    生成“位于游标之后”的条件：(a, b) > (x, y) 展开为 a > x OR (a = x AND b > y)
+
+    展开形式在各 MySQL 版本上都能使用以 (a, b) 结尾的索引做范围扫描
+    """
+    op = "<" if descending else ">"
+    parts = []
+    params = []
+    for i, column in enumerate(columns):
+        terms = [f"{prev} = %s" for prev in columns[:i]] + [f"{column} {op} %s"]
+        parts.append("(" + " AND ".join(terms) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(parts) + ")", params
+
+
+def build_keyset_query(select_sql, where, params, order_columns, *, scope, cursor=None,
+                       descending=False, page_size=20):
+    """
+    构建键集分页查询：select_sql 为不含 WHERE 的 SELECT ... FROM ...，where 为过滤条件（可为空）
+
+    多取一行用于判断是否还有下一页；返回 (sql, params)
+    """
+    conditions = [where] if where else []
+    all_params = list(params or [])
+    if cursor:
+        clause, clause_params = keyset_clause(order_columns, decode_cursor(scope, cursor, len(order_columns)), descending)
+        conditions.append(clause)
+        all_params.extend(clause_params)
+    direction = "DESC" if descending else "ASC"
+    sql = select_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in order_columns)
+    sql += " LIMIT %s"
+    all_params.append(max(1, int(page_size)) + 1)
+    return sql, all_params
+
+
+def finish_keyset_page(rows, order_keys, *, scope, page_size):
+    """截取本页的行并生成下一页游标（没有下一页时为 None），返回 (rows, next_cursor)"""
+    rows = list(rows or [])
+    page_size = max(1, int(page_size))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(scope, [last[key] for key in order_keys])
+
+
+def _explain_rows(result):
+    if not result:
+        return None
+    estimate = 1
+    for row in result:
+        estimate *= int(row.get("rows") or 0)
+    return estimate
+
+
+def estimate_count(from_where_sql, params=None, read_only=True):
+    """
+    估算匹配行数（EXPLAIN 的 rows，来自索引统计，不扫描数据）；from_where_sql 为 FROM ... WHERE ... 部分
+
+    估算值可能与实际相差较大，只适合作为“约 N 条”的提示；失败时返回 None
+    """
+    try:
+        return _explain_rows(execute_query(f"EXPLAIN SELECT 1 {from_where_sql}", params, read_only=read_only))
+    except Exception as e:
+        print(f"⚠️ 估算行数失败: {str(e)}")
+        return None
+
+
+async def estimate_count_async(from_where_sql, params=None, read_only=True):
+    """estimate_count 的异步版本（供 async def 路由使用）"""
+    try:
+        return _explain_rows(await fetch_all(f"EXPLAIN SELECT 1 {from_where_sql}", params, read_only=read_only))
+    except Exception as e:
+        print(f"⚠️ 估算行数失败: {str(e)}")
+        return None
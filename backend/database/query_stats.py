@@ -0,0 +1,180 @@
+"""
+SQL 语句耗时统计与慢查询日志
+
+- 将 SQL 归一化为指纹（字面量、占位符、IN 列表、多行 VALUES 折叠），按指纹聚合
+- 每个指纹维护次数、总耗时、最大耗时与对数分桶直方图，用于估算 p50/p95/p99
+- 超过阈值的语句写入慢查询日志，记录调用位置与参数个数
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+
+from config import config
+
+slow_query_logger = logging.getLogger("database.slow_query")
+
+# 慢查询日志单独落盘（未配置路径时只走默认日志配置）
+if config.DB_SLOW_QUERY_LOG and not slow_query_logger.handlers:
+    try:
+        log_dir = os.path.dirname(config.DB_SLOW_QUERY_LOG)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        _handler = logging.FileHandler(config.DB_SLOW_QUERY_LOG, encoding="utf-8")
+        _handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        slow_query_logger.addHandler(_handler)
+    except Exception as e:
+        print(f"⚠️  慢查询日志文件初始化失败: {str(e)}")
+
+# 直方图分桶上界（秒）：0.5ms ~ 60s，对数间隔
+_BUCKET_BOUNDS = (
+    0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0, 10.0, 30.0, 60.0, float("inf"),
+)
+
+# 指纹数量上限，超过后归入 <other>，防止动态拼接的 SQL 撑爆内存
+_MAX_FINGERPRINTS = 2000
+_OTHER_FINGERPRINT = "<other>"
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST_RE = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_RE = re.compile(r"\bvalues\s*\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*", re.I)
+_UNION_SELECT_RE = re.compile(r"(select\s+\?(?:\s+as\s+\w+)?(?:\s*,\s*\?(?:\s+as\s+\w+)?)*)(?:\s+union\s+all\s+select\s+\?(?:\s*,\s*\?)*)+", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """将 SQL 归一化为指纹：去注释，字面量/占位符替换为 ?，IN 列表与多行 VALUES 折叠"""
+    text = _STRING_RE.sub("?", sql or "")
+    text = _COMMENT_RE.sub(" ", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip().lower()
+    text = _IN_LIST_RE.sub("in (?+)", text)
+    text = _VALUES_RE.sub("values (?+)", text)
+    text = _UNION_SELECT_RE.sub(r"\1 union all ...", text)
+    return text
+
+
+class _StatementStats:
+    """单个指纹的聚合统计"""
+
+    __slots__ = ("count", "total", "max", "slow", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.buckets = [0] * len(_BUCKET_BOUNDS)
+
+    def add(self, elapsed: float, is_slow: bool):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        if is_slow:
+            self.slow += 1
+        for index, bound in enumerate(_BUCKET_BOUNDS):
+            if elapsed <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, pct: float) -> float:
+        """按分桶估算百分位（返回所在分桶上界，最后一个分桶用最大值代替）"""
+        if not self.count:
+            return 0.0
+        target = pct / 100.0 * self.count
+        running = 0
+        for index, bucket_count in enumerate(self.buckets):
+            running += bucket_count
+            if running >= target:
+                bound = _BUCKET_BOUNDS[index]
+                return min(bound, self.max) if bound != float("inf") else self.max
+        return self.max
+
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _call_site() -> str:
+    """定位发起 SQL 的业务代码位置（跳过数据库层与 contextlib 帧）"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not (filename.endswith(os.path.join("database", "db.py"))
+                or filename.endswith("query_stats.py")
+                or filename.endswith("contextlib.py")):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _params_count(params) -> int:
+    if params is None:
+        return 0
+    try:
+        return len(params)
+    except TypeError:
+        return 1
+
+
+def record(sql: str, elapsed: float, params=None, *, many: bool = False):
+    """记录一次语句执行耗时；超过阈值时写慢查询日志"""
+    fp = fingerprint(sql)
+    is_slow = elapsed * 1000 >= config.DB_SLOW_QUERY_MS
+    with _lock:
+        entry = _stats.get(fp)
+        if entry is None:
+            if len(_stats) >= _MAX_FINGERPRINTS:
+                fp = _OTHER_FINGERPRINT
+                entry = _stats.get(fp)
+            if entry is None:
+                entry = _stats[fp] = _StatementStats()
+        entry.add(elapsed, is_slow)
+    if is_slow:
+        slow_query_logger.warning(
+            f"慢查询 {elapsed * 1000:.1f}ms | 调用位置: {_call_site()} | "
+            f"{'批量行数' if many else '参数个数'}: {_params_count(params)} | SQL: {fp[:500]}"
+        )
+
+
+def get_top_statements(limit: int = 20, order_by: str = "total"):
+    """获取按总耗时/次数/p99/最大耗时排序的前 N 个语句指纹统计"""
+    with _lock:
+        rows = [
+            {
+                "fingerprint": fp,
+                "count": entry.count,
+                "slow_count": entry.slow,
+                "total_ms": round(entry.total * 1000, 3),
+                "avg_ms": round(entry.total / entry.count * 1000, 3) if entry.count else 0.0,
+                "p50_ms": round(entry.percentile(50) * 1000, 3),
+                "p95_ms": round(entry.percentile(95) * 1000, 3),
+                "p99_ms": round(entry.percentile(99) * 1000, 3),
+                "max_ms": round(entry.max * 1000, 3),
+            }
+            for fp, entry in _stats.items()
+        ]
+    sort_key = {
+        "total": "total_ms",
+        "count": "count",
+        "p99": "p99_ms",
+        "max": "max_ms",
+        "avg": "avg_ms",
+    }.get(order_by, "total_ms")
+    rows.sort(key=lambda row: row[sort_key], reverse=True)
+    return rows[:max(1, limit)]
+
+
+def reset_statement_stats():
+    """清空统计（用于压测前后对比）"""
+    with _lock:
+        _stats.clear()
@@ -9,7 +9,9 @@ import pandas as pd
 import sys
 import os
 from datetime import datetime
-from database.db import execute_update, execute_query
+from api.dcc_leads import _find_existing_leads_ids
+from database.db import bulk_insert, execute_query
+from database.org_version import LEADS, bump_org_version
 
 def import_leads_from_excel(excel_file_path, organization_id='ORG001'):
     """
@@ -56,37 +58,28 @@ def import_leads_from_excel(excel_file_path, organization_id='ORG001'):
         skipped_count = 0
         errors = []
         
+        # 整理行数据（文件内重复的 leads_id 只保留第一条）
+        candidates = []
+        seen_leads_ids = set()
         for idx, row in df.iterrows():
             try:
-                # 检查是否已存在相同的leads_id
-                existing = execute_query('SELECT id FROM dcc_leads WHERE leads_id = %s', (str(row['leads_id']),))
-                
-                if existing:
-                    print(f'跳过行 {idx + 1}: leads_id {row["leads_id"]} 已存在')
+                leads_id = str(row['leads_id']) if pd.notna(row['leads_id']) else ''
+                if leads_id in seen_leads_ids:
+                    print(f'跳过行 {idx + 1}: leads_id {leads_id} 在文件中重复')
                     skipped_count += 1
                     continue
+                seen_leads_ids.add(leads_id)
                 
                 # 准备插入数据（根据dcc_leads.sql文件结构）
-                insert_data = {
+                candidates.append((idx, {
                     'leads_user_name': str(row['leads_user_name']) if pd.notna(row['leads_user_name']) else '',
                     'leads_user_phone': str(row['leads_user_phone']) if pd.notna(row['leads_user_phone']) else '',
-                    'leads_id': str(row['leads_id']) if pd.notna(row['leads_id']) else '',
+                    'leads_id': leads_id,
                     'leads_product': str(row['leads_product']) if pd.notna(row['leads_product']) else '',
                     'leads_type': str(row['leads_type']) if pd.notna(row['leads_type']) else '',
                     'organization_id': str(row['organization_id']) if pd.notna(row['organization_id']) else organization_id,
                     'leads_create_time': row['leads_create_time'] if pd.notna(row['leads_create_time']) else datetime.now()
-                }
-                
-                # 插入数据（根据dcc_leads.sql文件结构）
-                insert_sql = '''
-                INSERT INTO dcc_leads 
-                (organization_id, leads_id, leads_user_name, leads_user_phone, leads_create_time, leads_product, leads_type)
-                VALUES (%(organization_id)s, %(leads_id)s, %(leads_user_name)s, %(leads_user_phone)s, %(leads_create_time)s, %(leads_product)s, %(leads_type)s)
-                '''
-                
-                result = execute_update(insert_sql, insert_data)
-                print(f'成功导入行 {idx + 1}: ID {result}, 姓名: {insert_data["leads_user_name"]}, 电话: {insert_data["leads_user_phone"]}')
-                success_count += 1
+                }))
                 
             except Exception as e:
                 error_msg = f'导入行 {idx + 1} 失败: {str(e)}'
@@ -94,6 +87,36 @@ def import_leads_from_excel(excel_file_path, organization_id='ORG001'):
                 errors.append(error_msg)
                 error_count += 1
         
+        # 按批次查询已存在的leads_id（与接口导入共用同一查询）
+        existing_leads_ids = _find_existing_leads_ids([data['leads_id'] for _, data in candidates])
+        
+        insert_rows = []
+        for idx, data in candidates:
+            if data['leads_id'] in existing_leads_ids:
+                print(f'跳过行 {idx + 1}: leads_id {data["leads_id"]} 已存在')
+                skipped_count += 1
+                continue
+            insert_rows.append(data)
+        
+        # 在一个事务内分块批量插入
+        if insert_rows:
+            columns = ('organization_id', 'leads_id', 'leads_user_name', 'leads_user_phone',
+                       'leads_create_time', 'leads_product', 'leads_type')
+            try:
+                insert_result = bulk_insert('dcc_leads', columns, [
+                    tuple(data[column] for column in columns) for data in insert_rows
+                ])
+                success_count = insert_result['rows']
+                for org_id in {data['organization_id'] for data in insert_rows}:
+                    bump_org_version(org_id, LEADS)
+                for chunk_index, chunk in enumerate(insert_result['chunk_timings'], 1):
+                    print(f'写入分块 {chunk_index}: {chunk["rows"]} 行, {chunk["bytes"]} 字节, 耗时 {chunk["ms"]}ms')
+            except Exception as e:
+                error_msg = f'批量写入失败，已整体回滚: {str(e)}'
+                print(error_msg)
+                errors.append(error_msg)
+                error_count += len(insert_rows)
+        
         # 返回导入结果
         result = {
             'success': True,
@@ -25,6 +25,7 @@ from api.scene import scene_router
 from api.dcc_user import dcc_user_router
 from api.dcc_leads import dcc_leads_router
 from api.auto_call_api import auto_call_router
+from api.dashboard import dashboard_router
 from api.auth_verify import auth_verify_router
 from api.config_check import router as config_check_router
 from swagger_config import tags_metadata
@@ -134,26 +135,33 @@ def start_celery_worker():
         logs_dir = backend_dir / "logs"
         logs_dir.mkdir(exist_ok=True)
         
-        # 构建启动命令
+        from config import config
+
+        # 构建启动命令（进程池类型与并发数见 config.CELERY_WORKER_POOL / CELERY_WORKER_CONCURRENCY）
         cmd = [
             sys.executable, "-m", "celery",
             "-A", "celery_app",
             "worker",
             "--loglevel=info",
-            "--pool=solo",
-            "--concurrency=1",
+            f"--pool={config.CELERY_WORKER_POOL}",
+            f"--concurrency={config.CELERY_WORKER_CONCURRENCY}",
             f"--logfile={logs_dir / 'celery_worker.log'}",
             f"--pidfile={logs_dir / 'celery_worker.pid'}",
             "--queues=default,sync_queue,download_queue,ai_queue,query_queue,follow_queue,monitor_queue",
             "--detach"
         ]
         
+        # Worker 进程使用 celery 角色的连接池配置（可通过 DB_POOL_ROLE 覆盖）
+        worker_env = os.environ.copy()
+        worker_env.setdefault("DB_POOL_ROLE", "celery")
+
         # 切换到 backend 目录执行
         result = subprocess.run(
             cmd,
             cwd=str(backend_dir),
             capture_output=True,
-            text=True
+            text=True,
+            env=worker_env
         )
         
         if result.returncode == 0:
@@ -238,6 +246,16 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动事件
     print("🚀 DCC数字员工服务启动中...")
+
+    # 执行数据库迁移（多进程同时启动时由迁移锁保证只执行一次）
+    try:
+        from config import config
+        if config.DB_AUTO_MIGRATE:
+            from database.migrate import run_migrations
+            await asyncio.to_thread(run_migrations)
+    except Exception as e:
+        print(f"⚠️  数据库迁移失败: {str(e)}")
+        print("💡 提示：可手动执行 python database/migrate.py 查看详细错误")
     
     # 自动启动任务监控
     try:
@@ -490,6 +508,20 @@ async def lifespan(app: FastAPI):
     
     # 关闭事件
     print("🛑 DCC数字员工服务正在关闭...")
+
+    # 停止任务事件订阅（SSE）
+    try:
+        from utils.task_events import task_event_hub
+        await task_event_hub.close()
+    except Exception as e:
+        print(f"⚠️  停止任务事件订阅时出错: {str(e)}")
+
+    # 关闭异步数据库连接池
+    try:
+        from database.db import close_async_pool
+        await close_async_pool()
+    except Exception as e:
+        print(f"⚠️  关闭异步数据库连接池时出错: {str(e)}")
     
     # 清理自动启动的 Celery 进程（可选）
     # 注意：由于使用了 --detach，这些进程是独立的，通常不需要手动清理
@@ -591,6 +623,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],  # 明确允许所有方法包括 OPTIONS
     allow_headers=["*"],  # 允许所有头部
+    expose_headers=["ETag"],  # 列表/统计接口的条件 GET
 )
 
 # 根路径路由
@@ -675,6 +708,7 @@ app.include_router(scene_router, prefix="/api")
 app.include_router(dcc_user_router, prefix="/api")
 app.include_router(dcc_leads_router, prefix="/api")
 app.include_router(auto_call_router, prefix="/api")
+app.include_router(dashboard_router, prefix="/api")
 app.include_router(auth_verify_router, prefix="/api")
 app.include_router(config_check_router, prefix="/api")
 
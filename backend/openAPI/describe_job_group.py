@@ -6,12 +6,11 @@ import sys
 from typing import List
 
 from alibabacloud_outboundbot20191226.client import Client as OutboundBot20191226Client
-from alibabacloud_credentials.client import Client as CredentialClient
-from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_outboundbot20191226 import models as outbound_bot_20191226_models
-from alibabacloud_tea_util import models as util_models
 from alibabacloud_tea_util.client import Client as UtilClient
 
+from openAPI.outbound_client import get_outbound_client, runtime_options
+
 
 class Sample:
     def __init__(self):
@@ -20,21 +19,10 @@ class Sample:
     @staticmethod
     def create_client() -> OutboundBot20191226Client:
         """
-        使用AK&SK初始化账号Client
+        返回进程内共享的外呼客户端（见 openAPI/outbound_client.py），不再每次调用新建
         @return: Client
-        @throws Exception
         """
-        # 工程代码泄露可能会导致 AccessKey 泄露，并威胁账号下所有资源的安全性。以下代码示例仅供参考。
-        # 建议使用更安全的 STS 方式，更多鉴权访问方式请参见：https://help.aliyun.com/document_detail/378659.html。
-        config = open_api_models.Config(
-            # 必填，请确保代码运行环境设置了环境变量 ALIBABA_CLOUD_ACCESS_KEY_ID。,
-            access_key_id=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_ID'),
-            # 必填，请确保代码运行环境设置了环境变量 ALIBABA_CLOUD_ACCESS_KEY_SECRET。,
-            access_key_secret=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
-        )
-        # Endpoint 请参考 https://api.aliyun.com/product/OutboundBot
-        config.endpoint = f'outboundbot.cn-shanghai.aliyuncs.com'
-        return OutboundBot20191226Client(config)
+        return get_outbound_client()
 
     @staticmethod
     def main(
@@ -46,7 +34,7 @@ class Sample:
             instance_id=os.getenv('INSTANCE_ID'),
             job_group_id=job_group_id
         )
-        runtime = util_models.RuntimeOptions()
+        runtime = runtime_options()
         try:
             # 复制代码运行请自行打印 API 的返回值
             client.describe_job_group_with_options(describe_job_group_request, runtime)
@@ -62,30 +50,10 @@ class Sample:
     async def main_async(
         args: List[str],
         job_group_id: str,
-    ) -> None:
-        client = Sample.create_client()
-        describe_job_group_request = outbound_bot_20191226_models.DescribeJobGroupRequest(
-            instance_id=os.getenv('INSTANCE_ID'),
-            job_group_id=job_group_id
-        )
-        runtime = util_models.RuntimeOptions()
-        try:
-            # 复制代码运行请自行打印 API 的返回值
-            response = await client.describe_job_group_with_options_async(describe_job_group_request, runtime)
-            return response.body.job_group
-        except Exception as error:
-            # 转换为明确可见的异常给上层捕获
-            # 兼容 Tea 异常结构，尽最大可能给出可读信息
-            message = getattr(error, 'message', str(error))
-            recommend = ''
-            try:
-                data = getattr(error, 'data', None)
-                if isinstance(data, dict):
-                    recommend = data.get('Recommend') or ''
-            except Exception:
-                pass
-            detail = message if not recommend else f"{message} | {recommend}"
-            raise RuntimeError(detail)
+    ):
+        """异步版本，见 openAPI/outbound_gateway.py；失败时抛出 OutboundApiError（RuntimeError 子类）"""
+        from openAPI.outbound_gateway import describe_job_group
+        return await describe_job_group(job_group_id)
 
 
 if __name__ == '__main__':
@@ -7,9 +7,10 @@ from typing import List
 
 from alibabacloud_tea_openapi.client import Client as OpenApiClient
 from alibabacloud_tea_openapi import models as open_api_models
-from alibabacloud_tea_util import models as util_models
 from alibabacloud_openapi_util.client import Client as OpenApiUtilClient
 
+from openAPI.outbound_client import get_outbound_client, runtime_options
+
 
 class Sample:
     def __init__(self):
@@ -18,20 +19,10 @@ class Sample:
     @staticmethod
     def create_client() -> OpenApiClient:
         """
-        使用凭据初始化账号Client
+        返回进程内共享的外呼客户端（见 openAPI/outbound_client.py），不再每次调用新建
         @return: Client
-        @throws Exception
         """
-        # 使用直接凭据方式，避免 CredentialClient 的 signal 问题
-        # 工程代码建议使用更安全的无AK方式，凭据配置方式请参见：https://help.aliyun.com/document_detail/378659.html。
-        config = open_api_models.Config(
-            # 直接使用环境变量中的 AccessKey，避免 CredentialClient 的 signal 依赖
-            access_key_id=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_ID'),
-            access_key_secret=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
-        )
-        # Endpoint 请参考 https://api.aliyun.com/product/OutboundBot
-        config.endpoint = f'outboundbot.cn-shanghai.aliyuncs.com'
-        return OpenApiClient(config)
+        return get_outbound_client()
 
     @staticmethod
     def create_api_info() -> open_api_models.Params:
@@ -73,7 +64,7 @@ class Sample:
         for i, job_id in enumerate(job_ids, 1):
             queries[f'JobId.{i}'] = job_id
         # runtime options
-        runtime = util_models.RuntimeOptions()
+        runtime = runtime_options()
         request = open_api_models.OpenApiRequest(
             query=OpenApiUtilClient.query(queries)
         )
@@ -85,20 +76,10 @@ class Sample:
     async def main_async(
         args: List[str],
         job_ids: List[str]
-    ) -> None:
-        client = Sample.create_client()
-        params = Sample.create_api_info()
-        # query params
-        queries = {}
-        queries['InstanceId'] = os.getenv('INSTANCE_ID')
-        # runtime options
-        runtime = util_models.RuntimeOptions()
-        request = open_api_models.OpenApiRequest(
-            query=OpenApiUtilClient.query(queries)
-        )
-        # 复制代码运行请自行打印 API 的返回值
-        # 返回值实际为 Map 类型，可从 Map 中获得三类数据：响应体 body、响应头 headers、HTTP 返回的状态码 statusCode。
-        await client.call_api_async(params, request, runtime)
+    ) -> List[dict]:
+        """异步版本，见 openAPI/outbound_gateway.py"""
+        from openAPI.outbound_gateway import list_jobs
+        return await list_jobs(job_ids)
 
 
 if __name__ == '__main__':
@@ -6,12 +6,11 @@ import sys
 from typing import List
 
 from alibabacloud_outboundbot20191226.client import Client as OutboundBot20191226Client
-from alibabacloud_credentials.client import Client as CredentialClient
-from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_outboundbot20191226 import models as outbound_bot_20191226_models
-from alibabacloud_tea_util import models as util_models
 from alibabacloud_tea_util.client import Client as UtilClient
 
+from openAPI.outbound_client import get_outbound_client, runtime_options
+
 
 class Sample:
     def __init__(self):
@@ -20,21 +19,10 @@ class Sample:
     @staticmethod
     def create_client() -> OutboundBot20191226Client:
         """
-        使用AK&SK初始化账号Client
+        返回进程内共享的外呼客户端（见 openAPI/outbound_client.py），不再每次调用新建
         @return: Client
-        @throws Exception
         """
-        # 工程代码泄露可能会导致 AccessKey 泄露，并威胁账号下所有资源的安全性。以下代码示例仅供参考。
-        # 建议使用更安全的 STS 方式，更多鉴权访问方式请参见：https://help.aliyun.com/document_detail/378659.html。
-        config = open_api_models.Config(
-            # 必填，请确保代码运行环境设置了环境变量 ALIBABA_CLOUD_ACCESS_KEY_ID。,
-            access_key_id=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_ID'),
-            # 必填，请确保代码运行环境设置了环境变量 ALIBABA_CLOUD_ACCESS_KEY_SECRET。,
-            access_key_secret=os.getenv('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
-        )
-        # Endpoint 请参考 https://api.aliyun.com/product/OutboundBot
-        config.endpoint = f'outboundbot.cn-shanghai.aliyuncs.com'
-        return OutboundBot20191226Client(config)
+        return get_outbound_client()
 
     @staticmethod
     def main(
@@ -50,7 +38,7 @@ class Sample:
             page_number=page_number,
             page_size=page_size
         )
-        runtime = util_models.RuntimeOptions()
+        runtime = runtime_options()
         try:
             # 复制代码运行请自行打印 API 的返回值
             response = client.list_jobs_by_group_with_options(list_jobs_by_group_request, runtime)
@@ -77,7 +65,7 @@ class Sample:
             page_number=page_number,
             page_size=page_size
         )
-        runtime = util_models.RuntimeOptions()
+        runtime = runtime_options()
         try:
             # 复制代码运行请自行打印 API 的返回值
             await client.list_jobs_by_group_with_options_async(list_jobs_by_group_request, runtime)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+外呼（OutboundBot）OpenAPI 客户端注册表
+
+openAPI/ 下各封装原先每次调用都通过 create_client() 新建客户端：重新读取凭据、构造配置与签名状态，
+连接也无法跨调用复用。这里为每个进程只创建一个客户端，所有封装的 Sample.create_client() 都返回它：
+
+- 客户端本身不保存请求级状态，可在多个线程间共享（list_jobs 的并发批次即共用同一个客户端）
+- 连接超时、读取超时与空闲连接数由配置项 OUTBOUND_API_* 控制，runtime_options() 生成带这些设置的运行时参数
+- 凭据：配置了 ALIBABA_CLOUD_ACCESS_KEY_ID / SECRET 时直接使用 AK，否则使用默认凭据链（CredentialClient）
+- Celery prefork 子进程 fork 后按进程号重新创建，不复用父进程的连接
+- 所有请求都经过 call_api / call_api_async（SDK 生成的 *_with_options 方法均由此发出），
+  在这里统一接入分布式限流（utils/rate_limiter.py）：调用前获取令牌，阿里云返回限流错误时通知所有进程退避并重试
+
+用法:
+    from openAPI.outbound_client import get_outbound_client, runtime_options
+    client = get_outbound_client()
+    client.describe_job_group_with_options(request, runtime_options())
+"""
+import asyncio
+import os
+import threading
+from typing import Optional
+
+from alibabacloud_outboundbot20191226.client import Client as OutboundBot20191226Client
+from alibabacloud_tea_openapi import models as open_api_models
+from alibabacloud_tea_util import models as util_models
+
+from config import config
+from utils.rate_limiter import acquire, acquire_async, is_throttling_error, report_throttled
+
+_client: Optional[OutboundBot20191226Client] = None
+_client_pid: Optional[int] = None
+_lock = threading.Lock()
+_stats = {"created": 0}
+
+
+class RateLimitedOutboundClient(OutboundBot20191226Client):
+    """每次调用前按接口名获取限流令牌；收到限流错误时最多重试 OPENAPI_THROTTLE_RETRIES 次（重试前重新排队获取令牌）"""
+
+    def call_api(self, params, request, runtime):
+        action = params.action
+        for attempt in range(config.OPENAPI_THROTTLE_RETRIES + 1):
+            acquire(action)
+            try:
+                return super().call_api(params, request, runtime)
+            except Exception as error:
+                if not is_throttling_error(error):
+                    raise
+                report_throttled(action)
+                if attempt >= config.OPENAPI_THROTTLE_RETRIES:
+                    raise
+
+    async def call_api_async(self, params, request, runtime):
+        action = params.action
+        for attempt in range(config.OPENAPI_THROTTLE_RETRIES + 1):
+            await acquire_async(action)
+            try:
+                return await super().call_api_async(params, request, runtime)
+            except Exception as error:
+                if not is_throttling_error(error):
+                    raise
+                await asyncio.to_thread(report_throttled, action)
+                if attempt >= config.OPENAPI_THROTTLE_RETRIES:
+                    raise
+
+
+def _create_client() -> OutboundBot20191226Client:
+    access_key_id = os.getenv('ALIBABA_CLOUD_ACCESS_KEY_ID')
+    access_key_secret = os.getenv('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
+    if access_key_id and access_key_secret:
+        # 直接使用 AK，避免 CredentialClient 的 signal 依赖（在非主线程中创建会失败）
+        client_config = open_api_models.Config(
+            access_key_id=access_key_id,
+            access_key_secret=access_key_secret
+        )
+    else:
+        from alibabacloud_credentials.client import Client as CredentialClient
+        client_config = open_api_models.Config(credential=CredentialClient())
+    # Endpoint 请参考 https://api.aliyun.com/product/OutboundBot
+    client_config.endpoint = config.OUTBOUND_API_ENDPOINT
+    client_config.connect_timeout = config.OUTBOUND_API_CONNECT_TIMEOUT_MS
+    client_config.read_timeout = config.OUTBOUND_API_READ_TIMEOUT_MS
+    client_config.max_idle_conns = config.OUTBOUND_API_MAX_IDLE_CONNS
+    return RateLimitedOutboundClient(client_config)
+
+
+def get_outbound_client() -> OutboundBot20191226Client:
+    """返回当前进程共享的外呼客户端（首次调用时创建）"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = _create_client()
+                _client_pid = pid
+                _stats["created"] += 1
+    return _client
+
+
+def reset_outbound_client():
+    """丢弃当前客户端（凭据轮换后调用），下次使用时重新创建"""
+    global _client, _client_pid
+    with _lock:
+        _client = None
+        _client_pid = None
+
+
+def runtime_options() -> util_models.RuntimeOptions:
+    """单次调用的运行时参数：超时与空闲连接数取自配置，不使用 SDK 自动重试（由调用方决定是否重试）"""
+    runtime = util_models.RuntimeOptions(
+        autoretry=False,
+        connect_timeout=config.OUTBOUND_API_CONNECT_TIMEOUT_MS,
+        read_timeout=config.OUTBOUND_API_READ_TIMEOUT_MS,
+        max_idle_conns=config.OUTBOUND_API_MAX_IDLE_CONNS
+    )
+    if hasattr(runtime, 'keep_alive'):  # 较新版本的 tea-util 才支持
+        runtime.keep_alive = True
+    return runtime
+
+
+def get_outbound_client_stats():
+    """当前进程的客户端创建次数（正常情况下每个进程为 1）"""
+    return dict(_stats, pid=_client_pid)
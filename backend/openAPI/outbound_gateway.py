@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+外呼（OutboundBot）OpenAPI 原生异步网关
+
+基于进程内共享客户端（openAPI/outbound_client.py）的 *_async 方法，调用期间不占用线程，
+同一个事件循环上可以并发发起大量请求；批量接口按 concurrency（默认 OUTBOUND_API_ASYNC_CONCURRENCY）限制同时在途的请求数，
+结果按输入顺序合并。
+
+- list_jobs / list_jobs_batched: 按 job_id 查询执行详情（每批最多 100 个）
+- query_jobs_with_result / query_jobs_with_result_pages: 分页查询任务组下的任务与结果
+- describe_job_group: 任务组详情
+- assign_jobs: 向任务组分配任务（每批最多 20 个）
+- download_recording: 获取录音下载地址
+
+失败时抛出 OutboundApiError（message 中带阿里云返回的错误信息与诊断建议）；download_recording 与同步版本一致，失败时返回 None。
+"""
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from alibabacloud_openapi_util.client import Client as OpenApiUtilClient
+from alibabacloud_outboundbot20191226 import models as outbound_bot_20191226_models
+from alibabacloud_tea_openapi import models as open_api_models
+
+from config import config
+from openAPI.assign_jobs import Sample as AssignJobsSample
+from openAPI.list_jobs import Sample as ListJobsSample
+from openAPI.outbound_client import get_outbound_client, runtime_options
+
+
+class OutboundApiError(RuntimeError):
+    """外呼 OpenAPI 调用失败"""
+
+
+def _readable_error(error: Exception) -> OutboundApiError:
+    """把 Tea 异常转换为可读的 OutboundApiError（附带 Recommend 诊断地址）"""
+    message = getattr(error, 'message', None) or str(error)
+    data = getattr(error, 'data', None)
+    recommend = data.get('Recommend') if isinstance(data, dict) else None
+    return OutboundApiError(f"{message} | {recommend}" if recommend else message)
+
+
+async def _call(coro: Awaitable) -> Any:
+    try:
+        return await coro
+    except Exception as error:
+        raise _readable_error(error) from error
+
+
+async def _bounded_gather(factories: List[Callable[[], Awaitable]], concurrency: Optional[int]) -> List[Tuple[Any, Optional[Exception]]]:
+    """并发执行（同时在途不超过 concurrency），按输入顺序返回 [(结果, 异常)]"""
+    semaphore = asyncio.Semaphore(max(1, concurrency or config.OUTBOUND_API_ASYNC_CONCURRENCY))
+
+    async def run(factory):
+        async with semaphore:
+            try:
+                return await factory(), None
+            except Exception as e:
+                return None, e
+
+    return await asyncio.gather(*[run(factory) for factory in factories])
+
+
+async def list_jobs(job_ids: List[str]) -> List[Dict[str, Any]]:
+    """查询一批 job（不超过 100 个）的执行详情，返回 Jobs 列表"""
+    queries = {'InstanceId': os.getenv('INSTANCE_ID')}
+    for i, job_id in enumerate(job_ids, 1):
+        queries[f'JobId.{i}'] = job_id
+    request = open_api_models.OpenApiRequest(query=OpenApiUtilClient.query(queries))
+    response = await _call(get_outbound_client().call_api_async(ListJobsSample.create_api_info(), request, runtime_options()))
+    return response['body'].get('Jobs') or []
+
+
+async def list_jobs_batched(job_ids: List[str], batch_size: int = 100,
+                            concurrency: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    按批并发查询执行详情，返回 (按 job_ids 原顺序合并的 Jobs, 失败批次的错误信息列表)；单个批次失败不影响其他批次
+    """
+    batches = [job_ids[i:i + batch_size] for i in range(0, len(job_ids), batch_size)]
+    results = await _bounded_gather([lambda batch=batch: list_jobs(batch) for batch in batches], concurrency)
+    all_jobs, batch_errors = [], []
+    for batch_num, (jobs, error) in enumerate(results, 1):
+        if error is not None:
+            batch_errors.append(f"第 {batch_num} 批调用失败: {str(error)}")
+        else:
+            all_jobs.extend(jobs)
+    return all_jobs, batch_errors
+
+
+async def query_jobs_with_result(job_group_id: str, page_number: int, page_size: int):
+    """分页查询任务组下的任务与结果，返回 response.body.jobs（含 list 与 row_count）"""
+    request = outbound_bot_20191226_models.QueryJobsWithResultRequest(
+        instance_id=os.getenv('INSTANCE_ID'),
+        page_number=page_number,
+        page_size=page_size,
+        job_group_id=job_group_id
+    )
+    response = await _call(get_outbound_client().query_jobs_with_result_with_options_async(request, runtime_options()))
+    return response.body.jobs
+
+
+async def query_jobs_with_result_pages(job_group_id: str, page_numbers: Iterable[int], page_size: int,
+                                       concurrency: Optional[int] = None) -> List[Tuple[int, Any, Optional[Exception]]]:
+    """并发拉取多页，按页码顺序返回 [(页码, 该页 jobs, 异常)]"""
+    page_numbers = list(page_numbers)
+    results = await _bounded_gather(
+        [lambda pn=pn: query_jobs_with_result(job_group_id, pn, page_size) for pn in page_numbers],
+        concurrency
+    )
+    return [(pn, data, error) for pn, (data, error) in zip(page_numbers, results)]
+
+
+async def describe_job_group(job_group_id: str):
+    """任务组详情，返回 response.body.job_group"""
+    request = outbound_bot_20191226_models.DescribeJobGroupRequest(
+        instance_id=os.getenv('INSTANCE_ID'),
+        job_group_id=job_group_id
+    )
+    response = await _call(get_outbound_client().describe_job_group_with_options_async(request, runtime_options()))
+    return response.body.job_group
+
+
+async def assign_jobs(job_group_id: str, jobs_json_list: List[Dict[str, Any]], batch_size: int = 20,
+                      concurrency: Optional[int] = None) -> List[str]:
+    """
+    向任务组分配任务：按批（每批最多 20 个）并发提交，返回按 jobs_json_list 顺序合并的 jobs_id；
+    与同步版本一致，失败的批次只记录日志，调用方通过返回数量判断是否有遗漏
+    """
+    params = AssignJobsSample.create_api_info()
+    batches = [jobs_json_list[i:i + batch_size] for i in range(0, len(jobs_json_list), batch_size)]
+
+    async def assign(batch):
+        queries = {'InstanceId': os.getenv('INSTANCE_ID'), 'JobGroupId': job_group_id}
+        for i, job_json in enumerate(batch, 1):
+            queries[f'JobsJson.{i}'] = json.dumps(job_json, ensure_ascii=False)
+        request = open_api_models.OpenApiRequest(query=OpenApiUtilClient.query(queries))
+        response = await _call(get_outbound_client().call_api_async(params, request, runtime_options()))
+        jobs_id = response['body'].get('JobsId')
+        if isinstance(jobs_id, str):
+            return [jobs_id]
+        return list(jobs_id) if jobs_id else []
+
+    results = await _bounded_gather([lambda batch=batch: assign(batch) for batch in batches], concurrency)
+    all_jobs_id = []
+    for batch_num, ((jobs_id, error), batch) in enumerate(zip(results, batches), 1):
+        if error is not None:
+            print(f"[assign_jobs_async] 错误: 第{batch_num}/{len(batches)}批处理失败: {str(error)}")
+            continue
+        if len(jobs_id) != len(batch):
+            print(f"[assign_jobs_async] 警告: 第{batch_num}/{len(batches)}批，期望返回{len(batch)}个jobs_id，实际返回{len(jobs_id)}个")
+        all_jobs_id.extend(jobs_id)
+    if len(all_jobs_id) != len(jobs_json_list):
+        print(f"[assign_jobs_async] 警告: 总共发送{len(jobs_json_list)}个任务，但只收到{len(all_jobs_id)}个jobs_id，可能有遗漏")
+    return all_jobs_id
+
+
+async def download_recording(task_id: str) -> Optional[str]:
+    """获取录音下载地址；未获取到或调用失败时返回 None"""
+    request = outbound_bot_20191226_models.DownloadRecordingRequest(
+        task_id=task_id,
+        instance_id=os.getenv('INSTANCE_ID')
+    )
+    try:
+        response = await _call(get_outbound_client().download_recording_with_options_async(request, runtime_options()))
+    except OutboundApiError as e:
+        print(f"下载录音失败 - 任务ID: {task_id}, 错误: {str(e)}")
+        return None
+    body = response.body
+    if body and body.download_params and body.download_params.signature_url:
+        return body.download_params.signature_url
+    print(f"任务 {task_id} 未获取到录音URL")
+    return None
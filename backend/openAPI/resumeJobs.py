@@ -6,12 +6,11 @@ import sys
 from typing import List
 
 from alibabacloud_outboundbot20191226.client import Client as OutboundBot20191226Client
-from alibabacloud_credentials.client import Client as CredentialClient
-from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_outboundbot20191226 import models as outbound_bot_20191226_models
-from alibabacloud_tea_util import models as util_models
 from alibabacloud_tea_util.client import Client as UtilClient
 
+from openAPI.outbound_client import get_outbound_client, runtime_options
+
 
 class Sample:
     def __init__(self):
@@ -20,18 +19,10 @@ class Sample:
     @staticmethod
     def create_client() -> OutboundBot20191226Client:
         """
-        使用凭据初始化账号Client
+        返回进程内共享的外呼客户端（见 openAPI/outbound_client.py），不再每次调用新建
         @return: Client
-        @throws Exception
         """
-        # 工程代码建议使用更安全的无AK方式，凭据配置方式请参见：https://help.aliyun.com/document_detail/378659.html。
-        credential = CredentialClient()
-        config = open_api_models.Config(
-            credential=credential
-        )
-        # Endpoint 请参考 https://api.aliyun.com/product/OutboundBot
-        config.endpoint = f'outboundbot.cn-shanghai.aliyuncs.com'
-        return OutboundBot20191226Client(config)
+        return get_outbound_client()
 
     @staticmethod
     def resume_jobs(job_group_id: str) -> dict:
@@ -47,7 +38,7 @@ class Sample:
                 job_group_id=job_group_id,
                 instance_id=os.getenv('INSTANCE_ID')
             )
-            runtime = util_models.RuntimeOptions()
+            runtime = runtime_options()
             
             # 复制代码运行请自行打印 API 的返回值
             response = client.resume_jobs_with_options(resume_jobs_request, runtime)
@@ -94,7 +85,7 @@ class Sample:
             job_group_id=job_group_id,
             instance_id=os.getenv('INSTANCE_ID')
         )
-        runtime = util_models.RuntimeOptions()
+        runtime = runtime_options()
         try:
             # 复制代码运行请自行打印 API 的返回值
             response = client.resume_jobs_with_options(resume_jobs_request, runtime)
@@ -110,24 +101,20 @@ class Sample:
     @staticmethod
     async def main_async(
         args: List[str],
-    ) -> None:
-        client = Sample.create_client()
-        resume_jobs_request = outbound_bot_20191226_models.ResumeJobsRequest(
+        job_group_id: str,
+    ):
+        client = get_outbound_client()
+        request = outbound_bot_20191226_models.ResumeJobsRequest(
             all=True,
-            job_group_id='7f47bc7b-8acd-4d81-b375-14507c65dd21',
-            instance_id='44f9ce96-c55c-4277-bad9-e7eaa7653644'
+            instance_id=os.getenv('INSTANCE_ID'),
+            job_group_id=job_group_id
         )
-        runtime = util_models.RuntimeOptions()
         try:
-            # 复制代码运行请自行打印 API 的返回值
-            await client.resume_jobs_with_options_async(resume_jobs_request, runtime)
+            response = await client.resume_jobs_with_options_async(request, runtime_options())
+            return response.body
         except Exception as error:
-            # 此处仅做打印展示，请谨慎对待异常处理，在工程项目中切勿直接忽略异常。
-            # 错误 message
-            print(error.message)
-            # 诊断地址
-            print(error.data.get("Recommend"))
-            UtilClient.assert_as_string(error.message)
+            from openAPI.outbound_gateway import _readable_error
+            raise _readable_error(error) from error
 
 
 if __name__ == '__main__':
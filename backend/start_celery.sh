@@ -68,16 +68,20 @@ fi
 # 启动 Celery Worker（如果未运行）
 if [ "$WORKER_RUNNING" = false ]; then
     echo "🚀 启动 Celery Worker..."
-    # 使用 solo pool 避免 prefork 模式下的 SIGSEGV 问题（macOS Python 3.13 兼容性）
-    celery -A celery_app worker \
+    # 默认使用 prefork 多进程；子进程在 worker_process_init 中重建数据库连接池与 Redis 客户端
+    # macOS Python 3.13 下 prefork 可能出现 SIGSEGV，可设置 CELERY_WORKER_POOL=solo CELERY_WORKER_CONCURRENCY=1
+    # DB_POOL_ROLE 决定连接池配置；按队列拆分 Worker 时可设为队列名（如 query_queue）
+    CELERY_WORKER_POOL="${CELERY_WORKER_POOL:-prefork}"
+    CELERY_WORKER_CONCURRENCY="${CELERY_WORKER_CONCURRENCY:-$(getconf _NPROCESSORS_ONLN 2>/dev/null || echo 1)}"
+    DB_POOL_ROLE="${DB_POOL_ROLE:-celery}" celery -A celery_app worker \
         --loglevel=info \
-        --pool=solo \
-        --concurrency=1 \
+        --pool="$CELERY_WORKER_POOL" \
+        --concurrency="$CELERY_WORKER_CONCURRENCY" \
         --logfile=logs/celery_worker.log \
         --pidfile=logs/celery_worker.pid \
         --queues=default,sync_queue,download_queue,ai_queue,query_queue,follow_queue,monitor_queue \
         --detach
-    echo "✅ Celery Worker 已启动（使用 solo pool，监听所有队列）"
+    echo "✅ Celery Worker 已启动（pool=$CELERY_WORKER_POOL, concurrency=$CELERY_WORKER_CONCURRENCY，监听所有队列）"
 else
     echo "⏭️  跳过 Celery Worker 启动（已在运行）"
     echo "⚠️  注意：如果 Worker 没有监听 monitor_queue，请重启 Worker"
@@ -28,6 +28,10 @@ tags_metadata = [
         "name": "自动外呼任务",
         "description": "自动外呼任务的创建、启动、查询与统计等接口。任务列表请使用分页接口 GET /api/task_list（支持滚动加载：page/page_size/pagination）。",
     },
+    {
+        "name": "首页看板",
+        "description": "首页数据聚合接口：一次请求返回任务统计、任务列表、任务跟进统计与线索统计，各分区并发计算并返回耗时。",
+    },
 ]
 
 # API 响应示例
@@ -0,0 +1,211 @@
+"""
+缓存后端抽象
+
+- MemoryLRUCache: 进程内有界 LRU，每个键单独设置过期时间
+- RedisCache: Redis 共享缓存（多 uvicorn worker / Celery 进程共享），值以 JSON 存储，支持 datetime/date/Decimal
+- TieredCache: 两级缓存（进程内 -> Redis），读穿透、写双写、删除双删，并统计各级命中率
+
+Redis 不可用时 RedisCache 的读写静默失败，TieredCache 自动退化为纯进程内缓存。
+"""
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
+
+_REDIS_KEY_PREFIX = "cache:"
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"无法序列化类型: {type(value)}")
+
+
+def _decode_value(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return date.fromisoformat(obj["__date__"])
+    if "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dumps(value) -> str:
+    """序列化缓存值（保留 datetime/date/Decimal 类型）"""
+    return json.dumps(value, default=_encode_value, ensure_ascii=False)
+
+
+def loads(raw: str):
+    """反序列化缓存值"""
+    return json.loads(raw, object_hook=_decode_value)
+
+
+class CacheBackend(ABC):
+    """缓存后端接口：get 未命中返回 None，因此不缓存 None 值"""
+
+    @abstractmethod
+    def get(self, key):
+        """读取缓存值，未命中返回 None"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """写入缓存值，ttl 为过期时间（秒）"""
+
+    @abstractmethod
+    def delete(self, key):
+        """删除缓存值"""
+
+
+class MemoryLRUCache(CacheBackend):
+    """进程内有界 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (过期时间, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """Redis 共享缓存，键为 cache:<namespace>:<key>"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def _key(self, key):
+        return f"{_REDIS_KEY_PREFIX}{self.namespace}:{key}"
+
+    def get(self, key):
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"读取缓存 {self.namespace} 失败: {str(e)}")
+            mark_redis_failure()
+            return None
+        return loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(self._key(key), dumps(value), ex=max(1, int(ttl)))
+        except Exception as e:
+            logger.warning(f"写入缓存 {self.namespace} 失败: {str(e)}")
+            mark_redis_failure()
+
+    def delete(self, key):
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"清除缓存 {self.namespace} 失败: {str(e)}")
+            mark_redis_failure()
+
+
+class TieredCache:
+    """
+    两级缓存：进程内 LRU（local_ttl）+ Redis（shared_ttl）
+
+    local_ttl 决定其他进程修改并失效 Redis 后，本进程最多读到多久的旧值；
+    键中带版本号（修改后键随之变化）的场景可以把 local_ttl 设为与 shared_ttl 相同
+    """
+
+    def __init__(self, name: str, max_entries: int, local_ttl: float, shared_ttl: float):
+        self.name = name
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.local = MemoryLRUCache(max_entries)
+        self.shared = RedisCache(name)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "sets": 0, "invalidations": 0}
+        register_cache(self)
+
+    def _count(self, field):
+        with self._lock:
+            self._stats[field] += 1
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+        value = self.shared.get(key)
+        if value is not None:
+            self._count("shared_hits")
+            self.local.set(key, value, self.local_ttl)
+            return value
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        self._count("sets")
+        self.local.set(key, value, self.local_ttl)
+        self.shared.set(key, value, self.shared_ttl)
+
+    def delete(self, key):
+        self._count("invalidations")
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, local_size=len(self.local))
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["local_hits"] + stats["shared_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_caches = {}
+
+
+def register_cache(cache):
+    """登记缓存实例，用于统一输出统计"""
+    _caches[cache.name] = cache
+
+
+def get_cache_stats():
+    """获取所有已登记缓存的命中统计"""
+    return {name: cache.stats() for name, cache in _caches.items()}
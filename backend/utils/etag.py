@@ -0,0 +1,43 @@
+"""
+条件 GET（ETag / If-None-Match）
+
+ETag 由组织数据版本号生成（database/org_version.py 的 org_etag），不依赖响应内容，
+因此判断 304 时不需要执行底层查询。
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+
+# 客户端每次都带 If-None-Match 重新验证，不直接使用本地副本
+CACHE_CONTROL = "private, no-cache"
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否与 ETag 匹配（弱比较，支持逗号分隔的多个值与 *）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    expected = _strip_weak(etag)
+    return any(_strip_weak(tag) == expected for tag in header.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    处理条件 GET：ETag 匹配时返回 304 响应，调用方应直接返回它；否则在响应上设置 ETag 并返回 None
+
+    etag 为 None（版本号不可用，或组织刚写入、副本可能尚未同步）时不做任何处理
+    """
+    if not etag:
+        return None
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
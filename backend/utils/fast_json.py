@@ -0,0 +1,120 @@
+"""
+大响应的快速序列化路径
+
+/query-task-execution、/tasks 等接口返回包含完整通话记录的数组，默认路径会先按 response_model 重新校验一遍
+已经组装好的字典，再经 jsonable_encoder 逐个复制、标准库 json 编码，序列化耗时与数据量成正比且常数很大。
+
+快速路径（FAST_JSON_RESPONSE=true 时由接口启用）：
+- 已组装好的 dict 直接编码，跳过 response_model 校验与 jsonable_encoder
+- 安装了 orjson 时使用其 C 实现编码/解码，未安装时退化为标准库 json（紧凑分隔符、不转义中文）
+- 响应体超过 RESPONSE_COMPRESS_MIN_BYTES 时按 Accept-Encoding 协商压缩：br（需安装 brotli）优先，其次 gzip
+
+输出与默认路径一致：datetime/date 为 ISO 格式字符串，Decimal 转为数字。
+"""
+import datetime
+import decimal
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from config import config
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+# gzip / brotli 压缩级别：大响应实时压缩，取压缩率与耗时的折中
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 5
+
+
+def _default(obj):
+    """orjson / json 不支持的类型，与 FastAPI jsonable_encoder 的转换保持一致"""
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """编码为 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data) -> Any:
+    """解码 JSON 字符串或字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _accepted_encodings(request: Request) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """选择响应压缩编码：br（已安装 brotli）优先，其次 gzip；客户端都不接受时返回 None"""
+    accepted = _accepted_encodings(request)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=_GZIP_LEVEL)
+
+
+def fast_json_response(request: Request, content: Any, status_code: int = 200,
+                       headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    按快速路径返回 JSON：直接编码 content（不经过 response_model 校验），大响应按客户端支持压缩
+
+    content 须已是最终的响应结构（与 response_model 一致），调用方不再做额外转换
+    """
+    body = dumps(content)
+    response_headers = dict(headers or {})
+    if len(body) >= config.RESPONSE_COMPRESS_MIN_BYTES:
+        response_headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(request)
+        if encoding:
+            body = compress(body, encoding)
+            response_headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, headers=response_headers, media_type="application/json")
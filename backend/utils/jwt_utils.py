@@ -72,6 +72,7 @@ def verify_access_token(token: str) -> Optional[Dict[Any, Any]]:
             "username": payload.get("username"),
             "phone": payload.get("phone"),
             "organization_id": payload.get("organization_id"),  # 添加组织ID
+            "dcc_user_org_id": payload.get("dcc_user_org_id"),  # 签发时绑定的DCC组织ID（用于免查库解析组织）
             "exp": payload.get("exp"),
             "iat": payload.get("iat"),
             "type": payload.get("type")
@@ -0,0 +1,275 @@
+"""
+阿里云 OpenAPI 分布式限流（Redis 令牌桶）
+
+API 进程、sync_queue / query_queue Worker 与监控任务各自调用外呼 OpenAPI，多个大任务同时轮询时会触发阿里云限流，
+之后各自按固定间隔重试，恢复时间被拉长到分钟级。这里让所有进程共享同一组令牌桶：
+
+- 令牌桶按 (INSTANCE_ID, 接口名) 划分，保存在 Redis 哈希 openapi_rl:<instance>:<action> 中，
+  由 Lua 脚本原子地补充与扣减令牌（以 Redis 服务器时间计算，不受各主机时钟偏差影响）
+- 速率与突发容量：默认 OPENAPI_RATE_LIMIT_QPS / OPENAPI_RATE_LIMIT_BURST，
+  按接口覆盖 OPENAPI_RATE_LIMITS，格式 "ListJobs=20,AssignJobs=5:10"（接口=每秒令牌数[:容量]）
+- 优先级：后台调用（background）只能使用超出预留部分的令牌，预留 OPENAPI_RATE_LIMIT_BACKGROUND_RESERVE 比例的容量
+  （最多 容量 - 1）给交互调用（interactive），高峰期交互请求优先获得令牌。默认优先级由进程角色决定（API 进程为交互，Worker 为后台），
+  可用 openapi_priority() 在当前上下文中覆盖
+- 阿里云仍返回限流错误时调用 report_throttled() 清空令牌桶并预扣一段冷却时间，让所有进程一起退避
+- Redis 不可用时不限流（放行），并计入统计
+
+等待超过 OPENAPI_RATE_LIMIT_MAX_WAIT_SECONDS 时抛出 RateLimitTimeout，由调用方按普通调用失败处理。
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from config import config
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+_KEY_PREFIX = "openapi_rl:"
+
+# 补充令牌后尝试扣减；令牌不足时返回需要等待的毫秒数（0 表示已获得令牌）
+# ARGV: 每秒令牌数, 容量, 本次调用需保留的令牌数（后台调用为预留部分，交互调用为 0）
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 + reserve - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 60000)
+return wait
+"""
+
+# 收到限流错误：令牌清空并预扣 ARGV[2] 秒的令牌，所有进程一起等待
+_THROTTLED_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rate = tonumber(ARGV[1])
+redis.call('HSET', KEYS[1], 'tokens', -rate * tonumber(ARGV[2]), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+return 1
+"""
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("openapi_priority", default=None)
+
+_limits_cache: Optional[Tuple[str, Dict[str, Tuple[float, float]]]] = None
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+class RateLimitTimeout(RuntimeError):
+    """等待令牌超时"""
+
+
+def current_priority() -> str:
+    """当前上下文的调用优先级：未显式指定时 API 进程为交互，其他进程（Celery Worker）为后台"""
+    priority = _priority.get()
+    if priority:
+        return priority
+    return PRIORITY_INTERACTIVE if config.get_pool_settings()['role'] == 'api' else PRIORITY_BACKGROUND
+
+
+@contextmanager
+def openapi_priority(priority: str):
+    """在当前上下文（含其中创建的 asyncio 任务）内指定 OpenAPI 调用优先级"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+async def run_with_priority(priority: str, coro: Awaitable):
+    """以指定优先级执行协程（用于 asyncio.create_task 启动的后台任务，不影响发起方的上下文）"""
+    with openapi_priority(priority):
+        return await coro
+
+
+def _parse_limits() -> Dict[str, Tuple[float, float]]:
+    """解析 OPENAPI_RATE_LIMITS：{接口名: (每秒令牌数, 容量)}"""
+    global _limits_cache
+    raw = config.OPENAPI_RATE_LIMITS or ""
+    if _limits_cache is not None and _limits_cache[0] == raw:
+        return _limits_cache[1]
+    limits = {}
+    for part in raw.split(','):
+        action, _, value = part.strip().partition('=')
+        if not action or not value:
+            continue
+        rate, _, burst = value.partition(':')
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else max(rate, 1.0)
+        except ValueError:
+            rate = 0
+        if rate <= 0 or burst < 1:
+            logger.warning(f"忽略无效的 OPENAPI_RATE_LIMITS 配置项: {part}")
+            continue
+        limits[action.strip()] = (rate, burst)
+    _limits_cache = (raw, limits)
+    return limits
+
+
+def get_limit(action: str) -> Tuple[float, float]:
+    """接口的 (每秒令牌数, 容量)"""
+    return _parse_limits().get(action, (config.OPENAPI_RATE_LIMIT_QPS, config.OPENAPI_RATE_LIMIT_BURST))
+
+
+def _bucket_key(action: str) -> str:
+    return f"{_KEY_PREFIX}{config.INSTANCE_ID or 'default'}:{action}"
+
+
+def _count(action: str, priority: Optional[str] = None, **increments):
+    with _stats_lock:
+        stats = _stats.setdefault(action, {
+            "calls": 0, "waited": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+            "timeouts": 0, "throttled": 0, "redis_unavailable": 0,
+            PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 0
+        })
+        if priority:
+            stats[priority] += 1
+        for field, value in increments.items():
+            if field == "wait_ms_max":
+                stats[field] = max(stats[field], value)
+            else:
+                stats[field] += value
+
+
+def _try_acquire(action: str, priority: str) -> Optional[int]:
+    """尝试获取一个令牌：返回需要等待的毫秒数（0 为已获得）；Redis 不可用时返回 None"""
+    client = get_redis_client()
+    if client is None:
+        return None
+    rate, capacity = get_limit(action)
+    reserve = 0
+    if priority == PRIORITY_BACKGROUND:
+        # 后台调用需要 1 + reserve 个令牌：预留不超过 capacity - 1，容量很小（如 "AssignJobs=1"）时后台调用仍能获得令牌
+        reserve = max(0.0, min(capacity * config.OPENAPI_RATE_LIMIT_BACKGROUND_RESERVE, capacity - 1))
+    try:
+        return int(client.eval(_ACQUIRE_SCRIPT, 1, _bucket_key(action), rate, capacity, reserve))
+    except Exception as e:
+        logger.warning(f"OpenAPI 限流令牌获取失败，本次不限流: action={action}, error={str(e)}")
+        mark_redis_failure()
+        return None
+
+
+def _sleep_seconds(wait_ms: int, deadline: float) -> float:
+    # 加少量随机抖动，避免多个进程在同一时刻醒来争抢令牌
+    return max(0.0, min(wait_ms / 1000 * (1 + random.random() * 0.1), deadline - time.monotonic()))
+
+
+def _finish(action: str, priority: str, start: float, waited: bool):
+    wait_ms = (time.monotonic() - start) * 1000
+    if waited:
+        _count(action, priority, calls=1, waited=1, wait_ms_total=wait_ms, wait_ms_max=wait_ms)
+    else:
+        _count(action, priority, calls=1)
+
+
+def acquire(action: str, priority: Optional[str] = None):
+    """同步获取令牌（阻塞等待）；超过最长等待时间抛出 RateLimitTimeout"""
+    if not config.OPENAPI_RATE_LIMIT_ENABLED:
+        return
+    priority = priority or current_priority()
+    start = time.monotonic()
+    deadline = start + config.OPENAPI_RATE_LIMIT_MAX_WAIT_SECONDS
+    waited = False
+    while True:
+        wait_ms = _try_acquire(action, priority)
+        if wait_ms is None:
+            _count(action, priority, calls=1, redis_unavailable=1)
+            return
+        if wait_ms == 0:
+            _finish(action, priority, start, waited)
+            return
+        if time.monotonic() >= deadline:
+            _count(action, priority, timeouts=1)
+            raise RateLimitTimeout(f"OpenAPI 限流等待超时: {action}（{priority}）")
+        waited = True
+        time.sleep(_sleep_seconds(wait_ms, deadline))
+
+
+async def acquire_async(action: str, priority: Optional[str] = None):
+    """异步获取令牌（等待期间不阻塞事件循环）；超过最长等待时间抛出 RateLimitTimeout"""
+    if not config.OPENAPI_RATE_LIMIT_ENABLED:
+        return
+    priority = priority or current_priority()
+    start = time.monotonic()
+    deadline = start + config.OPENAPI_RATE_LIMIT_MAX_WAIT_SECONDS
+    waited = False
+    while True:
+        # Redis 客户端为同步实现，放到线程池执行，避免阻塞事件循环
+        wait_ms = await asyncio.to_thread(_try_acquire, action, priority)
+        if wait_ms is None:
+            _count(action, priority, calls=1, redis_unavailable=1)
+            return
+        if wait_ms == 0:
+            _finish(action, priority, start, waited)
+            return
+        if time.monotonic() >= deadline:
+            _count(action, priority, timeouts=1)
+            raise RateLimitTimeout(f"OpenAPI 限流等待超时: {action}（{priority}）")
+        waited = True
+        await asyncio.sleep(_sleep_seconds(wait_ms, deadline))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """是否为阿里云返回的限流错误（错误码 Throttling*，或 HTTP 429）"""
+    code = str(getattr(error, 'code', '') or '')
+    if code.startswith('Throttling'):
+        return True
+    data = getattr(error, 'data', None)
+    return isinstance(data, dict) and data.get('statusCode') == 429
+
+
+def report_throttled(action: str):
+    """记录一次阿里云限流：清空该接口的令牌桶并预扣冷却时间，所有进程一起退避"""
+    _count(action, throttled=1)
+    if not config.OPENAPI_RATE_LIMIT_ENABLED:
+        return
+    client = get_redis_client()
+    if client is None:
+        return
+    rate, _ = get_limit(action)
+    try:
+        client.eval(_THROTTLED_SCRIPT, 1, _bucket_key(action), rate, config.OPENAPI_THROTTLE_COOLDOWN_SECONDS)
+    except Exception as e:
+        logger.warning(f"记录 OpenAPI 限流失败: action={action}, error={str(e)}")
+        mark_redis_failure()
+
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    """当前进程各接口的限流统计：调用次数、等待次数与耗时、等待超时、阿里云限流次数、按优先级的调用数"""
+    with _stats_lock:
+        actions = {}
+        for action, stats in _stats.items():
+            item = dict(stats)
+            item["wait_ms_total"] = round(item["wait_ms_total"], 1)
+            item["wait_ms_max"] = round(item["wait_ms_max"], 1)
+            item["wait_ms_avg"] = round(item["wait_ms_total"] / item["waited"], 1) if item["waited"] else 0.0
+            item["limit"] = dict(zip(("qps", "burst"), get_limit(action)))
+            actions[action] = item
+    return {"enabled": config.OPENAPI_RATE_LIMIT_ENABLED, "priority": current_priority(), "actions": actions}
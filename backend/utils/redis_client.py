@@ -0,0 +1,67 @@
+"""
+进程级共享 Redis 客户端
+
+- 首次使用时创建，fork 后在子进程中自动重新创建（按进程ID判断），不会沿用父进程的连接
+- 未安装 redis 库或连接失败时返回 None，调用方应退化为不使用 Redis；连接失败后冷却一段时间再重试
+"""
+import logging
+import os
+import threading
+import time
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# 连接失败后的重试冷却时间（秒），避免 Redis 不可用时每次调用都阻塞在建连上
+_RETRY_COOLDOWN = 30
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_last_failure_at = 0.0
+
+
+def get_redis_client():
+    """获取当前进程的 Redis 客户端（decode_responses=True）；不可用时返回 None"""
+    global _client, _client_pid, _last_failure_at
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    if _client_pid == pid and time.monotonic() - _last_failure_at < _RETRY_COOLDOWN:
+        return None
+    with _lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+        _client = None
+        _client_pid = pid
+        try:
+            import redis
+        except ImportError:
+            logger.warning("未安装 redis 库，共享缓存将只使用进程内存")
+            _last_failure_at = time.monotonic()
+            return None
+        try:
+            client = redis.Redis(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                db=config.REDIS_DB,
+                password=config.REDIS_PASSWORD or None,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            client.ping()
+            _client = client
+        except Exception as e:
+            logger.warning(f"连接 Redis 失败，共享缓存将只使用进程内存: {str(e)}")
+            _last_failure_at = time.monotonic()
+        return _client
+
+
+def mark_redis_failure():
+    """调用方在 Redis 命令失败时调用：丢弃客户端，冷却后重新连接"""
+    global _client, _last_failure_at
+    with _lock:
+        _client = None
+        _last_failure_at = time.monotonic()
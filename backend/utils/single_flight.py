@@ -0,0 +1,167 @@
+"""
+相同请求合并（single-flight）
+
+多个标签页 / 多个用户同时刷新看板时，同一组织的 /task-stats、/tasks、/leads/statistics 会并发到达，
+每个请求都重复执行相同的重 SQL（/tasks 还会重复调用 DescribeJobGroup）。
+single_flight 以 (接口, 组织, 规范化参数) 为键，让并发的相同请求共享一次计算：
+
+- 进程内：第一个请求（leader）启动计算任务，其余请求等待同一任务的结果；
+  计算任务与发起请求解耦（shield），leader 断开连接不会取消其他请求正在等待的计算
+- 跨进程（可选，SINGLE_FLIGHT_REDIS_LOCK=true）：leader 先获取 Redis 锁，拿不到锁说明其他进程正在计算，
+  则轮询等待其写入的结果（保留 SINGLE_FLIGHT_RESULT_TTL 秒）；等待超时或锁释放但没有结果时自行计算。
+  跨进程共享的结果必须可 JSON 序列化（无法序列化时不写结果，其他进程的等待方在锁释放后自行计算）
+- Redis 读写在线程池中执行，不阻塞事件循环
+- Redis 不可用时退化为仅进程内合并
+
+合并的是“同时在途”的请求，不是缓存：计算结束后下一个请求会重新计算。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+from config import config
+from utils.cache import dumps, loads
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
+
+_LOCK_KEY_PREFIX = "singleflight:lock:"
+_RESULT_KEY_PREFIX = "singleflight:result:"
+_POLL_INTERVAL = 0.05
+_POLL_INTERVAL_MAX = 0.5
+
+# 仅当锁仍由自己持有时才删除，避免误删锁过期后其他进程获取的锁
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_inflight = {}  # key -> asyncio.Task（单个事件循环内使用）
+_stats_lock = threading.Lock()
+_stats = {}  # endpoint -> 计数
+
+
+def _count(endpoint, field):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, {
+            "calls": 0, "executions": 0, "coalesced_local": 0, "coalesced_remote": 0, "errors": 0
+        })
+        stats[field] += 1
+
+
+def make_key(endpoint, organization_id, params=None) -> str:
+    """生成合并键：参数按键排序后序列化，取值顺序不同但语义相同的请求得到同一个键"""
+    params_digest = hashlib.md5(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{endpoint}:{organization_id}:{params_digest}"
+
+
+async def single_flight(endpoint, organization_id, params, fn):
+    """
+    合并并发的相同请求：fn 为无参协程函数，相同键同时只执行一次，所有等待方得到同一结果（或同一异常）
+
+    调用方不得修改返回值（多个请求共享同一对象）
+    """
+    key = make_key(endpoint, organization_id, params)
+    _count(endpoint, "calls")
+    task = _inflight.get(key)
+    if task is not None:
+        _count(endpoint, "coalesced_local")
+    else:
+        task = asyncio.ensure_future(_execute(endpoint, key, fn))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _execute(endpoint, key, fn):
+    client = get_redis_client() if config.SINGLE_FLIGHT_REDIS_LOCK else None
+    if client is None:
+        return await _run(endpoint, fn)
+
+    # Redis 客户端为同步实现，每次读写都放到线程池执行，避免阻塞事件循环
+    lock_key = f"{_LOCK_KEY_PREFIX}{key}"
+    result_key = f"{_RESULT_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    try:
+        acquired = await asyncio.to_thread(client.set, lock_key, token, nx=True, ex=config.SINGLE_FLIGHT_LOCK_TTL)
+        if acquired:
+            # 清除上一轮遗留的结果，等待方只会读到本轮计算的结果
+            await asyncio.to_thread(client.delete, result_key)
+    except Exception as e:
+        logger.warning(f"获取合并锁失败，改为仅进程内合并: {str(e)}")
+        mark_redis_failure()
+        return await _run(endpoint, fn)
+
+    if acquired:
+        try:
+            result = await _run(endpoint, fn)
+            await _publish_result(endpoint, client, result_key, result)
+            return result
+        finally:
+            try:
+                await asyncio.to_thread(client.eval, _RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning(f"释放合并锁失败: {str(e)}")
+
+    # 其他进程正在计算：等待其结果
+    deadline = time.monotonic() + config.SINGLE_FLIGHT_WAIT_TIMEOUT
+    interval = _POLL_INTERVAL
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, _POLL_INTERVAL_MAX)
+        try:
+            raw = await asyncio.to_thread(client.get, result_key)
+            if raw is not None:
+                _count(endpoint, "coalesced_remote")
+                return loads(raw)
+            if not await asyncio.to_thread(client.exists, lock_key):
+                break
+        except Exception as e:
+            logger.warning(f"读取合并结果失败: {str(e)}")
+            mark_redis_failure()
+            break
+    return await _run(endpoint, fn)
+
+
+async def _publish_result(endpoint, client, result_key, result):
+    """写入结果供其他进程的等待方读取；结果无法 JSON 序列化属于调用方问题，不视为 Redis 故障"""
+    try:
+        payload = dumps(result)
+    except (TypeError, ValueError) as e:
+        # 不写结果：锁释放后其他进程的等待方自行计算
+        logger.warning(f"合并结果无法序列化，跳过跨进程共享: endpoint={endpoint}, error={str(e)}")
+        return
+    try:
+        await asyncio.to_thread(client.set, result_key, payload, ex=config.SINGLE_FLIGHT_RESULT_TTL)
+    except Exception as e:
+        logger.warning(f"写入合并结果失败: {str(e)}")
+        mark_redis_failure()
+
+
+async def _run(endpoint, fn):
+    _count(endpoint, "executions")
+    try:
+        return await fn()
+    except Exception:
+        _count(endpoint, "errors")
+        raise
+
+
+def get_single_flight_stats():
+    """
+    各接口的合并统计（当前进程）
+
+    coalescing_rate = 被合并的请求数 / 总请求数；executions 为实际执行计算的次数
+    """
+    with _stats_lock:
+        snapshot = {endpoint: dict(stats) for endpoint, stats in _stats.items()}
+    for stats in snapshot.values():
+        coalesced = stats["coalesced_local"] + stats["coalesced_remote"]
+        stats["coalescing_rate"] = round(coalesced / stats["calls"], 4) if stats["calls"] else 0.0
+    return {"in_flight": len(_inflight), "endpoints": snapshot}
@@ -0,0 +1,251 @@
+"""
+任务进度实时推送（Redis pub/sub + Server-Sent Events）
+
+写入方（Celery 回写路径）在事务提交后调用 publish_task_event，向组织频道 task_events:<org> 发布一条消息：
+- progress: 通话结果回写完成（_query_task_execution_core），附带最新的外呼计数
+- follow_created: 跟进记录创建完成（create_leads_follow / create_leads_follow_by_task_and_phone）
+- status: 任务状态（task_type）变化（check_and_update_task_status）
+
+订阅方：每个 API 进程只持有一个 Redis 订阅连接（TaskEventHub，按模式订阅全部组织频道），
+在进程内按组织 / 任务分发给各个 SSE 连接的队列，连接数增加不会增加 Redis 连接与查询。
+
+pub/sub 不保证送达（订阅断开期间、客户端队列溢出时的消息会丢失）：此时向客户端发送 resync 事件，
+客户端应通过 /tasks/{id}/changes 或列表接口补齐数据。Redis 不可用时发布为空操作，SSE 接口不可用，客户端退回轮询。
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from config import config
+from utils.redis_client import get_redis_client, mark_redis_failure
+
+logger = logging.getLogger(__name__)
+
+EVENT_PROGRESS = "progress"
+EVENT_FOLLOW_CREATED = "follow_created"
+EVENT_STATUS = "status"
+EVENT_RESYNC = "resync"
+
+_CHANNEL_PREFIX = "task_events:"
+
+# 订阅连接断开后的重连间隔（秒）
+_RECONNECT_MIN = 1
+_RECONNECT_MAX = 30
+
+
+def _channel(organization_id) -> str:
+    return f"{_CHANNEL_PREFIX}{organization_id}"
+
+
+def publish_task_event(task_id, event: str, data: Optional[Dict[str, Any]] = None, organization_id=None) -> bool:
+    """
+    发布任务事件（应在数据库事务提交之后调用）；organization_id 为空时按任务查询所属组织
+
+    发布失败只记录日志，不影响调用方；返回是否发布成功
+    """
+    if not config.TASK_EVENTS_ENABLED:
+        return False
+    if organization_id is None:
+        from database.call_task_cache import get_call_task
+        task = get_call_task(task_id)
+        if not task:
+            return False
+        organization_id = task["organization_id"]
+    client = get_redis_client()
+    if client is None:
+        return False
+    message = json.dumps({
+        "event": event,
+        "task_id": int(task_id),
+        "organization_id": str(organization_id),
+        "data": data or {},
+        "time": int(time.time() * 1000),
+    }, ensure_ascii=False, default=str)
+    try:
+        client.publish(_channel(organization_id), message)
+        return True
+    except Exception as e:
+        logger.warning(f"发布任务事件失败: task_id={task_id}, event={event}, error={str(e)}")
+        mark_redis_failure()
+        return False
+
+
+class TaskEventSubscription:
+    """单个 SSE 连接的订阅：task_id 为空时接收组织内全部任务的事件"""
+
+    def __init__(self, organization_id, task_id=None):
+        self.organization_id = str(organization_id)
+        self.task_id = int(task_id) if task_id is not None else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.TASK_EVENTS_QUEUE_SIZE)
+
+    def matches(self, message: Dict[str, Any]) -> bool:
+        if message.get("organization_id") != self.organization_id:
+            return False
+        return self.task_id is None or message.get("task_id") == self.task_id
+
+    def put(self, message: Dict[str, Any]) -> bool:
+        """放入事件；队列已满（客户端消费过慢）时丢弃积压的事件，只保留一条 resync。返回是否丢弃了事件"""
+        try:
+            self.queue.put_nowait(message)
+            return False
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_resync_message("客户端消费过慢，部分事件已丢弃"))
+            return True
+
+
+def _resync_message(reason: str) -> Dict[str, Any]:
+    return {"event": EVENT_RESYNC, "data": {"reason": reason}, "time": int(time.time() * 1000)}
+
+
+class TaskEventHub:
+    """进程内的任务事件分发器：首个订阅者出现时建立 Redis 订阅，最后一个订阅者离开时关闭"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._listener: Optional[asyncio.Task] = None
+        self._connected = False
+        self._stats = {"received": 0, "delivered": 0, "dropped": 0, "reconnects": 0}
+
+    @staticmethod
+    def available() -> bool:
+        """是否可以提供 SSE（已启用且 Redis 可用）"""
+        return config.TASK_EVENTS_ENABLED and get_redis_client() is not None
+
+    def subscribe(self, organization_id, task_id=None) -> TaskEventSubscription:
+        subscription = TaskEventSubscription(organization_id, task_id)
+        self._subscriptions.add(subscription)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription: TaskEventSubscription):
+        self._subscriptions.discard(subscription)
+        if not self._subscriptions and self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    async def close(self):
+        """应用关闭时调用：停止订阅"""
+        self._subscriptions.clear()
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+    def _dispatch(self, raw):
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        self._stats["received"] += 1
+        for subscription in list(self._subscriptions):
+            if subscription.matches(message):
+                if subscription.put(message):
+                    self._stats["dropped"] += 1
+                else:
+                    self._stats["delivered"] += 1
+
+    def _broadcast_resync(self, reason: str):
+        for subscription in list(self._subscriptions):
+            subscription.put(_resync_message(reason))
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        delay = _RECONNECT_MIN
+        interrupted = False
+        while self._subscriptions:
+            client = None
+            pubsub = None
+            try:
+                # 订阅连接长时间阻塞读取，不设置 socket_timeout，由 health_check_interval 检测断线
+                client = aioredis.Redis(
+                    host=config.REDIS_HOST,
+                    port=config.REDIS_PORT,
+                    db=config.REDIS_DB,
+                    password=config.REDIS_PASSWORD or None,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                    health_check_interval=30,
+                )
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.psubscribe(f"{_CHANNEL_PREFIX}*")
+                self._connected = True
+                delay = _RECONNECT_MIN
+                if interrupted:
+                    # 断线期间发布的事件已丢失，通知客户端重新拉取
+                    self._broadcast_resync("推送连接已恢复，期间的事件可能丢失")
+                    interrupted = False
+                async for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._dispatch(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"任务事件订阅中断，{delay} 秒后重连: {str(e)}")
+                self._stats["reconnects"] += 1
+                interrupted = True
+                self._connected = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_MAX)
+            finally:
+                self._connected = False
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+                if client is not None:
+                    try:
+                        await client.close()
+                    except Exception:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, subscribers=len(self._subscriptions), connected=self._connected)
+
+
+task_event_hub = TaskEventHub()
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """格式化一条 SSE 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def task_event_stream(request, organization_id, task_id=None, snapshot=None):
+    """
+    SSE 响应体生成器：订阅后先发送 snapshot()（无参协程函数，返回 [(event, data), ...]）生成的初始事件，
+    之后转发订阅到的事件，空闲时定期发送心跳注释
+
+    先订阅再生成快照，快照期间发生的变化会随后以事件送达（可能与快照重复，事件按最新值覆盖即可）；客户端断开后退出并取消订阅
+    """
+    subscription = task_event_hub.subscribe(organization_id, task_id)
+    try:
+        yield f"retry: {config.TASK_EVENTS_RETRY_MS}\n\n"
+        for event, data in (await snapshot() if snapshot else ()):
+            yield format_sse(event, data)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=config.TASK_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            payload = {key: message.get(key) for key in ("task_id", "data", "time") if key in message}
+            yield format_sse(message.get("event") or "message", payload)
+    finally:
+        task_event_hub.unsubscribe(subscription)
+
+
+def get_task_event_stats() -> Dict[str, Any]:
+    """当前进程的任务事件推送统计"""
+    return task_event_hub.stats()